@@ -1,39 +1,45 @@
 import webbrowser
 from threading import Timer
 
-from flask import Flask, render_template_string
+import click
+from flask import Flask, render_template
+from jinja2 import FileSystemBytecodeCache
 
-from core.db import get_db, init_db
+from core.db import engine, get_db, init_db
 from core.models import Image, ImageStatus, SearchTerm
+from core.search_index import init_search_index
+from routes.admin import admin_bp
 from routes.explorer import explorer_bp
 from routes.gallery import gallery_bp
+from routes.lease import lease_bp
 from routes.review import review_bp
+from routes.search import search_bp
 from routes.settings import settings_bp
 from routes.setup import setup_bp
-from utils.common_utils import create_folders_if_not_exist, delete_files_if_exist, read_html_as_string
-from utils.env_constants import app_host, app_port, project_name, use_debug_mode, use_reloader
-
-# Initialize Database
-init_db()
-
-# Create necessary folders (keep assets for downloaded images)
-create_folders_if_not_exist([
-    "assets",
-    "assets/zip_files",
-    f"assets/{project_name}",
-    f"assets/{project_name}/image_files",
-    f"assets/{project_name}/json_files",
-    f"assets/{project_name}/csv_files",
-    f"assets/{project_name}/log_files"
-])
-
-# Clean up temporary files
-delete_files_if_exist("assets/zip_files")
-
-api_list = ['pexels', 'pixabay', 'unsplash', 'flickr']
-
-ERROR_PAGE_HTML = read_html_as_string("templates/error_page.html")
-HOME_PAGE_HTML = read_html_as_string("templates/home_page.html")
+from services.curation_service import CurationRules, run_curation
+from services.link_check_service import start_link_scheduler
+from services.metadata_service import backfill_metadata
+from services.variant_service import generate_variants
+from utils.common_utils import create_folders_if_not_exist, delete_files_if_exist
+from utils.env_constants import (
+    app_host,
+    app_port,
+    curate_dedupe_distance,
+    curate_workers,
+    download_workers,
+    max_image_kb,
+    min_image_for_term,
+    min_image_height,
+    min_image_width,
+    project_name,
+    provider_fallback_order,
+    use_debug_mode,
+    use_reloader,
+)
+from utils.metrics_utils import init_app_metrics
+from utils.profile_utils import init_app_profiling
+
+TEMPLATE_CACHE_DIR = "assets/cache/jinja"
 
 pages = [
     {'name': 'home', 'route': '/'},
@@ -44,53 +50,138 @@ pages = [
     {'name': 'explorer', 'route': '/explorer'}
 ]
 
-app = Flask(__name__)
-app.register_blueprint(review_bp)
-app.register_blueprint(gallery_bp)
-app.register_blueprint(settings_bp)
-app.register_blueprint(setup_bp)
-app.register_blueprint(explorer_bp)
-
-
-@app.route('/health')
-def health_check():
-    return {"status": "ok"}, 200
-
-
-@app.route('/')
-def home():
-    db = next(get_db())
-    total_terms = db.query(SearchTerm).count()
-    downloaded = db.query(Image).filter(Image.status == ImageStatus.APPROVED.value).count()
-
-    return render_template_string(HOME_PAGE_HTML,
-                                  project_name=project_name,
-                                  total_terms=total_terms,
-                                  downloaded=downloaded)
-
-
-@app.context_processor
-def inject_pages():
-    return dict(pages=pages)
-
-
-@app.errorhandler(404)
-def page_not_found(e):
-    return (render_template_string(ERROR_PAGE_HTML,
-                                   error_code="404",
-                                   error_title="Page Not Found",
-                                   error_message="The page you are looking for may have been moved or deleted."),
-            404)
-
 
-@app.errorhandler(500)
-def internal_server_error(e):
-    return (render_template_string(ERROR_PAGE_HTML,
-                                   error_code="500",
-                                   error_title="Internal Server Error",
-                                   error_message="An unexpected issue occurred on the server side. " +
-                                                 "Please check your code."),
-            500)
+def prepare_workspace():
+    # Initialize Database
+    init_db()
+    init_search_index(engine)
+
+    # Create necessary folders (keep assets for downloaded images)
+    create_folders_if_not_exist([
+        "assets",
+        "assets/zip_files",
+        TEMPLATE_CACHE_DIR,
+        f"assets/{project_name}",
+        f"assets/{project_name}/image_files",
+        f"assets/{project_name}/json_files",
+        f"assets/{project_name}/csv_files",
+        f"assets/{project_name}/log_files"
+    ])
+
+    # Clean up temporary files
+    delete_files_if_exist("assets/zip_files")
+
+
+def create_app() -> Flask:
+    prepare_workspace()
+
+    app = Flask(__name__)
+    # Compiled templates are kept in memory by Jinja; the bytecode cache also skips compiling after a restart
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)}
+    app.config['TEMPLATES_AUTO_RELOAD'] = use_debug_mode
+    app.register_blueprint(review_bp)
+    app.register_blueprint(gallery_bp)
+    app.register_blueprint(settings_bp)
+    app.register_blueprint(setup_bp)
+    app.register_blueprint(explorer_bp)
+    app.register_blueprint(lease_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(search_bp)
+    init_app_metrics(app, engine)
+    init_app_profiling(app)
+    start_link_scheduler()
+
+    @app.route('/health')
+    def health_check():
+        return {"status": "ok"}, 200
+
+    @app.route('/')
+    def home():
+        db = next(get_db())
+        total_terms = db.query(SearchTerm).count()
+        downloaded = db.query(Image).filter(Image.status == ImageStatus.APPROVED.value).count()
+
+        return render_template('home_page.html',
+                               project_name=project_name,
+                               total_terms=total_terms,
+                               downloaded=downloaded)
+
+    @app.cli.command('backfill-metadata')
+    @click.option('--workers', default=download_workers, show_default=True, help='Parallel header reads.')
+    @click.option('--force', is_flag=True, help='Re-read images that already have metadata.')
+    def backfill_metadata_command(workers, force):
+        """Reads dimensions, format and orientation of downloaded images into the database."""
+        report = backfill_metadata(workers=workers, force=force)
+        click.echo(f"Updated {report['updated']} of {report['total']} images ({report['missing']} files missing).")
+
+    @app.cli.command('generate-variants')
+    @click.option('--force', is_flag=True, help='Rebuild renditions that are already up to date.')
+    def generate_variants_command(force):
+        """Builds the IMAGE_VARIANTS renditions of downloaded images on the CPU_WORKERS pool."""
+        report = generate_variants(force=force)
+        click.echo(f"Built {report['generated']} variants for {report['total']} images "
+                   f"({report['up_to_date']} up to date, {report['failed']} failed).")
+
+    @app.cli.command('curate')
+    @click.option('--per-term', default=min_image_for_term, show_default=True, help='Images approved per term.')
+    @click.option('--providers', default=','.join(provider_fallback_order), show_default=True,
+                  help='Providers searched, highest priority first.')
+    @click.option('--min-width', default=min_image_width, show_default=True, help='Minimum width in pixels.')
+    @click.option('--min-height', default=min_image_height, show_default=True, help='Minimum height in pixels.')
+    @click.option('--max-kb', default=max_image_kb, show_default=True, help='Largest file size; 0 accepts any.')
+    @click.option('--pages', default=1, show_default=True, help='Result pages searched per provider.')
+    @click.option('--dedupe-distance', default=curate_dedupe_distance, show_default=True,
+                  help='Thumbnail hash bits two near duplicates may differ in; -1 disables the check.')
+    @click.option('--workers', default=curate_workers, show_default=True, help='Concurrent term searches.')
+    @click.option('--download/--no-download', default=True, show_default=True,
+                  help='Download and convert approved images during the run.')
+    @click.option('--restart', is_flag=True, help='Ignore the checkpoint of an earlier run.')
+    def curate_command(per_term, providers, min_width, min_height, max_kb, pages, dedupe_distance, workers,
+                       download, restart):
+        """Approves the best candidates for every pending term without the review page."""
+        rules = CurationRules(
+            per_term=per_term,
+            providers=[api.strip().lower() for api in providers.split(',') if api.strip()],
+            min_width=min_width,
+            min_height=min_height,
+            max_kb=max_kb,
+            pages=pages,
+            dedupe_distance=dedupe_distance,
+        )
+
+        def show_progress(report):
+            click.echo(f"{report.processed}/{report.terms} terms, {report.approved} approved, "
+                       f"{report.terms_per_minute} terms/min")
+
+        report = run_curation(rules, workers=workers, download=download, restart=restart, progress=show_progress)
+        click.echo(f"Curated {report.processed} terms in {report.seconds:.0f}s ({report.terms_per_minute} terms/min): "
+                   f"{report.completed} complete, {report.short} short, {report.failed} failed, "
+                   f"{report.resumed} already done. Approved {report.approved} images "
+                   f"({report.near_duplicates} near duplicates skipped), downloaded {report.downloaded} "
+                   f"({report.download_failed} failed).")
+
+    @app.context_processor
+    def inject_pages():
+        return dict(pages=pages)
+
+    @app.errorhandler(404)
+    def page_not_found(e):
+        return (render_template('error_page.html',
+                                error_code="404",
+                                error_title="Page Not Found",
+                                error_message="The page you are looking for may have been moved or deleted."),
+                404)
+
+    @app.errorhandler(500)
+    def internal_server_error(e):
+        return (render_template('error_page.html',
+                                error_code="500",
+                                error_title="Internal Server Error",
+                                error_message="An unexpected issue occurred on the server side. " +
+                                              "Please check your code."),
+                500)
+
+    return app
 
 
 def open_browser():
@@ -99,6 +190,7 @@ def open_browser():
 
 
 if __name__ == "__main__":
+    app = create_app()
     Timer(2, open_browser).start()
     app.run(
         host=app_host,
@@ -0,0 +1,59 @@
+"""
+Per-render cost of the two largest pages, before (render_template_string on the raw source)
+and after (render_template through the cached loader).
+
+Usage: python -m benchmarks.template_render_bench [iterations]
+"""
+import sys
+import timeit
+
+from flask import render_template, render_template_string
+
+from app import create_app
+from utils.common_utils import read_html_as_string
+
+REVIEW_CONTEXT = {
+    'finished': False,
+    'term': 'mountain landscape',
+    'term_idx': 3,
+    'total_terms': 120,
+    'photo_url': 'https://example.com/photo.jpg',
+    'downloaded': 42,
+    'current_api': 'pixabay',
+    'term_photo_counter': 1,
+    'project_name': 'bench',
+    'done_terms_count': 3,
+    'reviewer': None,
+}
+
+GALLERY_CONTEXT = {
+    'project_name': 'bench',
+    'gallery_data': {
+        f"term {t}": [{
+            'id': str(t * 100 + i),
+            'api': 'pixabay',
+            'url_original': f"https://example.com/{t}/{i}.jpg",
+            'url_thumbnail': f"https://example.com/{t}/{i}_150.jpg",
+            'url_page': f"https://example.com/{t}/{i}",
+        } for i in range(5)]
+        for t in range(20)
+    },
+}
+
+
+def bench(app, template_name: str, path: str, context: dict, iterations: int):
+    source = read_html_as_string(f"templates/{template_name}")
+    with app.test_request_context(path):
+        before = timeit.timeit(lambda: render_template_string(source, **context), number=iterations)
+        render_template(template_name, **context)  # warm the loader cache
+        after = timeit.timeit(lambda: render_template(template_name, **context), number=iterations)
+
+    print(f"{template_name:<20} before: {before / iterations * 1000:8.3f} ms/render   "
+          f"after: {after / iterations * 1000:8.3f} ms/render   speedup: {before / after:5.1f}x")
+
+
+if __name__ == '__main__':
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    app = create_app()
+    bench(app, 'review_page.html', '/review', REVIEW_CONTEXT, iterations)
+    bench(app, 'gallery_page.html', '/gallery', GALLERY_CONTEXT, iterations)
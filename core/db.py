@@ -1,14 +1,12 @@
 import os
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
 
 from utils.env_constants import project_name
 from utils.log_utils import logger
 
-# Create database directory if it doesn't exist
 DB_FOLDER = f"assets/{project_name}/database"
-os.makedirs(DB_FOLDER, exist_ok=True)
 
 DB_PATH = os.path.join(DB_FOLDER, f"{project_name}.db")
 DATABASE_URL = f"sqlite:///{DB_PATH}"
@@ -19,7 +17,31 @@ SessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bi
 Base = declarative_base()
 
 def init_db():
+    # Create database directory if it doesn't exist
+    os.makedirs(DB_FOLDER, exist_ok=True)
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+
+
+def add_missing_columns():
+    # create_all() never alters existing tables, so columns added to the models later
+    # are appended here to keep databases from older versions usable.
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                logger.info(f"Added column {table.name}.{column.name}")
+
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
 
 def get_db():
     db = SessionLocal()
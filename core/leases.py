@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import aliased
+
+from core.db import get_db
+from core.models import Image, ImageStatus, SearchTerm
+from utils.env_constants import min_image_for_term, term_lease_batch, term_lease_seconds
+from utils.log_utils import logger
+
+
+def _approved_count(term_table):
+    return (
+        select(func.count(Image.id))
+        .where(Image.search_term_id == term_table.id, Image.status == ImageStatus.APPROVED.value)
+        .correlate(term_table)
+        .scalar_subquery()
+    )
+
+
+def is_lease_free(now: datetime):
+    return or_(SearchTerm.lease_expires_at.is_(None), SearchTerm.lease_expires_at < now)
+
+
+def is_leased_by_other(reviewer: Optional[str], now: datetime):
+    held = and_(SearchTerm.leased_by.is_not(None), SearchTerm.lease_expires_at >= now)
+    if reviewer:
+        return and_(held, SearchTerm.leased_by != reviewer)
+    return held
+
+
+def claim_terms(reviewer: str, batch_size: int = term_lease_batch,
+                lease_seconds: int = term_lease_seconds) -> list[dict]:
+    """
+    Leases up to batch_size pending terms to the reviewer.
+    Claiming is a single UPDATE ... RETURNING statement, so two reviewers can never get the same term.
+    Terms whose lease has expired are treated as free again.
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=lease_seconds)
+
+    candidate = aliased(SearchTerm)
+    free_pending_ids = (
+        select(candidate.id)
+        .where(
+            or_(candidate.lease_expires_at.is_(None), candidate.lease_expires_at < now),
+            _approved_count(candidate) < min_image_for_term
+        )
+        .order_by(candidate.id)
+        .limit(batch_size)
+    )
+
+    stmt = (
+        update(SearchTerm)
+        .where(SearchTerm.id.in_(free_pending_ids), is_lease_free(now))
+        .values(leased_by=reviewer, lease_expires_at=expires_at)
+        .returning(SearchTerm.id, SearchTerm.term)
+        .execution_options(synchronize_session=False)
+    )
+
+    db = next(get_db())
+    try:
+        rows = db.execute(stmt).all()
+        db.commit()
+    except Exception as e:
+        logger.error(f"Error claiming terms for reviewer {reviewer}: {e}")
+        db.rollback()
+        return []
+
+    logger.info(f"Reviewer {reviewer} leased {len(rows)} terms until {expires_at}")
+    return [{'id': row.id, 'term': row.term, 'lease_expires_at': expires_at} for row in rows]
+
+
+def extend_lease(reviewer: str, lease_seconds: int = term_lease_seconds) -> int:
+    now = datetime.utcnow()
+    stmt = (
+        update(SearchTerm)
+        .where(SearchTerm.leased_by == reviewer, SearchTerm.lease_expires_at >= now)
+        .values(lease_expires_at=now + timedelta(seconds=lease_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    return _execute_lease_update(stmt, f"extending lease of {reviewer}")
+
+
+def release_lease(reviewer: str, term_ids: Optional[list[int]] = None) -> int:
+    condition = SearchTerm.leased_by == reviewer
+    if term_ids is not None:
+        condition = and_(condition, SearchTerm.id.in_(term_ids))
+
+    stmt = (
+        update(SearchTerm)
+        .where(condition)
+        .values(leased_by=None, lease_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    return _execute_lease_update(stmt, f"releasing lease of {reviewer}")
+
+
+def release_expired_leases() -> int:
+    stmt = (
+        update(SearchTerm)
+        .where(SearchTerm.leased_by.is_not(None), SearchTerm.lease_expires_at < datetime.utcnow())
+        .values(leased_by=None, lease_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    return _execute_lease_update(stmt, "releasing expired leases")
+
+
+def get_leased_terms(reviewer: str) -> list[str]:
+    """Returns the pending terms currently leased to the reviewer, in claim order."""
+    db = next(get_db())
+    terms = (
+        db.query(SearchTerm.term)
+        .filter(
+            SearchTerm.leased_by == reviewer,
+            SearchTerm.lease_expires_at >= datetime.utcnow(),
+            _approved_count(SearchTerm) < min_image_for_term
+        )
+        .order_by(SearchTerm.id)
+        .all()
+    )
+    return [t.term for t in terms]
+
+
+def _execute_lease_update(stmt, action: str) -> int:
+    db = next(get_db())
+    try:
+        result = db.execute(stmt)
+        db.commit()
+        return result.rowcount
+    except Exception as e:
+        logger.error(f"Error {action}: {e}")
+        db.rollback()
+        return 0
@@ -1,7 +1,7 @@
 import enum
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from core.db import Base
@@ -19,28 +19,89 @@ class SearchTerm(Base):
     term = Column(String, unique=True, index=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Review lease, see core/leases.py
+    leased_by = Column(String, nullable=True, index=True)
+    lease_expires_at = Column(DateTime, nullable=True, index=True)
+
     # Relationship to images
     images = relationship("Image", back_populates="search_term", cascade="all, delete-orphan")
 
 class Image(Base):
     __tablename__ = "images"
-    __table_args__ = (UniqueConstraint('source_id', 'source_api', name='_source_api_uc'),)
+    __table_args__ = (
+        UniqueConstraint('source_id', 'source_api', name='_source_api_uc'),
+        Index('ix_images_width_height', 'width', 'height'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     source_id = Column(String, index=True, nullable=False) # ID from the external API (Pexels, Pixabay etc.)
-    source_api = Column(String, nullable=False) # 'pexels', 'pixabay', 'unsplash', 'flickr'
+    source_api = Column(String, nullable=False) # 'pexels', 'pixabay', 'unsplash', 'flickr', 'wger'
 
     url_original = Column(String, nullable=True)
     url_thumbnail = Column(String, nullable=True)
     url_page = Column(String, nullable=True)
     extension = Column(String, default="jpg")
 
+    # As reported by the provider at approval, indexed for /api/search, see core/search_index.py
+    tags = Column(String, nullable=True)
+    description = Column(String, nullable=True)
+
     file_path = Column(String, nullable=True) # Local path if downloaded
 
+    # Download manifest, see services/download_sync_service.py
+    file_size = Column(Integer, nullable=True)
+    file_sha256 = Column(String, nullable=True)
+    download_etag = Column(String, nullable=True)
+    download_last_modified = Column(String, nullable=True)
+    downloaded_at = Column(DateTime, nullable=True)
+    # Set when OVERSIZE_MODE=fit re-encoded the download into MAX_KB_IMAGE_SIZE, see utils/image_utils.fit_to_budget
+    fit_quality = Column(Integer, nullable=True)
+    fit_scale = Column(Float, nullable=True)
+    source_file_size = Column(Integer, nullable=True)  # size of the original before re-encoding
+
+    # Read from the downloaded file's header, see utils/image_utils.read_image_header
+    width = Column(Integer, nullable=True)  # as displayed, i.e. after applying the EXIF orientation
+    height = Column(Integer, nullable=True)
+    color_mode = Column(String, nullable=True)
+    image_format = Column(String, nullable=True, index=True)
+    orientation = Column(Integer, nullable=True)  # EXIF orientation tag, 1 when absent
+    # Difference hash of the thumbnail, set by the curate command, see utils/image_utils.dhash
+    dhash = Column(String, nullable=True)
+
     status = Column(String, default=ImageStatus.PENDING.value)
 
     search_term_id = Column(Integer, ForeignKey("search_terms.id"))
     search_term = relationship("SearchTerm", back_populates="images")
 
     created_at = Column(DateTime, default=datetime.utcnow)
+    metadata_refreshed_at = Column(DateTime, nullable=True, index=True)
+
+    # Link-rot scanner, see services/link_check_service.py
+    link_status = Column(Integer, nullable=True)  # last HTTP status of url_original, 0 when unreachable
+    link_checked_at = Column(DateTime, nullable=True)
+    link_next_check_at = Column(DateTime, nullable=True, index=True)
+    link_failures = Column(Integer, default=0)
+    link_etag = Column(String, nullable=True)
+    link_last_modified = Column(String, nullable=True)
+
+    variants = relationship("ImageVariant", back_populates="image", cascade="all, delete-orphan")
+
+
+class ImageVariant(Base):
+    """A rendition built from the downloaded original, see services/variant_service.py"""
+    __tablename__ = "image_variants"
+    __table_args__ = (UniqueConstraint('image_id', 'name', name='_image_variant_uc'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    image_id = Column(Integer, ForeignKey("images.id"), index=True, nullable=False)
+    name = Column(String, nullable=False)  # as configured in IMAGE_VARIANTS, e.g. 'thumb'
+    source_sha256 = Column(String, nullable=False)  # the original it was built from; rebuilt when this changes
+    path = Column(String, nullable=False)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    file_size = Column(Integer, nullable=True)
+    image_format = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    image = relationship("Image", back_populates="variants")
 
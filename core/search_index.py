@@ -0,0 +1,132 @@
+import re
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from core.db import get_db
+from core.models import ImageStatus
+from utils.log_utils import logger
+
+# Column weights for bm25: a match on the search term counts most, then tags, then the description
+RANK = 'bm25(5.0, 2.0, 1.0)'
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+# Matches scored per query. Broad prefixes like 'a*' can match most of the index; scoring a bounded window keeps
+# them fast at the cost of ranking only the first matches in index order. Responses say when that happened.
+RANK_WINDOW = 5000
+APPROVED = ImageStatus.APPROVED.value
+
+SCHEMA = (
+    # One row per approved image, rowid = images.id, so the window only ever holds searchable images. Prefix
+    # indexes keep 'app*' style queries to an index lookup.
+    "CREATE VIRTUAL TABLE images_fts USING fts5("
+    "term, tags, description, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    f"INSERT INTO images_fts(images_fts, rank) VALUES ('rank', '{RANK}')",
+)
+
+BACKFILL = (
+    "INSERT INTO images_fts(rowid, term, tags, description) "
+    "SELECT images.id, search_terms.term, images.tags, images.description "
+    "FROM images LEFT JOIN search_terms ON search_terms.id = images.search_term_id "
+    f"WHERE images.status = '{APPROVED}'"
+)
+
+TRIGGERS = {
+    'images_fts_insert': f"""CREATE TRIGGER images_fts_insert AFTER INSERT ON images
+    WHEN new.status = '{APPROVED}' BEGIN
+        INSERT INTO images_fts(rowid, term, tags, description)
+        VALUES (new.id, (SELECT term FROM search_terms WHERE id = new.search_term_id), new.tags, new.description);
+    END""",
+    'images_fts_delete': """CREATE TRIGGER images_fts_delete AFTER DELETE ON images BEGIN
+        DELETE FROM images_fts WHERE rowid = old.id;
+    END""",
+    # Re-indexing on every change also adds images when they get approved and drops them when they no longer are
+    'images_fts_update': f"""CREATE TRIGGER images_fts_update
+    AFTER UPDATE OF tags, description, search_term_id, status ON images BEGIN
+        DELETE FROM images_fts WHERE rowid = old.id;
+        INSERT INTO images_fts(rowid, term, tags, description)
+        SELECT new.id, (SELECT term FROM search_terms WHERE id = new.search_term_id), new.tags, new.description
+        WHERE new.status = '{APPROVED}';
+    END""",
+    'images_fts_term_update': """CREATE TRIGGER images_fts_term_update AFTER UPDATE OF term ON search_terms BEGIN
+        UPDATE images_fts SET term = new.term
+        WHERE rowid IN (SELECT id FROM images WHERE search_term_id = new.id);
+    END""",
+}
+
+
+def init_search_index(engine: Engine):
+    """
+    Creates the FTS5 index and the triggers that keep it in sync, indexing existing approved images the first
+    time. Triggers whose definition changed are replaced; an index from before only approved images were indexed
+    drops the rest.
+    """
+    with engine.begin() as conn:
+        exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'images_fts'")).first()
+        if not exists:
+            for statement in SCHEMA:
+                conn.execute(text(statement))
+            conn.execute(text(BACKFILL))
+            logger.info("Created the images_fts search index")
+
+        current = dict(conn.execute(text(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'images_fts_%'"
+        )).all())
+        if exists and 'WHEN' not in (current.get('images_fts_insert') or ''):
+            conn.execute(text(
+                f"DELETE FROM images_fts WHERE rowid NOT IN (SELECT id FROM images WHERE status = '{APPROVED}')"
+            ))
+            logger.info("Dropped images that aren't approved from the images_fts search index")
+        for name, trigger in TRIGGERS.items():
+            if current.get(name) != trigger:
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+                conn.execute(text(trigger))
+
+
+def to_match_query(query: str) -> Optional[str]:
+    """
+    Every word must match, the last one as a prefix so results show up while typing. Single letters are not
+    expanded since the prefix indexes start at two characters and 'a*' would scan the whole index.
+    """
+    tokens = TOKEN_PATTERN.findall(query.lower())
+    if not tokens:
+        return None
+    words = [f'"{token}"' for token in tokens]
+    if len(tokens[-1]) > 1:
+        words[-1] += '*'
+    return ' '.join(words)
+
+
+def search_images(query: str, page: int = 1, per_page: int = 20) -> dict:
+    """
+    Approved images ranked by bm25 over term, tags and description. The FTS index holds only approved images,
+    answers the MATCH and scores the first RANK_WINDOW matches on its own; only that window is joined back to
+    images. `truncated` says there were more matches than the window, so some can't be reached by paging.
+    """
+    match = to_match_query(query)
+    if match is None:
+        return {'results': [], 'page': page, 'per_page': per_page, 'has_more': False, 'truncated': False}
+
+    db = next(get_db())
+    rows = db.execute(text(
+        "SELECT images.id, images.source_id, images.source_api, images.url_thumbnail, images.url_page, "
+        "images.tags, images.description, search_terms.term, hits.rank "
+        "FROM (SELECT rowid, rank FROM images_fts WHERE images_fts MATCH :match LIMIT :window) AS hits "
+        "JOIN images ON images.id = hits.rowid "
+        "LEFT JOIN search_terms ON search_terms.id = images.search_term_id "
+        "WHERE images.status = :status "
+        "ORDER BY hits.rank LIMIT :limit OFFSET :offset"
+    ), {'match': match, 'status': APPROVED, 'window': RANK_WINDOW,
+        'limit': per_page + 1, 'offset': (page - 1) * per_page}).mappings().all()
+    # Without ranking, counting one match past the window is an index scan
+    matches = db.execute(text(
+        "SELECT COUNT(*) FROM (SELECT rowid FROM images_fts WHERE images_fts MATCH :match LIMIT :window)"
+    ), {'match': match, 'window': RANK_WINDOW + 1}).scalar()
+
+    return {
+        'results': [dict(row) for row in rows[:per_page]],
+        'page': page,
+        'per_page': per_page,
+        'has_more': len(rows) > per_page,
+        'truncated': matches > RANK_WINDOW,
+    }
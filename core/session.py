@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
-from typing import Any
+from threading import Lock
+from typing import Any, Optional
 
 
 @dataclass
@@ -7,7 +8,8 @@ class SessionState:
     term_idx: int = 0
     photo_idx: int = 0
     current_api: str = 'pexels'
-    photos_cache: dict[int, list[Any]] = field(default_factory=dict)
+    photos_cache: dict[int, Any] = field(default_factory=dict)  # term index -> CandidateStream
+    reviewer: Optional[str] = None
 
     def reset_photo_idx(self):
         self.photo_idx = 0
@@ -15,5 +17,29 @@ class SessionState:
     def clear_cache(self):
         self.photos_cache = {}
 
-# Global instance for single-user app
+# Global instance for the anonymous (single-user) reviewer
 session = SessionState()
+
+# Named reviewers working on leased terms, see core/leases.py
+_reviewer_sessions: dict[str, SessionState] = {}
+_reviewer_sessions_lock = Lock()
+
+
+def get_session(reviewer: Optional[str] = None) -> SessionState:
+    if not reviewer:
+        return session
+
+    with _reviewer_sessions_lock:
+        if reviewer not in _reviewer_sessions:
+            _reviewer_sessions[reviewer] = SessionState(reviewer=reviewer)
+        return _reviewer_sessions[reviewer]
+
+
+def drop_session(reviewer: str):
+    with _reviewer_sessions_lock:
+        _reviewer_sessions.pop(reviewer, None)
+
+
+def get_all_sessions() -> list[SessionState]:
+    with _reviewer_sessions_lock:
+        return [session, *_reviewer_sessions.values()]
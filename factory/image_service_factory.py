@@ -1,28 +1,80 @@
-from services.flickr_service import FlickrService
+import importlib
+from collections.abc import Callable
+from importlib.metadata import EntryPoint, entry_points
+from threading import Lock
+
 from services.image_service import ImageService
-from services.pexels_service import PexelsService
-from services.pixabay_service import PixabayService
-from services.unsplash_service import UnsplashService
+from utils.log_utils import logger
+
+# Third-party providers can register "<api_type> = module:Class" under this entry point group
+ENTRY_POINT_GROUP = 'copyright_free_image_viewer.image_services'
+
+ServiceTarget = str | EntryPoint | Callable[[], ImageService]
 
 
 class ImageServiceFactory:
     """Factory class to manage and provide image services."""
 
-    # Pre-instantiate services in a registry dictionary
-    _services = {
-        'pexels': PexelsService(),
-        'pixabay': PixabayService(),
-        'unsplash': UnsplashService(),
-        'flickr': FlickrService()
+    # Built-in services are only imported and instantiated on first use
+    _registry: dict[str, ServiceTarget] = {
+        'pexels': 'services.pexels_service:PexelsService',
+        'pixabay': 'services.pixabay_service:PixabayService',
+        'unsplash': 'services.unsplash_service:UnsplashService',
+        'flickr': 'services.flickr_service:FlickrService',
+        'wger': 'services.wger_service:WgerService'
     }
+    _services: dict[str, ImageService] = {}
+    _entry_points_loaded = False
+    _lock = Lock()
+
+    @classmethod
+    def register(cls, api_type: str, target: ServiceTarget):
+        with cls._lock:
+            cls._registry[api_type.lower()] = target
+            cls._services.pop(api_type.lower(), None)
+
+    @classmethod
+    def _load_entry_points(cls):
+        if cls._entry_points_loaded:
+            return
+        cls._entry_points_loaded = True
+        try:
+            for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+                cls._registry.setdefault(entry_point.name.lower(), entry_point)
+        except Exception as e:
+            logger.error(f"Error discovering image service entry points: {e}")
+
+    @staticmethod
+    def _build(target: ServiceTarget) -> ImageService:
+        if isinstance(target, EntryPoint):
+            return target.load()()
+        if isinstance(target, str):
+            module_name, class_name = target.split(':')
+            return getattr(importlib.import_module(module_name), class_name)()
+        return target()
+
+    @classmethod
+    def available_services(cls) -> list[str]:
+        with cls._lock:
+            cls._load_entry_points()
+            return list(cls._registry.keys())
 
     @classmethod
     def get_service(cls, api_type: str) -> ImageService:
         """
-        Returns the appropriate service based on api_type.
+        Returns the appropriate service based on api_type, building it on first use.
         Raises ValueError if the service is not found.
         """
-        service = cls._services.get(api_type.lower())
-        if not service:
-            raise ValueError(f"Unknown API type: {api_type}. Available: {list(cls._services.keys())}")
-        return service
+        api_type = api_type.lower()
+        service = cls._services.get(api_type)
+        if service:
+            return service
+
+        with cls._lock:
+            if api_type not in cls._services:
+                cls._load_entry_points()
+                target = cls._registry.get(api_type)
+                if target is None:
+                    raise ValueError(f"Unknown API type: {api_type}. Available: {list(cls._registry.keys())}")
+                cls._services[api_type] = cls._build(target)
+            return cls._services[api_type]
@@ -0,0 +1,59 @@
+import tracemalloc
+
+from flask import Blueprint, jsonify, request, send_from_directory
+
+from utils.blob_store import blob_store
+from utils.profile_utils import (
+    PROFILE_DIR,
+    get_memory_reports,
+    get_slow_requests,
+    photos_cache_stats,
+    set_tracemalloc,
+    take_memory_snapshot,
+)
+
+admin_bp = Blueprint('admin', __name__)
+
+
+@admin_bp.route('/admin/profiles')
+def profiles():
+    return jsonify({"status": "success", "slow_requests": get_slow_requests()})
+
+
+@admin_bp.route('/admin/profiles/<path:filename>')
+def profile_file(filename):
+    return send_from_directory(PROFILE_DIR, filename, as_attachment=True)
+
+
+@admin_bp.route('/admin/memory')
+def memory():
+    return jsonify({
+        "status": "success",
+        "photos_cache": photos_cache_stats(),
+        "reports": get_memory_reports()
+    })
+
+
+@admin_bp.route('/admin/memory/toggle', methods=['POST'])
+def toggle_memory():
+    enabled = request.values.get('enabled', 'true').lower() == 'true'
+    set_tracemalloc(enabled)
+    return jsonify({"status": "success", "message": f"tracemalloc {'enabled' if enabled else 'disabled'}."})
+
+
+@admin_bp.route('/admin/memory/snapshot', methods=['POST'])
+def memory_snapshot():
+    if not tracemalloc.is_tracing():
+        return jsonify({"status": "error", "message": "tracemalloc is not enabled."}), 400
+    return jsonify({"status": "success", "report": take_memory_snapshot()})
+
+
+@admin_bp.route('/admin/storage')
+def storage():
+    return jsonify({"status": "success", "blob_store": blob_store.stats()})
+
+
+@admin_bp.route('/admin/storage/prune', methods=['POST'])
+def prune_storage():
+    removed = blob_store.prune_missing()
+    return jsonify({"status": "success", "message": f"Removed {removed} unreferenced blobs."})
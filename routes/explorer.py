@@ -1,30 +1,52 @@
 import os
 import shutil
+from datetime import datetime, timedelta
 
-from flask import Blueprint, jsonify, render_template_string
+from flask import Blueprint, jsonify, render_template, request
 
 from core.db import get_db, get_query_as_json
-from core.models import Image
+from core.models import Image, ImageVariant
 from factory.image_service_factory import ImageServiceFactory
-from utils.common_utils import get_directory_tree, read_html_as_string, save_csv_file, save_json_file
-from utils.env_constants import project_name
+from services.refetch_service import get_job, get_jobs, start_refetch
+from services.variant_service import prune_variants
+from utils.blob_store import blob_store
+from utils.common_utils import list_directory_page, save_csv_file, save_json_file
+from utils.env_constants import explorer_page_size, project_name
 from utils.image_utils import convert_to_webp
 from utils.log_utils import logger
 
 explorer_bp = Blueprint('explorer', __name__)
-EXPLORER_PAGE_HTML = read_html_as_string("templates/explorer_page.html")
 
 
 @explorer_bp.route('/explorer')
 def explorer():
-    root_path = os.path.join('assets', project_name)
-    tree_data = get_directory_tree(root_path) if os.path.exists(root_path) else {}
-    return render_template_string(
-        EXPLORER_PAGE_HTML,
-        tree_data=tree_data,
+    return render_template(
+        'explorer_page.html',
+        page_size=explorer_page_size,
         project_name=project_name
     )
 
+
+@explorer_bp.route('/explorer/api/list')
+def list_directory():
+    root_path = os.path.realpath(os.path.join('assets', project_name))
+    rel_path = request.args.get('path', '').strip('/')
+    path = os.path.realpath(os.path.join(root_path, rel_path))
+    if os.path.commonpath([root_path, path]) != root_path:
+        return jsonify({"status": "error", "message": "Path is outside the project folder."}), 400
+    if not os.path.isdir(path):
+        return jsonify({"status": "error", "message": f"Folder {rel_path or '/'} not found."}), 404
+
+    offset = max(0, request.args.get('offset', 0, type=int))
+    limit = min(max(1, request.args.get('limit', explorer_page_size, type=int)), 1000)
+    try:
+        listing = list_directory_page(path, offset, limit)
+    except OSError as e:
+        logger.error(f"Error listing {path}: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+    rel_path = '' if path == root_path else os.path.relpath(path, root_path).replace(os.sep, '/')
+    return jsonify({"status": "success", "path": rel_path, **listing})
+
 @explorer_bp.route('/explorer/actions/convert-webp', methods=['POST'])
 def convert_webp_action():
     try:
@@ -68,21 +90,39 @@ def convert_db_csv_action():
 @explorer_bp.route('/explorer/actions/refetch/<api_source>', methods=['POST'])
 def refetch_action(api_source):
     try:
-        logger.info(f"Refetching images from {api_source}...")
         service = ImageServiceFactory.get_service(api_source)
-        db = next(get_db())
-        api_images = db.query(Image).filter(Image.api_source == api_source).all()
+        if not service.supports_fetch:
+            return jsonify({"status": "error", "message": f"{api_source} does not support refetching images."}), 400
 
-        for img in api_images:
-            new_img = service.fetch_image(img.source_id)
-            service.update_image_in_db(new_img)
+        # Only rows not refreshed within the last `stale_days` days, when given
+        stale_days = request.values.get('stale_days', type=float)
+        stale_before = datetime.utcnow() - timedelta(days=stale_days) if stale_days is not None else None
 
-        return jsonify({"status": "success", "message": f"Refetched {len(api_images)} images from {api_source}."})
+        logger.info(f"Refetching images from {api_source}...")
+        job = start_refetch(api_source, service, stale_before)
+        return jsonify({
+            "status": "success",
+            "message": f"Refetch of {api_source} images started.",
+            "job_id": job.id
+        })
     except Exception as e:
         logger.error(f"Error refetching from {api_source}: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+@explorer_bp.route('/explorer/actions/refetch/jobs')
+def refetch_jobs():
+    return jsonify({"status": "success", "jobs": [job.to_dict() for job in get_jobs()]})
+
+
+@explorer_bp.route('/explorer/actions/refetch/jobs/<job_id>')
+def refetch_job_status(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": f"Unknown refetch job {job_id}"}), 404
+    return jsonify({"status": "success", "job": job.to_dict()})
+
+
 @explorer_bp.route('/explorer/actions/delete-images', methods=['POST'])
 def delete_images_action():
     try:
@@ -90,6 +130,13 @@ def delete_images_action():
         if os.path.exists(images_path):
             shutil.rmtree(images_path)
             os.makedirs(images_path, exist_ok=True)
+            blob_store.release_project(project_name)
+            # Renditions of the deleted originals go with them
+            db = next(get_db())
+            sha256s = {sha256 for sha256, in db.query(ImageVariant.source_sha256).distinct()}
+            db.query(ImageVariant).delete()
+            db.commit()
+            prune_variants(sha256s)
             logger.info("Deleted all images in assets folder.")
             return jsonify({"status": "success", "message": "All images deleted."})
         return jsonify({"status": "success", "message": "Images folder not found."})
@@ -102,6 +149,7 @@ def delete_images_action():
 def delete_db_action():
     try:
         db = next(get_db())
+        db.query(ImageVariant).delete()
         db.query(Image).delete()
         db.commit()
         logger.info("Deleted all images from database.")
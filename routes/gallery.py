@@ -1,30 +1,64 @@
 import os
+from typing import Optional
 
-from flask import Blueprint, redirect, render_template_string, request, url_for
+from flask import Blueprint, abort, jsonify, redirect, render_template, request, send_file, url_for
+from sqlalchemy.orm import selectinload
 
 from core.db import get_db
-from core.models import Image, ImageStatus, SearchTerm
-from utils.common_utils import get_project_folder_as_zip, read_html_as_string
+from core.models import Image, ImageStatus, ImageVariant, SearchTerm
+from services.link_check_service import get_job, link_state, start_link_scan
+from services.metadata_service import ORIENTATIONS, filter_by_dimensions
+from services.variant_service import prune_variants
+from utils.blob_store import blob_store
+from utils.common_utils import get_project_folder_as_zip, term_to_folder_name
 from utils.env_constants import project_name
 from utils.log_utils import logger
 
 gallery_bp = Blueprint('gallery', __name__)
-GALLERY_PAGE_HTML = read_html_as_string("templates/gallery_page.html")
 
 
 def image_to_dict(image):
+    # Local renditions, smallest first; the remote thumbnail is only used until they have been built
+    variants = sorted(
+        ({'url': url_for('gallery.variant', image_id=image.id, name=variant.name), 'width': variant.width}
+         for variant in image.variants if variant.width),
+        key=lambda variant: variant['width']
+    )
     return {
         'id': image.source_id,
         'api': image.source_api,
         'url_original': image.url_original,
         'url_thumbnail': image.url_thumbnail,
         'url_page': image.url_page,
+        'link_state': link_state(image.link_status, image.link_failures or 0),
+        'width': image.width,
+        'height': image.height,
+        'image_format': image.image_format,
+        'variants': variants,
+        'src': variants[0]['url'] if variants else image.url_thumbnail,
     }
 
 
-def get_gallery_data():
+def get_dimension_filters(args) -> dict:
+    orientation = args.get('orientation')
+    return {
+        'min_width': args.get('min_width', type=int),
+        'min_height': args.get('min_height', type=int),
+        'orientation': orientation if orientation in ORIENTATIONS else None,
+        'min_aspect': args.get('min_aspect', type=float),
+        'max_aspect': args.get('max_aspect', type=float),
+    }
+
+
+def get_gallery_data(filters: Optional[dict] = None):
     db = next(get_db())
-    images = db.query(Image).join(SearchTerm).filter(Image.status == ImageStatus.APPROVED.value).all()
+    query = (
+        db.query(Image)
+        .join(SearchTerm)
+        .options(selectinload(Image.variants))
+        .filter(Image.status == ImageStatus.APPROVED.value)
+    )
+    images = filter_by_dimensions(query, **(filters or {})).all()
 
     gallery_data = {}
     for img in images:
@@ -40,11 +74,29 @@ def get_gallery_data():
 
 @gallery_bp.route('/gallery')
 def index():
-    gallery_data = get_gallery_data()
+    filters = get_dimension_filters(request.args)
+    gallery_data = get_gallery_data(filters)
+
+    return render_template('gallery_page.html',
+                           gallery_data=gallery_data,
+                           filters=filters,
+                           project_name=project_name), 200
+
+
+@gallery_bp.route('/variants/<int:image_id>/<name>')
+def variant(image_id, name):
+    db = next(get_db())
+    image_variant = db.query(ImageVariant).filter(
+        ImageVariant.image_id == image_id,
+        ImageVariant.name == name
+    ).first()
+    if image_variant is None or not os.path.exists(image_variant.path):
+        image = db.get(Image, image_id)
+        if image is None or not image.url_thumbnail:
+            abort(404)
+        return redirect(image.url_thumbnail)
 
-    return render_template_string(GALLERY_PAGE_HTML,
-                                  gallery_data=gallery_data,
-                                  project_name=project_name), 200
+    return send_file(os.path.abspath(image_variant.path), max_age=3600)
 
 
 @gallery_bp.route('/delete-image', methods=['POST'])
@@ -53,10 +105,7 @@ def delete_image():
     image_id = request.form.get('imageID')
     api_type = request.form.get('api')
     extension = request.form.get('extension', 'jpg')
-    full_file_path_flat = f"assets/{project_name}/image_files/{term}/{image_id}.{extension}"
-
-    if os.path.exists(full_file_path_flat):
-        os.remove(full_file_path_flat)
+    full_file_path_flat = f"assets/{project_name}/image_files/{term_to_folder_name(term)}/{image_id}.{extension}"
 
     encoded_id = str(image_id)
     db = next(get_db())
@@ -66,9 +115,14 @@ def delete_image():
             Image.source_api == api_type
         ).first()
 
+        # Drops this term's link; the shared blob goes with its last reference
+        blob_store.release((img_to_delete and img_to_delete.file_path) or full_file_path_flat)
+
         if img_to_delete:
+            sha256s = {variant.source_sha256 for variant in img_to_delete.variants}
             db.delete(img_to_delete)
             db.commit()
+            prune_variants(sha256s)
 
     except Exception as e:
         logger.error(f"Error deleting image from DB: {e}")
@@ -77,6 +131,24 @@ def delete_image():
     return redirect(url_for('gallery.index'))
 
 
+@gallery_bp.route('/gallery/actions/check-links', methods=['POST'])
+def check_links():
+    try:
+        job = start_link_scan()
+        return jsonify({"status": "success", "message": "Link check started.", "job_id": job.id})
+    except Exception as e:
+        logger.error(f"Error starting link check: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@gallery_bp.route('/gallery/actions/check-links/<job_id>')
+def check_links_status(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": f"Unknown link check {job_id}"}), 404
+    return jsonify({"status": "success", "job": job.to_dict()})
+
+
 @gallery_bp.route('/download-zip')
 def download_zip():
     try:
@@ -0,0 +1,93 @@
+from flask import Blueprint, jsonify, make_response, redirect, request, url_for
+
+from core.leases import claim_terms, extend_lease, get_leased_terms, release_expired_leases, release_lease
+from core.session import drop_session
+from routes.review import REVIEWER_COOKIE
+from utils.env_constants import term_lease_batch, term_lease_seconds
+from utils.log_utils import logger
+
+lease_bp = Blueprint('lease', __name__)
+
+
+def get_reviewer() -> str:
+    payload = request.get_json(silent=True) or {}
+    reviewer = payload.get('reviewer') or request.values.get('reviewer') or request.cookies.get(REVIEWER_COOKIE)
+    return (reviewer or '').strip()
+
+
+@lease_bp.route('/review/join')
+def join():
+    reviewer = get_reviewer()
+    if not reviewer:
+        return redirect(url_for('review.index'))
+
+    logger.info(f"Reviewer {reviewer} joined the review")
+    response = make_response(redirect(url_for('review.index')))
+    response.set_cookie(REVIEWER_COOKIE, reviewer, samesite='Lax')
+    return response
+
+
+@lease_bp.route('/review/leave')
+def leave():
+    reviewer = get_reviewer()
+    if reviewer:
+        release_lease(reviewer)
+        drop_session(reviewer)
+        logger.info(f"Reviewer {reviewer} left the review")
+
+    response = make_response(redirect(url_for('review.index')))
+    response.delete_cookie(REVIEWER_COOKIE)
+    return response
+
+
+@lease_bp.route('/api/leases', methods=['GET'])
+def list_leases():
+    reviewer = get_reviewer()
+    if not reviewer:
+        return jsonify({"status": "error", "message": "reviewer is required"}), 400
+    return jsonify({"status": "success", "reviewer": reviewer, "terms": get_leased_terms(reviewer)})
+
+
+@lease_bp.route('/api/leases/claim', methods=['POST'])
+def claim():
+    reviewer = get_reviewer()
+    if not reviewer:
+        return jsonify({"status": "error", "message": "reviewer is required"}), 400
+
+    batch_size = request.values.get('batch_size', term_lease_batch, type=int)
+    lease_seconds = request.values.get('lease_seconds', term_lease_seconds, type=int)
+    leased = claim_terms(reviewer, batch_size=batch_size, lease_seconds=lease_seconds)
+    return jsonify({
+        "status": "success",
+        "reviewer": reviewer,
+        "terms": [{'id': t['id'], 'term': t['term'], 'lease_expires_at': t['lease_expires_at'].isoformat()}
+                  for t in leased]
+    })
+
+
+@lease_bp.route('/api/leases/extend', methods=['POST'])
+def extend():
+    reviewer = get_reviewer()
+    if not reviewer:
+        return jsonify({"status": "error", "message": "reviewer is required"}), 400
+
+    lease_seconds = request.values.get('lease_seconds', term_lease_seconds, type=int)
+    extended = extend_lease(reviewer, lease_seconds=lease_seconds)
+    return jsonify({"status": "success", "message": f"Extended {extended} leases."})
+
+
+@lease_bp.route('/api/leases/release', methods=['POST'])
+def release():
+    reviewer = get_reviewer()
+    if not reviewer:
+        return jsonify({"status": "error", "message": "reviewer is required"}), 400
+
+    term_ids = request.values.getlist('term_id', type=int) or None
+    released = release_lease(reviewer, term_ids=term_ids)
+    return jsonify({"status": "success", "message": f"Released {released} leases."})
+
+
+@lease_bp.route('/api/leases/expire', methods=['POST'])
+def expire():
+    released = release_expired_leases()
+    return jsonify({"status": "success", "message": f"Released {released} expired leases."})
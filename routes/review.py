@@ -1,41 +1,42 @@
-from typing import Any
-
-from flask import Blueprint, redirect, render_template_string, request, url_for
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict
+from datetime import datetime
+from threading import Lock
+from typing import Optional
+
+from flask import Blueprint, redirect, render_template, request, url_for
 from sqlalchemy import func
 
 from core.db import get_db
+from core.leases import claim_terms, extend_lease, get_leased_terms, is_leased_by_other
 from core.models import Image, ImageStatus, SearchTerm
-from core.session import session
+from core.session import SessionState, get_session
 from factory.image_service_factory import ImageServiceFactory
-from utils.common_utils import read_html_as_string, term_to_folder_name
-from utils.download_utils import download_image
-from utils.env_constants import min_image_for_term, project_name, search_per_page
+from services.candidate_filter import filter_candidates, filter_pages
+from services.candidate_stream import CandidateStream
+from services.download_sync_service import sync_downloads
+from services.image_service import ImageCandidate, ProviderError
+from services.variant_service import start_variant_generation
+from utils.env_constants import (
+    download_revalidate,
+    min_image_for_term,
+    project_name,
+    provider_fallback_order,
+    search_per_page,
+)
 from utils.log_utils import logger
+from utils.resilience_utils import CircuitOpenError
 
 review_bp = Blueprint('review', __name__)
-REVIEW_PAGE_HTML = read_html_as_string("templates/review_page.html")
-
-
-def get_url_from_img(photo, api) -> str:
-    url = None
-
-    if api == 'pixabay':
-        url = photo.largeImageURL
-    elif api == 'pexels':
-        url = getattr(photo, "large2x", None) or getattr(photo, "original", None)
-    elif api == 'unsplash':
-        url = getattr(photo.urls, "full", None) or getattr(photo.urls, "regular", None)
-        from services.unsplash_service import remove_id_from_img_url
-        url = remove_id_from_img_url(url)
-    elif api == 'flickr':
-        url = getattr(photo, 'hi_res_url', None) or getattr(photo, 'url', None)
-
-    if not url:
-        src = getattr(photo, "src", None)
-        if isinstance(src, dict):
-            url = src.get("large2x") or src.get("original") or next(iter(src.values()), None)
+REVIEWER_COOKIE = 'reviewer'
+LAST_GOOD_RESULTS_SIZE = 256
 
-    return url
+# (api, term) -> last non-empty search result, served while that provider's circuit is open
+_last_good_results: OrderedDict[tuple[str, str], list[ImageCandidate]] = OrderedDict()
+_last_good_lock = Lock()
 
 
 def get_done_term_count() -> int:
@@ -51,96 +52,236 @@ def get_done_term_count() -> int:
     return done_terms_count
 
 
+def current_session() -> SessionState:
+    return get_session(request.cookies.get(REVIEWER_COOKIE))
+
+
 def get_current_search_terms():
+    session = current_session()
+    if session.reviewer:
+        terms = get_leased_terms(session.reviewer)
+        if not terms and claim_terms(session.reviewer):
+            session.term_idx = 0
+            session.reset_photo_idx()
+            session.clear_cache()
+            terms = get_leased_terms(session.reviewer)
+        return terms
+
     db = next(get_db())
     eligible_terms_query = (
             db.query(SearchTerm)
             .outerjoin(Image, (SearchTerm.id == Image.search_term_id) &
                               (Image.status == ImageStatus.APPROVED.value))
+            .filter(~is_leased_by_other(session.reviewer, datetime.utcnow()))
             .group_by(SearchTerm.id)
             .having(func.count(Image.id) < min_image_for_term)
+            .order_by(SearchTerm.id)
             .all()
         )
     return [t.term for t in eligible_terms_query]
 
 
-def get_photos_for_term_idx(idx, use_cache=True) -> list[Any]:
+def get_photos_for_term_idx(idx, use_cache=True) -> CandidateStream:
+    session = current_session()
     terms = get_current_search_terms()
     if idx < 0 or idx >= len(terms):
-        return []
+        return CandidateStream([])
 
-    if use_cache and idx in session.photos_cache:
+    if use_cache and session.photos_cache.get(idx) is not None:
         return session.photos_cache[idx]
     else:
         session.photos_cache[idx] = None
 
-    api_type = session.current_api
     term = terms[idx]
-    photos = []
+    first_page = search_with_fallback(term, session.current_api)
+    next_pages = None
+    if len(first_page) >= search_per_page:
+        # Deeper pages come from whichever provider produced the first one, fetched only as the reviewer nears them
+        service = ImageServiceFactory.get_service(first_page[0].api)
+        next_pages = filter_pages(service.iter_pages(term, per_page=search_per_page, start_page=2))
+
+    photos = CandidateStream(filter_candidates(first_page), next_pages)
+    session.photos_cache[idx] = photos
+    return photos
+
 
+def _search_provider(api: str, term: str) -> Optional[list[ImageCandidate]]:
+    """Returns None when the provider is failing, so the caller can degrade instead of showing nothing."""
     try:
-        service = ImageServiceFactory.get_service(api_type)
-        photos = service.search_images(term, per_page=search_per_page)
+        service = ImageServiceFactory.get_service(api)
+        if service.breaker.is_open:
+            return None
+        # Failures raise from this very call, so an empty list really means no results
+        return service.search_images(term, per_page=search_per_page)
+    except (CircuitOpenError, ProviderError):
+        return None
     except Exception as e:
         logger.error(f"Error fetching photos: {e}")
-        photos = []
+        return None
+
+
+def _remember_results(api: str, term: str, photos: list[ImageCandidate]):
+    with _last_good_lock:
+        _last_good_results[(api, term)] = photos
+        _last_good_results.move_to_end((api, term))
+        while len(_last_good_results) > LAST_GOOD_RESULTS_SIZE:
+            _last_good_results.popitem(last=False)
+
+
+def search_with_fallback(term: str, api_type: str) -> list[ImageCandidate]:
+    """
+    Searches the selected provider. If it is failing, serves the last good result for the term from that provider,
+    then tries the other providers in PROVIDER_FALLBACK_ORDER; candidates keep their own api so approvals are
+    recorded against the provider that actually returned them.
+    """
+    photos = _search_provider(api_type, term)
+    if photos is not None:
+        if photos:
+            _remember_results(api_type, term, photos)
+        return photos
+
+    with _last_good_lock:
+        cached = _last_good_results.get((api_type, term))
+    if cached:
+        logger.warning(f"{api_type} is unavailable, serving cached results for '{term}'")
+        return cached
+
+    for api in provider_fallback_order:
+        if api == api_type:
+            continue
+        photos = _search_provider(api, term)
+        if photos:
+            logger.warning(f"{api_type} is unavailable, serving results from {api} for '{term}'")
+            _remember_results(api, term, photos)
+            return photos
+
+    return []
+
+
+def stream_candidates(term: str, providers: list[str],
+                      on_results: Optional[Callable[[str, list[ImageCandidate], bool], None]] = None
+                      ) -> Iterator[tuple[str, dict]]:
+    """
+    Searches all `providers` at once and yields each one's filtered candidates as a ('results', data) event the
+    moment it answers, so the fastest provider sets the time to the first image. A failing provider serves its last
+    good result for the term, or yields 'provider_error'. Ends with a 'done' summary. `on_results` gets each
+    provider's candidates and whether it has more pages.
+    """
+    start = time.perf_counter()
+    summary: dict[str, dict] = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, len(providers)), thread_name_prefix='search-stream')
+    futures = {executor.submit(_search_provider, api, term): api for api in providers}
+    try:
+        for future in as_completed(futures):
+            api = futures[future]
+            elapsed_ms = round((time.perf_counter() - start) * 1000)
+            photos, cached = future.result(), False
+            if photos is None:
+                with _last_good_lock:
+                    photos, cached = _last_good_results.get((api, term)), True
+                if photos is None:
+                    summary[api] = {'status': 'failed', 'elapsed_ms': elapsed_ms}
+                    yield 'provider_error', {'provider': api, 'elapsed_ms': elapsed_ms}
+                    continue
+            elif photos:
+                _remember_results(api, term, photos)
+
+            kept = filter_candidates(photos)
+            if on_results:
+                on_results(api, kept, not cached and len(photos) >= search_per_page)
+            summary[api] = {'status': 'cached' if cached else 'ok', 'count': len(kept), 'elapsed_ms': elapsed_ms}
+            yield 'results', {'provider': api, **summary[api], 'results': [asdict(photo) for photo in kept]}
+    finally:
+        # A client that disconnects stops the stream; searches that haven't started are dropped
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    yield 'done', {
+        'term': term,
+        'total': sum(provider.get('count', 0) for provider in summary.values()),
+        'providers': summary,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000),
+    }
+
+
+def review_stream_sink(term: str) -> Optional[Callable[[str, list[ImageCandidate], bool], None]]:
+    """
+    A stream_candidates callback that feeds the candidates into the reviewer's cache for `term`, so decisions made
+    while the stream is still running see them. Deeper pages come from the first provider with a full page. The
+    cache entry is created with the first answer, so a stream that dies before one is simply retried.
+    """
+    session = current_session()
+    terms = get_current_search_terms()
+    if term not in terms:
+        return None
+    idx = terms.index(term)
+    photos = CandidateStream([])
+
+    def add(api: str, candidates: list[ImageCandidate], has_more: bool):
+        photos.extend(candidates)
+        if has_more:
+            service = ImageServiceFactory.get_service(api)
+            photos.follow(filter_pages(service.iter_pages(term, per_page=search_per_page, start_page=2)))
+        if session.photos_cache.get(idx) is None:
+            session.photos_cache[idx] = photos
+
+    return add
 
-    session.photos_cache[idx] = photos
-    return photos
 
+def stream_providers(current_api: str) -> list[str]:
+    return [current_api, *(api for api in provider_fallback_order if api != current_api)]
 
-def add_image_to_db(term_str: str, img: Any, api_source: str):
+
+def add_image_to_db(term_str: str, img: ImageCandidate, api_source: str):
     service = ImageServiceFactory.get_service(api_source)
     service.add_image_to_db(term_str, img, api_source)
 
 
 def advance_after_action():
+    session = current_session()
     session.photo_idx += 1
     photos = get_photos_for_term_idx(session.term_idx)
-    if session.photo_idx >= len(photos):
+    if not photos.ensure(session.photo_idx):
         session.term_idx += 1
         session.photo_idx = 0
 
 
+def get_saved_image_count(term: str) -> int:
+    db = next(get_db())
+    term_obj = db.query(SearchTerm).filter(SearchTerm.term == term).first()
+    if not term_obj:
+        return 0
+    return db.query(Image).filter(
+        Image.search_term_id == term_obj.id,
+        Image.status == ImageStatus.APPROVED.value
+    ).count()
+
+
 def current_photo_info():
+    session = current_session()
     terms = get_current_search_terms()
     ti = session.term_idx
     pi = session.photo_idx
-    cur_api = session.current_api
 
     if ti >= len(terms):
         return None, None, None, None
 
     cur_term = terms[ti]
+    cur_term_saved_img_count = get_saved_image_count(cur_term)
 
-    # Count saved images for this term from DB
-    db = next(get_db())
-    term_obj = db.query(SearchTerm).filter(SearchTerm.term == cur_term).first()
-    cur_term_saved_img_count = 0
-    if term_obj:
-        cur_term_saved_img_count = db.query(Image).filter(
-            Image.search_term_id == term_obj.id,
-            Image.status == ImageStatus.APPROVED.value
-        ).count()
-
-    photos: Any = get_photos_for_term_idx(ti)
+    photos = get_photos_for_term_idx(ti)
 
-    if not photos or pi >= len(photos):
+    if not photos.ensure(pi):
         return cur_term, None, None, cur_term_saved_img_count
 
     photo = photos[pi]
-    url = get_url_from_img(photo, cur_api)
+    url = photo.url
 
     return cur_term, photo, url, cur_term_saved_img_count
 
 
-def download_db_image(img: Image):
-    folder = f"assets/{project_name}/image_files/{term_to_folder_name(img.search_term.term)}"
-    download_image(img, folder)
-
-
 @review_bp.route('/review')
 def index():
+    session = current_session()
     terms = get_current_search_terms()
 
     if not terms:
@@ -149,14 +290,22 @@ def index():
     if session.term_idx >= len(terms):
         db = next(get_db())
         total_downloaded = db.query(Image).filter(Image.status == ImageStatus.APPROVED.value).count()
-        return render_template_string(
-            REVIEW_PAGE_HTML,
+        return render_template(
+            'review_page.html',
             finished=True,
             downloaded=total_downloaded,
             project_name=project_name
         )
 
-    term, photo, url, cur_term_saved_img_count = current_photo_info()
+    stream_url = None
+    if session.photos_cache.get(session.term_idx) is None:
+        # Rendered without waiting for any provider; the page streams the candidates in
+        term, photo, url = terms[session.term_idx], None, None
+        cur_term_saved_img_count = get_saved_image_count(term)
+        stream_url = url_for('search.search_stream', term=term,
+                             providers=','.join(stream_providers(session.current_api)), review=1)
+    else:
+        term, photo, url, cur_term_saved_img_count = current_photo_info()
 
     finished = False
     if term is None:
@@ -165,27 +314,33 @@ def index():
     db = next(get_db())
     total_downloaded = db.query(Image).filter(Image.status == ImageStatus.APPROVED.value).count()
 
-    return render_template_string(
-        REVIEW_PAGE_HTML,
+    return render_template(
+        'review_page.html',
         finished=finished,
         term=term,
         term_idx=session.term_idx,
         total_terms=len(terms),
         photo_url=url,
+        stream_url=stream_url,
         downloaded=total_downloaded,
         current_api=session.current_api,
+        photo_api=photo.api if photo else None,
         term_photo_counter=cur_term_saved_img_count,
         project_name=project_name,
-        done_terms_count=get_done_term_count()
+        done_terms_count=get_done_term_count(),
+        reviewer=session.reviewer
     )
 
 
 @review_bp.route("/decision", methods=["POST"])
 def decision():
+    session = current_session()
     action = request.form.get("action")
+    if session.reviewer:
+        extend_lease(session.reviewer)
 
     term, photo, url, cur_term_saved_img_count = current_photo_info()
-    logger.debug(f"Decision Execution - Action: {action}, Term: {term}")
+    logger.debug("Decision Execution - Action: %s, Term: %s", action, term)
 
     if not term:
         return redirect(url_for("review.index"))
@@ -200,14 +355,14 @@ def decision():
         return redirect(url_for("review.index"))
 
     if action == "yes" and photo:
-        add_image_to_db(term, photo, session.current_api)
+        add_image_to_db(term, photo, photo.api)
         advance_after_action()
         return redirect(url_for("review.index"))
 
     if action == "all_yes":
         photos = get_photos_for_term_idx(session.term_idx)
         for photo in photos:
-            add_image_to_db(term, photo, session.current_api)
+            add_image_to_db(term, photo, photo.api)
         session.term_idx += 1
         session.photo_idx = 0
         return redirect(url_for("review.index"))
@@ -221,23 +376,13 @@ def decision():
 
 @review_bp.route("/api-decision", methods=["POST"])
 def api_decision():
+    session = current_session()
     action = request.form.get("action")
 
-    if action == "use-pexels-api":
-        session.photos_cache = {}
-        session.current_api = 'pexels'
-        session.photo_idx = 0
-    elif action == "use-pixabay-api":
-        session.photos_cache = {}
-        session.current_api = 'pixabay'
-        session.photo_idx = 0
-    elif action == "use-unsplash-api":
-        session.photos_cache = {}
-        session.current_api = 'unsplash'
-        session.photo_idx = 0
-    elif action == "use-flickr-api":
+    api = (action or '').removeprefix('use-').removesuffix('-api')
+    if api in ImageServiceFactory.available_services():
         session.photos_cache = {}
-        session.current_api = 'flickr'
+        session.current_api = api
         session.photo_idx = 0
 
     return redirect(url_for("review.index"))
@@ -245,6 +390,7 @@ def api_decision():
 
 @review_bp.route("/term-decision", methods=["POST"])
 def term_decision():
+    session = current_session()
     action = request.form.get("action")
     if action == "next-term":
         session.term_idx += 1
@@ -262,15 +408,16 @@ def term_decision():
 def download_all_images():
     db = next(get_db())
     images = db.query(Image).filter(Image.status == ImageStatus.APPROVED.value).all()
-    for img in images:
-        download_db_image(img)
+    sync_downloads(images, revalidate=request.form.get('revalidate', str(download_revalidate)).lower() == 'true')
+    start_variant_generation([img.id for img in images])
     return redirect(url_for("review.index"))
 
 
 @review_bp.route("/download-api-images", methods=["POST"])
 def download_api_images():
+    session = current_session()
     service = ImageServiceFactory.get_service(session.current_api)
     images = service.get_all_images()
-    for img in images:
-        download_db_image(img)
+    sync_downloads(images, revalidate=request.form.get('revalidate', str(download_revalidate)).lower() == 'true')
+    start_variant_generation([img.id for img in images])
     return redirect(url_for("review.index"))
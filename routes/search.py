@@ -0,0 +1,61 @@
+import json
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from core.search_index import search_images
+from factory.image_service_factory import ImageServiceFactory
+from routes.review import review_stream_sink, stream_candidates
+from utils.env_constants import provider_fallback_order
+from utils.log_utils import logger
+
+search_bp = Blueprint('search', __name__)
+MAX_PER_PAGE = 100
+
+
+@search_bp.route('/api/search')
+def search():
+    query = request.args.get('q', '')
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(max(1, request.args.get('per_page', 20, type=int)), MAX_PER_PAGE)
+    try:
+        return jsonify({"status": "success", "query": query, **search_images(query, page, per_page)})
+    except Exception as e:
+        logger.error(f"Error searching images for '{query}': {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+def _event(name: str, data: dict) -> str:
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+@search_bp.route('/api/search/stream')
+def search_stream():
+    """
+    Provider search as server-sent events: one 'results' (or 'provider_error') event per provider as soon as it
+    answers, then 'done'. With review=1 the candidates also fill the reviewer's queue for the term.
+    """
+    term = request.args.get('term', '').strip()
+    if not term:
+        return jsonify({"status": "error", "message": "term is required"}), 400
+    providers = list(dict.fromkeys(
+        api.strip().lower() for api in request.args.get('providers', ','.join(provider_fallback_order)).split(',')
+        if api.strip()
+    ))
+    if not providers:
+        return jsonify({"status": "error", "message": "providers is required"}), 400
+    unknown = [api for api in providers if api not in ImageServiceFactory.available_services()]
+    if unknown:
+        return jsonify({"status": "error", "message": f"Unknown providers: {', '.join(unknown)}"}), 400
+
+    on_results = review_stream_sink(term) if request.args.get('review') == '1' else None
+
+    def generate():
+        try:
+            for name, data in stream_candidates(term, providers, on_results):
+                yield _event(name, data)
+        except Exception as e:
+            logger.error(f"Error streaming search results for '{term}': {e}")
+            yield _event('error', {"status": "error", "message": str(e)})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
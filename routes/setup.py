@@ -1,29 +1,16 @@
-from flask import Blueprint, redirect, render_template_string, request, url_for
+from flask import Blueprint, redirect, render_template, request, url_for
 
 from core.db import get_db
 from core.models import SearchTerm
-from core.session import session
-from utils.common_utils import read_html_as_string
+from services.term_import_service import ImportReport, import_terms, iter_terms
 from utils.env_constants import project_name
 
 setup_bp = Blueprint('setup', __name__)
-TXT_SETUP_PAGE_HTML = read_html_as_string("templates/txt_setup_page.html")
+TEXTAREA_TERM_LIMIT = 5000
 
-def update_terms(content: str):
-    db = next(get_db())
-    new_term_strings = [t.strip() for t in content.split('\n') if t.strip()]
 
-    try:
-        db.query(SearchTerm).delete()
-        for term_str in new_term_strings:
-            term = SearchTerm(term=term_str)
-            db.add(term)
-        db.commit()
-        session.reset_photo_idx()
-        session.clear_cache()
-    except Exception as e:
-        db.rollback()
-        raise e
+def update_terms(content: str) -> ImportReport:
+    return import_terms(t.strip() for t in content.split('\n') if t.strip())
 
 
 @setup_bp.route("/setup", methods=['GET', 'POST'])
@@ -31,15 +18,21 @@ def index():
     db = next(get_db())
 
     if request.method == 'POST':
-        content = request.form.get('terms', '')
-        update_terms(content)
+        upload = request.files.get('terms_file')
+        if upload and upload.filename:
+            import_terms(iter_terms(upload.stream, upload.filename))
+        elif 'terms' in request.form:
+            update_terms(request.form['terms'])
         return redirect(url_for("review.index"))
 
-    terms = db.query(SearchTerm).all()
-    term_strings = [t.term for t in terms]
+    term_count = db.query(SearchTerm).count()
+    terms = None
+    if term_count <= TEXTAREA_TERM_LIMIT:
+        terms = "\n".join(term for term, in db.query(SearchTerm.term).order_by(SearchTerm.id))
 
-    return render_template_string(
-        TXT_SETUP_PAGE_HTML,
+    return render_template(
+        'txt_setup_page.html',
         project_name=project_name,
-        terms="\n".join(term_strings)
+        terms=terms,
+        term_count=term_count
     )
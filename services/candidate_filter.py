@@ -0,0 +1,105 @@
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from threading import Lock
+from typing import Optional
+
+import requests
+
+from services.image_service import ImageCandidate
+from utils.env_constants import (
+    max_image_kb,
+    min_image_height,
+    min_image_width,
+    oversize_mode,
+    prefilter_mode,
+    prefilter_probe_sizes,
+    probe_cache_size,
+    probe_timeout,
+)
+from utils.executor_utils import get_io_executor, on_io_worker
+from utils.log_utils import logger
+from utils.metrics_utils import candidates_filtered
+
+# url -> Content-Length in bytes, or None when the server doesn't report one
+_probe_cache: OrderedDict[str, Optional[int]] = OrderedDict()
+_probe_cache_lock = Lock()
+
+
+def probe_size(url: str) -> Optional[int]:
+    with _probe_cache_lock:
+        if url in _probe_cache:
+            _probe_cache.move_to_end(url)
+            return _probe_cache[url]
+
+    size = None
+    try:
+        response = requests.head(url, timeout=probe_timeout, allow_redirects=True)
+        if response.ok and response.headers.get('Content-Length'):
+            size = int(response.headers['Content-Length'])
+    except (requests.RequestException, ValueError) as e:
+        logger.debug(f"Size probe failed for {url}: {e}")
+        return None  # not cached, a later search may get through
+
+    with _probe_cache_lock:
+        _probe_cache[url] = size
+        while len(_probe_cache) > probe_cache_size:
+            _probe_cache.popitem(last=False)
+    return size
+
+
+def violation(candidate: ImageCandidate, size: Optional[int], max_kb: int = max_image_kb,
+              min_width: Optional[int] = None, min_height: Optional[int] = None) -> Optional[str]:
+    min_width = min_image_width if min_width is None else min_width
+    min_height = min_image_height if min_height is None else min_height
+    if candidate.width is not None and candidate.width < min_width:
+        return 'low_resolution'
+    if candidate.height is not None and candidate.height < min_height:
+        return 'low_resolution'
+    # In fit mode oversized downloads are re-encoded into the budget, so they are no reason to hide a candidate
+    if max_kb > 0 and oversize_mode != 'fit' and size is not None and size / 1000 > max_kb:
+        return 'oversized'
+    return None
+
+
+def _needs_probe(candidate: ImageCandidate, max_kb: int) -> bool:
+    if max_kb <= 0 or oversize_mode == 'fit' or not candidate.url_original:
+        return False
+    # Provider sizes describe the original upload, an upper bound for the rendition we download
+    return candidate.size is None or candidate.size / 1000 > max_kb
+
+
+def filter_candidates(candidates: list[ImageCandidate], mode: str = prefilter_mode,
+                      max_kb: int = max_image_kb, probe: bool = prefilter_probe_sizes,
+                      min_width: Optional[int] = None, min_height: Optional[int] = None) -> list[ImageCandidate]:
+    """
+    Applies the size and resolution rules before candidates reach review. Provider metadata is used when it
+    settles the question; otherwise the download URL is probed with concurrent HEAD requests.
+    'drop' removes violating candidates, 'demote' moves them behind the rest.
+    """
+    if mode == 'off' or not candidates:
+        return candidates
+
+    to_probe = [c for c in candidates if _needs_probe(c, max_kb)] if probe else []
+    # Already on an I/O worker, the probes run inline rather than queue behind this task on its own pool
+    probe_map = map if on_io_worker() else get_io_executor().map
+    probed = dict(zip((c.url_original for c in to_probe), probe_map(probe_size, [c.url_original for c in to_probe])))
+
+    kept, rejected = [], []
+    for candidate in candidates:
+        reason = violation(candidate, probed.get(candidate.url_original), max_kb=max_kb,
+                           min_width=min_width, min_height=min_height)
+        if reason:
+            candidates_filtered.inc(provider=candidate.api, reason=reason)
+            rejected.append(candidate)
+        else:
+            kept.append(candidate)
+
+    return kept + rejected if mode == 'demote' else kept
+
+
+def filter_pages(pages: Iterable[list[ImageCandidate]], **kwargs) -> Iterator[list[ImageCandidate]]:
+    # An empty page would end the candidate stream, so pages that are filtered away entirely are skipped
+    for page in pages:
+        kept = filter_candidates(page, **kwargs)
+        if kept:
+            yield kept
@@ -0,0 +1,102 @@
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future
+from threading import Lock
+from typing import Optional
+
+from services.image_service import ImageCandidate
+from utils.env_constants import prefetch_margin
+from utils.executor_utils import get_prefetch_executor
+from utils.log_utils import logger
+
+
+class CandidateStream:
+    """
+    Review candidates for one term, backed by a lazy iterator over the provider's result pages.
+    Indexing behaves like a list of the pages loaded so far; once the reviewer gets within `margin` candidates of
+    the end, the next page is fetched on the shared prefetch pool so it is usually ready before it is needed.
+    """
+
+    def __init__(self, first_page: list[ImageCandidate], pages: Optional[Iterable[list[ImageCandidate]]] = None,
+                 margin: int = prefetch_margin):
+        self._items: list[ImageCandidate] = []
+        self._seen: set[tuple[str, str]] = set()
+        self._pages: Optional[Iterator[list[ImageCandidate]]] = iter(pages) if pages is not None else None
+        self._margin = margin
+        self._prefetch: Optional[Future] = None
+        self._lock = Lock()
+        self._fetch_lock = Lock()
+        self._append(first_page)
+
+    @property
+    def exhausted(self) -> bool:
+        return self._pages is None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[ImageCandidate]:
+        # Only what is loaded; iterating never triggers a fetch
+        return iter(list(self._items))
+
+    def __getitem__(self, index: int) -> ImageCandidate:
+        if index >= 0:
+            self.ensure(index)
+        return self._items[index]
+
+    def _append(self, page: list[ImageCandidate]):
+        with self._lock:
+            for candidate in page:
+                key = (candidate.api, str(candidate.id))
+                if key not in self._seen:
+                    self._seen.add(key)
+                    self._items.append(candidate)
+
+    def extend(self, page: list[ImageCandidate]):
+        self._append(page)
+
+    def follow(self, pages: Iterable[list[ImageCandidate]]):
+        """Continues with `pages` once the loaded candidates run out, unless it already has pages to go on with."""
+        with self._fetch_lock:
+            if self._pages is None:
+                self._pages = iter(pages)
+
+    def _fetch_next_page(self) -> bool:
+        # Generators can't be advanced from two threads at once, so page fetches are serialized
+        with self._fetch_lock:
+            if self._pages is None:
+                return False
+            try:
+                page = next(self._pages)
+            except StopIteration:
+                page = None
+            except Exception as e:
+                logger.error(f"Error fetching next page of candidates: {e}")
+                page = None
+
+            if not page:
+                self._pages = None
+                return False
+            self._append(page)
+            return True
+
+    def _wait_for_prefetch(self):
+        with self._lock:
+            prefetch, self._prefetch = self._prefetch, None
+        if prefetch is not None:
+            prefetch.result()
+
+    def _schedule_prefetch(self):
+        with self._lock:
+            if self._prefetch is None or self._prefetch.done():
+                self._prefetch = get_prefetch_executor().submit(self._fetch_next_page)
+
+    def ensure(self, index: int) -> bool:
+        """Loads pages until `index` exists or the provider runs out; returns whether it exists."""
+        if index >= len(self._items):
+            self._wait_for_prefetch()
+        while index >= len(self._items) and self._fetch_next_page():
+            pass
+
+        if not self.exhausted and len(self._items) - index <= self._margin:
+            self._schedule_prefetch()
+        return index < len(self._items)
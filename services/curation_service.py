@@ -0,0 +1,346 @@
+import json
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Optional
+
+import requests
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+
+from core.db import get_db
+from core.leases import is_leased_by_other
+from core.models import Image, ImageStatus, SearchTerm
+from factory.image_service_factory import ImageServiceFactory
+from services.candidate_filter import filter_candidates
+from services.download_sync_service import sync_downloads
+from services.image_service import ImageCandidate, ProviderError, bulk_update_images
+from services.variant_service import generate_variants
+from utils.env_constants import (
+    curate_dedupe_distance,
+    curate_provider_burst,
+    curate_provider_rate,
+    curate_workers,
+    max_image_kb,
+    min_image_for_term,
+    min_image_height,
+    min_image_width,
+    probe_timeout,
+    project_name,
+    provider_fallback_order,
+    search_per_page,
+)
+from utils.image_utils import dhash, hamming_distance
+from utils.log_utils import logger
+from utils.rate_limit_utils import get_rate_limiter
+from utils.resilience_utils import CircuitOpenError
+
+CHECKPOINT_PATH = f"assets/{project_name}/curation_checkpoint.jsonl"
+IN_FLIGHT_PER_WORKER = 4  # terms searched ahead of the approvals, so downloads don't stall the searches
+DOWNLOAD_BATCH_SIZE = 100  # approved images handed to the download sync at once
+PROGRESS_EVERY = 50  # terms between progress callbacks
+
+
+@dataclass
+class CurationRules:
+    per_term: int = min_image_for_term
+    providers: list[str] = field(default_factory=lambda: list(provider_fallback_order))  # highest priority first
+    min_width: int = min_image_width
+    min_height: int = min_image_height
+    max_kb: int = max_image_kb
+    pages: int = 1  # result pages searched per provider
+    dedupe_distance: int = curate_dedupe_distance  # -1 disables near-duplicate exclusion
+
+
+@dataclass
+class CurationReport:
+    terms: int = 0
+    resumed: int = 0  # skipped since the checkpoint already has them
+    completed: int = 0
+    short: int = 0  # the providers ran out of acceptable candidates
+    failed: int = 0  # every provider failed; left out of the checkpoint so the next run retries them
+    approved: int = 0
+    near_duplicates: int = 0
+    downloaded: int = 0
+    download_failed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def processed(self) -> int:
+        return self.completed + self.short + self.failed
+
+    @property
+    def terms_per_minute(self) -> float:
+        return round(self.processed * 60 / self.seconds, 1) if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), 'terms_per_minute': self.terms_per_minute}
+
+
+@dataclass
+class TermSelection:
+    candidates: list[tuple[ImageCandidate, Optional[str]]] = field(default_factory=list)  # with their dhash
+    near_duplicates: int = 0
+    searched: bool = False  # at least one provider answered
+
+
+class Checkpoint:
+    """Terms a run has finished, one JSON line each, appended as they finish so an interruption loses nothing."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: set[str] = set()
+        self._file = None
+        self._needs_newline = False
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                for line in file:
+                    self._needs_newline = not line.endswith('\n')
+                    try:
+                        self.done.add(json.loads(line)['term'])
+                    except (ValueError, KeyError, TypeError):
+                        continue  # a line cut short by the interruption
+
+    def mark(self, term: str, approved: int):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            if self._needs_newline:
+                self._file.write('\n')
+        entry = {'term': term, 'approved': approved, 'at': datetime.utcnow().isoformat(timespec='seconds')}
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+        self.done.add(term)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def get_pending_terms(per_term: int) -> list[tuple[int, str, int]]:
+    """(id, term, approved count) of terms with fewer than `per_term` approved images and no reviewer's lease."""
+    db = next(get_db())
+    rows = (
+        db.query(SearchTerm.id, SearchTerm.term, func.count(Image.id))
+        .outerjoin(Image, (SearchTerm.id == Image.search_term_id) & (Image.status == ImageStatus.APPROVED.value))
+        .filter(~is_leased_by_other(None, datetime.utcnow()))
+        .group_by(SearchTerm.id)
+        .having(func.count(Image.id) < per_term)
+        .order_by(SearchTerm.id)
+        .all()
+    )
+    return [(term_id, term, approved) for term_id, term, approved in rows]
+
+
+def _thumbnail_hash(candidate: ImageCandidate) -> Optional[str]:
+    url = candidate.url_thumbnail or candidate.url
+    if not url:
+        return None
+    try:
+        response = requests.get(url, timeout=probe_timeout)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logger.debug(f"Could not fetch thumbnail {url}: {e}")
+        return None
+    return dhash(response.content)
+
+
+def select_candidates(term: str, need: int, rules: CurationRules, known: set[tuple[str, str]],
+                      hashes: list[str]) -> TermSelection:
+    """
+    Runs in a worker thread. Walks the providers in priority order and their results in relevance order, keeping
+    candidates that pass the size and resolution rules, aren't stored yet and whose thumbnail isn't a near
+    duplicate of one already approved or picked for the term, until `need` are picked.
+    """
+    selection = TermSelection()
+    hashes = list(hashes)
+    picked: set[tuple[str, str]] = set()
+
+    for api in rules.providers:
+        try:
+            service = ImageServiceFactory.get_service(api)
+        except ValueError as e:
+            logger.error(f"Skipping provider: {e}")
+            continue
+        limiter = get_rate_limiter(f"curate:{api}", curate_provider_rate, curate_provider_burst)
+
+        for page in range(1, rules.pages + 1):
+            if len(selection.candidates) >= need:
+                return selection
+            limiter.acquire()
+            try:
+                photos = service.search_images(term, page=page, per_page=search_per_page)
+            except (CircuitOpenError, ProviderError):
+                break
+            except Exception as e:
+                logger.error(f"Curation search on {api} failed for '{term}': {e}")
+                break
+            # Failures raise, so an answer, even an empty one, means the provider was searched
+            selection.searched = True
+            if not photos:
+                break
+
+            kept = filter_candidates(photos, mode='drop', max_kb=rules.max_kb,
+                                     min_width=rules.min_width, min_height=rules.min_height)
+            for candidate in kept:
+                if len(selection.candidates) >= need:
+                    break
+                key = (candidate.api, str(candidate.id))
+                if key in known or key in picked:
+                    continue
+                image_hash = _thumbnail_hash(candidate) if rules.dedupe_distance >= 0 else None
+                if image_hash and any(hamming_distance(image_hash, other) <= rules.dedupe_distance
+                                      for other in hashes):
+                    selection.near_duplicates += 1
+                    continue
+                if image_hash:
+                    hashes.append(image_hash)
+                picked.add(key)
+                selection.candidates.append((candidate, image_hash))
+
+            if len(photos) < search_per_page:
+                break
+
+    return selection
+
+
+def _approve(term: str, selection: TermSelection, known: set[tuple[str, str]]) -> list[int]:
+    """Stores the picks through their provider's ImageService, returning the new image ids."""
+    db = next(get_db())
+    image_ids, hash_updates = [], []
+    for candidate, image_hash in selection.candidates:
+        key = (candidate.api, str(candidate.id))
+        if key in known:
+            continue  # picked for another term that finished first
+        try:
+            image = ImageServiceFactory.get_service(candidate.api).add_image_to_db(term, candidate, candidate.api)
+        except Exception as e:
+            logger.error(f"Could not approve {candidate.api} image {candidate.id} for '{term}': {e}")
+            db.rollback()
+            continue
+        known.add(key)
+        if image is None:
+            continue
+        image_ids.append(image.id)
+        if image_hash:
+            hash_updates.append({'id': image.id, 'dhash': image_hash})
+    bulk_update_images(hash_updates)
+    return image_ids
+
+
+def _download(image_ids: list[int], report: CurationReport):
+    """Downloads (and, per TRANSCODE_FORMAT and OVERSIZE_MODE, converts) the images, then builds their variants."""
+    db = next(get_db())
+    images = db.query(Image).options(joinedload(Image.search_term)).filter(Image.id.in_(image_ids)).all()
+    sync = sync_downloads(images)
+    report.downloaded += sync.downloaded + sync.adopted
+    report.download_failed += sync.failed
+    generate_variants(image_ids)
+
+
+def _undownloaded(terms: set[str]) -> list[int]:
+    """Approved images of checkpointed terms whose download an interrupted run didn't get to."""
+    if not terms:
+        return []
+    db = next(get_db())
+    rows = (
+        db.query(Image.id, SearchTerm.term)
+        .join(SearchTerm, SearchTerm.id == Image.search_term_id)
+        .filter(Image.status == ImageStatus.APPROVED.value, Image.file_sha256.is_(None))
+        .all()
+    )
+    return [image_id for image_id, term in rows if term in terms]
+
+
+def run_curation(rules: CurationRules, workers: int = curate_workers, download: bool = True,
+                 restart: bool = False, checkpoint_path: str = CHECKPOINT_PATH,
+                 progress: Optional[Callable[[CurationReport], None]] = None) -> CurationReport:
+    """
+    Approves up to `rules.per_term` images for every pending term without the review page. Searches run on
+    `workers` threads a few terms ahead of this thread, which stores approvals and, with `download`, syncs them
+    to disk in batches while the searches continue. Finished terms go to a checkpoint file, so a rerun picks up
+    where an interrupted one stopped; `restart` discards it.
+    """
+    start = time.perf_counter()
+    report = CurationReport()
+    if restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = Checkpoint(checkpoint_path)
+
+    pending = get_pending_terms(rules.per_term)
+    todo = [(term_id, term, approved) for term_id, term, approved in pending if term not in checkpoint.done]
+    report.terms, report.resumed = len(todo), len(pending) - len(todo)
+
+    db = next(get_db())
+    known = {(api, str(source_id)) for api, source_id in db.query(Image.source_api, Image.source_id).all()}
+    to_download = _undownloaded(checkpoint.done) if download else []
+
+    def flush_downloads(batch_size: int):
+        while to_download and len(to_download) >= batch_size:
+            batch = to_download[:DOWNLOAD_BATCH_SIZE]
+            del to_download[:DOWNLOAD_BATCH_SIZE]
+            _download(batch, report)
+
+    def report_progress():
+        report.seconds = round(time.perf_counter() - start, 3)
+        if progress:
+            progress(report)
+
+    queue = iter(todo)
+    in_flight: dict[Future, tuple[str, int]] = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='curate') as executor:
+            def submit_next():
+                entry = next(queue, None)
+                if entry is None:
+                    return
+                term_id, term, approved = entry
+                hashes = [value for value, in db.query(Image.dhash).filter(
+                    Image.search_term_id == term_id, Image.status == ImageStatus.APPROVED.value,
+                    Image.dhash.isnot(None)
+                ).all()]
+                future = executor.submit(select_candidates, term, rules.per_term - approved, rules, known, hashes)
+                in_flight[future] = (term, approved)
+
+            for _ in range(max(1, workers) * IN_FLIGHT_PER_WORKER):
+                submit_next()
+
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    term, approved = in_flight.pop(future)
+                    submit_next()
+                    try:
+                        selection = future.result()
+                    except Exception as e:
+                        logger.error(f"Curation of '{term}' failed: {e}")
+                        selection = TermSelection()
+
+                    if not selection.searched:
+                        report.failed += 1
+                    else:
+                        image_ids = _approve(term, selection, known)
+                        report.approved += len(image_ids)
+                        report.near_duplicates += selection.near_duplicates
+                        if download:
+                            to_download.extend(image_ids)
+                        if approved + len(image_ids) >= rules.per_term:
+                            report.completed += 1
+                        else:
+                            report.short += 1
+                        checkpoint.mark(term, approved + len(image_ids))
+
+                    if report.processed % PROGRESS_EVERY == 0:
+                        report_progress()
+                flush_downloads(DOWNLOAD_BATCH_SIZE)
+        flush_downloads(1)
+    finally:
+        checkpoint.close()
+
+    report_progress()
+    logger.info(f"Curation finished: {report.to_dict()}")
+    return report
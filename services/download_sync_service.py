@@ -0,0 +1,148 @@
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Optional
+
+from PIL import Image as PILImage
+
+from core.models import Image
+from services.image_service import bulk_update_images
+from utils.blob_store import blob_store
+from utils.common_utils import term_to_folder_name
+from utils.download_utils import download_image
+from utils.env_constants import download_revalidate, download_workers, project_name
+from utils.image_utils import read_image_header
+from utils.log_utils import logger
+
+
+@dataclass
+class SyncReport:
+    total: int = 0
+    skipped: int = 0
+    adopted: int = 0
+    downloaded: int = 0
+    not_modified: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def image_folder(img: Image) -> str:
+    return f"assets/{project_name}/image_files/{term_to_folder_name(img.search_term.term)}"
+
+
+def local_path(img: Image) -> Optional[str]:
+    """Where the file for this row is on disk, following a WebP conversion of the original download."""
+    path = img.file_path or os.path.join(image_folder(img), f"{img.source_id}.{img.extension}")
+    if os.path.exists(path):
+        return path
+    webp_path = f"{os.path.splitext(path)[0]}.webp"
+    return webp_path if os.path.exists(webp_path) else None
+
+
+def header_check(path: str) -> bool:
+    """Parses only the image header and looks for the format's end marker, which catches truncated downloads."""
+    try:
+        with PILImage.open(path) as image:
+            image_format = image.format
+        with open(path, 'rb') as file:
+            size = file.seek(0, os.SEEK_END)
+            if image_format == 'JPEG':
+                file.seek(max(0, size - 1024))
+                return b'\xff\xd9' in file.read()
+            if image_format == 'PNG':
+                file.seek(max(0, size - 64))
+                return b'IEND' in file.read()
+            if image_format == 'WEBP':
+                file.seek(4)
+                return int.from_bytes(file.read(4), 'little') + 8 <= size
+        return True
+    except Exception:
+        return False
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _adopt(img: Image, path: str) -> Optional[dict]:
+    if not header_check(path):
+        return None
+    sha256 = file_sha256(path)
+    size = os.path.getsize(path)
+    blob_store.adopt(path, sha256, (img.source_api, str(img.source_id)))
+    return {'file_path': path, 'file_size': size, 'file_sha256': sha256, 'downloaded_at': datetime.utcnow(),
+            **(read_image_header(path) or {})}
+
+
+def _download(img: Image, folder: str, etag: Optional[str], last_modified: Optional[str]) -> Optional[dict]:
+    result = download_image(img, folder, etag=etag, last_modified=last_modified)
+    # Ingest: header metadata is read while the file is still in the page cache
+    if result and result.get('file_path'):
+        result.update(read_image_header(result['file_path']) or {})
+    return result
+
+
+def sync_downloads(images: list[Image], revalidate: bool = download_revalidate) -> SyncReport:
+    """
+    Downloads only what is missing or damaged. Rows with a recorded size are trusted when the file on disk still
+    has that size; files from before the manifest existed get a parallel header check and are adopted if intact.
+    With `revalidate`, intact files are also checked with conditional GETs and replaced only if they changed.
+    """
+    start = time.perf_counter()
+    report = SyncReport(total=len(images))
+    to_check: list[tuple[Image, str]] = []
+    to_download: list[tuple[Image, Optional[str], Optional[str]]] = []
+
+    for img in images:
+        path = local_path(img)
+        if path is None:
+            to_download.append((img, None, None))
+        elif img.file_size is None:
+            to_check.append((img, path))
+        elif os.path.getsize(path) != img.file_size and path.endswith(f".{img.extension}"):
+            # A different size is expected only after the explorer converted the file to WebP
+            to_download.append((img, None, None))
+        elif revalidate:
+            to_download.append((img, img.download_etag, img.download_last_modified))
+        else:
+            report.skipped += 1
+
+    updates: list[dict] = []
+    with ThreadPoolExecutor(max_workers=download_workers, thread_name_prefix='download-sync') as executor:
+        adoptions = executor.map(lambda check: _adopt(*check), to_check)
+        for (img, path), adopted in zip(to_check, adoptions):
+            if adopted:
+                updates.append({'id': img.id, **adopted})
+                report.adopted += 1
+            else:
+                logger.warning(f"{path} is damaged, downloading it again")
+                to_download.append((img, None, None))
+
+        # Folders are resolved here since the term relationship can't be lazy loaded from worker threads
+        downloads = executor.map(
+            lambda job: _download(*job),
+            [(img, image_folder(img), etag, last_modified) for img, etag, last_modified in to_download]
+        )
+        for (img, _, _), result in zip(to_download, downloads):
+            if result is None:
+                report.failed += 1
+            elif result.get('not_modified'):
+                report.not_modified += 1
+            else:
+                updates.append({'id': img.id, **result})
+                report.downloaded += 1
+
+    bulk_update_images(updates)
+    report.seconds = round(time.perf_counter() - start, 3)
+    logger.info(f"Download sync finished: {report.to_dict()}")
+    return report
@@ -1,26 +1,23 @@
 import os
 import re
-from dataclasses import dataclass
-from typing import Any
 
 import requests
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 
 from core.db import get_db
-from core.models import Image, ImageStatus, SearchTerm
-from services.image_service import ImageService
+from core.models import Image
+from services.image_service import ImageCandidate, ImageService, ProviderError
+from utils.env_constants import search_max_pages
 from utils.log_utils import logger
 
 load_dotenv()
 
-@dataclass
-class FlickerImage:
-    id: str
-    url: str
-    hi_res_url: str
-
 class FlickrService(ImageService):
+    api_name = 'flickr'
+    # Scraped search pages get slower and noisier the deeper they go
+    max_pages = min(search_max_pages, 5)
+
     def __init__(self):
         self.scrapper_url = os.getenv('FLICKR_SCRAPPER_URL', 'https://www.flickr.com/search/')
         self.max_image_kb = int(os.getenv('MAX_KB_IMAGE_SIZE', '512'))
@@ -32,18 +29,19 @@ class FlickrService(ImageService):
         return db.query(Image).filter(Image.source_api == 'flickr').all()
 
 
-    def search_images(self, query: str, per_page: int = 15) -> list[FlickerImage]:
+    def search_images(self, query: str, page: int = 1, per_page: int = 15) -> list[ImageCandidate]:
         params = {
             "text": query,
+            "page": page,
             "license": "4,5,6,9,10"
         }
 
         try:
-            r = requests.get(self.scrapper_url, params=params, headers=self.headers, timeout=30)
+            r = self.http_get(self.scrapper_url, params=params, headers=self.headers, hedge=True)
             r.raise_for_status()
         except requests.RequestException as e:
             logger.error(f"Error fetching images from Flickr for query '{query}': {e}")
-            return []
+            raise ProviderError(f"Flickr search failed: {e}") from e
 
         soup = BeautifulSoup(r.text, "html.parser")
         images = []
@@ -60,38 +58,14 @@ class FlickrService(ImageService):
                 if any(existing_img.id == img_id for existing_img in images):
                     continue
 
-                images.append(FlickerImage(
+                images.append(ImageCandidate(
                     id=img_id,
-                    url=f"https:{src}",
-                    hi_res_url=f"https:{hi_res}",
+                    api='flickr',
+                    url=f"https:{hi_res}",
+                    url_original=f"https:{hi_res}",
+                    url_thumbnail=f"https:{src}",
+                    url_page=f"https:{src}"
                 ))
 
         return images[:per_page]
 
-
-    def add_image_to_db(self, term_str: str, img: Any, api_source: str):
-        db = next(get_db())
-        term_obj = db.query(SearchTerm).filter(SearchTerm.term == term_str).first()
-
-        if not term_obj:
-            logger.error(f"Term {term_str} not found in DB")
-            return
-
-        img_id = str(getattr(img, 'id', 'unknown'))
-        url_original = getattr(img, "hi_res_url", None)
-        url_thumbnail = getattr(img, "url", None)
-        extension = getattr(img, "extension", "jpg")
-        url_page = getattr(img, "url", None)
-
-        new_image = Image(
-            source_id=img_id,
-            source_api=api_source,
-            url_original=url_original,
-            url_thumbnail=url_thumbnail,
-            url_page=url_page,
-            status=ImageStatus.APPROVED.value,
-            search_term_id=term_obj.id,
-            extension=extension
-        )
-        db.add(new_image)
-        db.commit()
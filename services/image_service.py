@@ -1,27 +1,166 @@
 from abc import ABC
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
 from typing import Any, Optional
 
-from core.models import Image
+import requests
+from sqlalchemy import update
+
+from core.db import get_db
+from core.models import Image, ImageStatus, SearchTerm
+from utils.env_constants import hedge_requests, provider_timeout, search_max_pages
+from utils.log_utils import logger
+from utils.metrics_utils import timed_provider_call
+from utils.resilience_utils import CircuitBreaker
+
+TIMED_METHODS = ('search_images', 'fetch_image', 'get_all_images', 'add_image_to_db', 'update_image_in_db')
+
+
+@dataclass(slots=True)
+class ImageCandidate:
+    """Provider-neutral search result, holding only what review and approval need."""
+    id: str
+    api: str
+    url: Optional[str] = None  # display URL shown on the review page
+    url_original: Optional[str] = None
+    url_thumbnail: Optional[str] = None
+    url_page: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    size: Optional[int] = None  # bytes, when the provider reports it
+    extension: str = "jpg"
+    tags: Optional[str] = None  # comma separated, as Pixabay reports them
+    description: Optional[str] = None
+
+
+class ProviderError(Exception):
+    """A provider search failed, as opposed to finding nothing."""
+
+
+def bulk_update_images(updates: list[dict]):
+    """One executemany UPDATE keyed on Image.id for a whole chunk of rows, instead of a query and commit per row."""
+    if not updates:
+        return
+    db = next(get_db())
+    try:
+        db.execute(update(Image), updates)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _is_failed_response(result: Any) -> bool:
+    # Rate limiting and server errors mean the provider is struggling; other 4xx are our own mistakes
+    return isinstance(result, requests.Response) and (result.status_code == 429 or result.status_code >= 500)
 
 
 class ImageService(ABC):
+    api_name: str = ''
+    max_pages: int = search_max_pages
+    supports_fetch: bool = False  # whether fetch_image can look a stored image up by its source id
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Time every provider call, including the ones inherited from this base class
+        for method_name in TIMED_METHODS:
+            method = getattr(cls, method_name)
+            method = getattr(method, '__wrapped__', method)
+            setattr(cls, method_name, timed_provider_call(cls.api_name or cls.__name__, method_name)(method))
+
     def __init__(self):
         pass
 
-    def search_images(self, term: str, page: int = 1, per_page: int = 15) -> list[Any]:
+    @property
+    def breaker(self) -> CircuitBreaker:
+        # Created lazily since provider __init__ methods don't call super().__init__()
+        breaker = self.__dict__.get('_breaker')
+        if breaker is None:
+            breaker = self.__dict__['_breaker'] = CircuitBreaker(self.api_name or type(self).__name__)
+        return breaker
+
+    def guarded_call(self, fn: Callable[[], Any], hedge: bool = False) -> Any:
+        """
+        Runs a provider call through this service's circuit breaker. Raises CircuitOpenError while the provider is
+        failing; with HEDGE_REQUESTS on, idempotent calls slower than the provider's p95 get a second attempt.
+        """
+        hedge_delay = self.breaker.p95_latency() if hedge and hedge_requests else None
+        return self.breaker.call(fn, is_failure=_is_failed_response, hedge_delay=hedge_delay)
+
+    def http_get(self, url: str, hedge: bool = False, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', provider_timeout)
+        return self.guarded_call(lambda: requests.get(url, **kwargs), hedge=hedge)
+
+    def search_images(self, term: str, page: int = 1, per_page: int = 15) -> list[ImageCandidate]:
+        """
+        One page of results. Failures raise (ProviderError, or CircuitOpenError while the circuit is open) rather
+        than returning an empty page, so every caller can tell them from a term with no results on its own call.
+        """
         pass
 
     def get_all_images(self) -> list[Image]:
         pass
 
-    def add_image_to_db(self, term_str: str, img: Any, api_source: str):
-        pass
+    def page_limit(self, per_page: int) -> int:
+        return self.max_pages
 
-    def update_image_in_db(self, img: Any):
-        pass
+    def iter_pages(self, term: str, per_page: int = 15, start_page: int = 1) -> Iterator[list[ImageCandidate]]:
+        """Lazily yields result pages, stopping at the first short page or at the provider's page limit."""
+        for page in range(start_page, self.page_limit(per_page) + 1):
+            photos = self.search_images(term, page=page, per_page=per_page)
+            if not photos:
+                return
+            yield photos
+            if len(photos) < per_page:
+                return
+
+    def add_image_to_db(self, term_str: str, img: ImageCandidate, api_source: str):
+        db = next(get_db())
+        term_obj = db.query(SearchTerm).filter(SearchTerm.term == term_str).first()
+
+        if not term_obj:
+            logger.error(f"Term {term_str} not found in DB")
+            return
+
+        new_image = Image(
+            source_id=str(img.id),
+            source_api=api_source or img.api,
+            url_original=img.url_original,
+            url_thumbnail=img.url_thumbnail,
+            url_page=img.url_page,
+            extension=img.extension,
+            tags=img.tags,
+            description=img.description,
+            status=ImageStatus.APPROVED.value,
+            search_term_id=term_obj.id
+        )
+        db.add(new_image)
+        db.commit()
+        return new_image
+
+    def update_image_in_db(self, img: ImageCandidate):
+        db = next(get_db())
+        try:
+            img_to_update = db.query(Image).filter(
+                Image.source_id == str(img.id),
+                Image.source_api == img.api
+            ).first()
+
+            if img_to_update:
+                img_to_update.url_original = img.url_original
+                img_to_update.url_thumbnail = img.url_thumbnail
+                img_to_update.url_page = img.url_page
+                if img.tags is not None:
+                    img_to_update.tags = img.tags
+                if img.description is not None:
+                    img_to_update.description = img.description
+                db.commit()
+        except Exception as e:
+            logger.error(f"Error updating image in DB: {e}")
+            db.rollback()
 
-    def fetch_image(self, id: int) -> Optional[Any]:
+    def fetch_image(self, id: int) -> Optional[ImageCandidate]:
         pass
 
-    def json_to_image(self, item: dict[str, Any]) -> Any:
+    def json_to_image(self, item: dict[str, Any]) -> ImageCandidate:
         pass
@@ -0,0 +1,226 @@
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from itertools import chain, zip_longest
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from sqlalchemy import or_
+
+from core.db import get_db
+from core.models import Image, ImageStatus
+from services.image_service import bulk_update_images
+from utils.env_constants import (
+    link_check_chunk_size,
+    link_check_every_minutes,
+    link_check_host_burst,
+    link_check_host_rate,
+    link_check_interval_hours,
+    link_check_workers,
+    probe_timeout,
+)
+from utils.log_utils import logger
+from utils.rate_limit_utils import get_rate_limiter
+
+CONNECTION_ERROR = 0  # link_status stored when no HTTP response came back
+BROKEN_AFTER_FAILURES = 3  # transient errors in a row before a link is reported as broken
+RETRY_BASE = timedelta(hours=1)
+
+_thread_local = threading.local()
+_scheduler_started = False
+
+
+def _http_session() -> requests.Session:
+    # One pooled session per worker thread, so keep-alive connections are reused across checks of the same host
+    session = getattr(_thread_local, 'session', None)
+    if session is None:
+        session = _thread_local.session = requests.Session()
+    return session
+
+
+def link_state(status: Optional[int], failures: int = 0) -> str:
+    if status is None:
+        return 'unchecked'
+    if 200 <= status < 400:
+        return 'ok'
+    if 400 <= status < 500 and status != 429:
+        return 'dead'
+    return 'broken' if failures >= BROKEN_AFTER_FAILURES else 'error'
+
+
+def next_check_delay(state: str, failures: int) -> timedelta:
+    interval = timedelta(hours=link_check_interval_hours)
+    if state == 'ok':
+        return interval
+    if state == 'dead':
+        return interval * 4  # rarely comes back, only confirm now and then
+    return min(interval, RETRY_BASE * 2 ** max(0, failures - 1))
+
+
+def check_url(url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> tuple:
+    """Conditional HEAD, falling back to a streamed GET for servers that refuse HEAD. Returns (status, etag, lm)."""
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    session = _http_session()
+    try:
+        response = session.head(url, headers=headers, timeout=probe_timeout, allow_redirects=True)
+        if response.status_code in (403, 405, 501):
+            with session.get(url, headers=headers, timeout=probe_timeout, stream=True) as get_response:
+                response = get_response
+    except requests.RequestException as e:
+        logger.debug(f"Link check failed for {url}: {e}")
+        return CONNECTION_ERROR, etag, last_modified
+
+    return (
+        response.status_code,
+        response.headers.get('ETag', etag),
+        response.headers.get('Last-Modified', last_modified),
+    )
+
+
+@dataclass
+class LinkScanJob:
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    status: str = 'pending'
+    total: int = 0
+    checked: int = 0
+    ok: int = 0
+    dead: int = 0
+    errors: int = 0
+    error: Optional[str] = None
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        for key in ('started_at', 'finished_at'):
+            data[key] = data[key].isoformat(timespec='seconds') if data[key] else None
+        return data
+
+
+_jobs: dict[str, LinkScanJob] = {}
+_jobs_lock = threading.Lock()
+
+
+def get_job(job_id: str) -> Optional[LinkScanJob]:
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def get_due_links(now: datetime, limit: Optional[int] = None) -> list:
+    """Approved images whose check is due, never-checked ones first, then the most overdue."""
+    db = next(get_db())
+    query = (
+        db.query(Image.id, Image.url_original, Image.link_etag, Image.link_last_modified, Image.link_failures)
+        .filter(Image.status == ImageStatus.APPROVED.value, Image.url_original.isnot(None))
+        .filter(or_(Image.link_next_check_at.is_(None), Image.link_next_check_at <= now))
+        .order_by(Image.link_next_check_at.isnot(None), Image.link_next_check_at, Image.id)
+    )
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
+def _interleave_hosts(rows: list) -> list:
+    # Round-robin across hosts, so workers waiting on one host's rate limit don't hold up the others
+    by_host = defaultdict(list)
+    for row in rows:
+        by_host[urlsplit(row.url_original).netloc].append(row)
+    return [row for row in chain.from_iterable(zip_longest(*by_host.values())) if row is not None]
+
+
+def _check_row(row) -> dict:
+    get_rate_limiter(f"host:{urlsplit(row.url_original).netloc}", link_check_host_rate,
+                     link_check_host_burst).acquire()
+    status, etag, last_modified = check_url(row.url_original, row.link_etag, row.link_last_modified)
+
+    failures = 0 if 200 <= status < 400 else (row.link_failures or 0) + 1
+    state = link_state(status, failures)
+    now = datetime.utcnow()
+    return {
+        'id': row.id,
+        'link_status': status,
+        'link_etag': etag,
+        'link_last_modified': last_modified,
+        'link_failures': failures,
+        'link_checked_at': now,
+        'link_next_check_at': now + next_check_delay(state, failures),
+    }
+
+
+def run_link_scan(job: LinkScanJob, limit: Optional[int] = None):
+    job.status = 'running'
+    try:
+        rows = _interleave_hosts(get_due_links(datetime.utcnow(), limit))
+        job.total = len(rows)
+        pending: list[dict] = []
+
+        with ThreadPoolExecutor(max_workers=link_check_workers, thread_name_prefix='link-check') as executor:
+            for future in as_completed([executor.submit(_check_row, row) for row in rows]):
+                result = future.result()
+                job.checked += 1
+                state = link_state(result['link_status'], result['link_failures'])
+                if state == 'ok':
+                    job.ok += 1
+                elif state == 'dead':
+                    job.dead += 1
+                else:
+                    job.errors += 1
+
+                pending.append(result)
+                if len(pending) >= link_check_chunk_size:
+                    bulk_update_images(pending)
+                    pending = []
+
+        bulk_update_images(pending)
+        job.status = 'finished'
+        logger.info(f"Link scan {job.id} checked {job.checked} links: {job.dead} dead, {job.errors} errors")
+    except Exception as e:
+        logger.error(f"Link scan {job.id} failed: {e}")
+        job.status = 'failed'
+        job.error = str(e)
+    finally:
+        job.finished_at = datetime.utcnow()
+
+
+def start_link_scan(limit: Optional[int] = None) -> LinkScanJob:
+    """Starts a background scan of the links that are due, unless one is already running."""
+    with _jobs_lock:
+        running = next((job for job in _jobs.values() if job.status in ('pending', 'running')), None)
+        if running:
+            return running
+        job = LinkScanJob()
+        _jobs[job.id] = job
+    threading.Thread(target=run_link_scan, args=(job, limit), name=f"link-scan-{job.id}", daemon=True).start()
+    return job
+
+
+def start_link_scheduler():
+    """
+    Rescans due links every LINK_CHECK_EVERY_MINUTES; the schedule itself lives in link_next_check_at. Starts at
+    most one scheduler per process however often the app is created. Each worker process of a multi-process
+    server runs its own, so enable it in a single process only.
+    """
+    global _scheduler_started
+    if link_check_every_minutes <= 0:
+        return
+    with _jobs_lock:
+        if _scheduler_started:
+            return
+        _scheduler_started = True
+
+    def loop():
+        while True:
+            time.sleep(link_check_every_minutes * 60)
+            start_link_scan()
+
+    threading.Thread(target=loop, name='link-scheduler', daemon=True).start()
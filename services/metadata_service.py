@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from sqlalchemy.orm import joinedload
+
+from core.db import get_db
+from core.models import Image, ImageStatus
+from services.download_sync_service import local_path
+from services.image_service import bulk_update_images
+from utils.env_constants import download_workers
+from utils.image_utils import read_image_header
+from utils.log_utils import logger
+
+ORIENTATIONS = ('landscape', 'portrait', 'square')
+
+
+def _read(job: tuple[int, Optional[str]]) -> Optional[dict]:
+    image_id, path = job
+    if path is None:
+        return None
+    header = read_image_header(path)
+    return {'id': image_id, **header} if header else None
+
+
+def backfill_metadata(workers: int = download_workers, chunk_size: int = 500, force: bool = False) -> dict:
+    """Reads the headers of downloaded files that have no metadata yet (or all of them with `force`) in parallel."""
+    db = next(get_db())
+    query = db.query(Image).options(joinedload(Image.search_term)).filter(Image.status == ImageStatus.APPROVED.value)
+    if not force:
+        query = query.filter(Image.width.is_(None))
+    jobs = [(img.id, local_path(img)) for img in query.all()]
+
+    report = {'total': len(jobs), 'updated': 0, 'missing': 0}
+    pending: list[dict] = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='metadata') as executor:
+        for result in executor.map(_read, jobs):
+            if result is None:
+                report['missing'] += 1
+                continue
+            pending.append(result)
+            if len(pending) >= chunk_size:
+                bulk_update_images(pending)
+                report['updated'] += len(pending)
+                pending = []
+
+    bulk_update_images(pending)
+    report['updated'] += len(pending)
+    logger.info(f"Metadata backfill finished: {report}")
+    return report
+
+
+def filter_by_dimensions(query, min_width: Optional[int] = None, min_height: Optional[int] = None,
+                         orientation: Optional[str] = None, min_aspect: Optional[float] = None,
+                         max_aspect: Optional[float] = None):
+    """Resolution and aspect-ratio filters evaluated in SQL against the stored header metadata."""
+    if min_width:
+        query = query.filter(Image.width >= min_width)
+    if min_height:
+        query = query.filter(Image.height >= min_height)
+    if orientation == 'landscape':
+        query = query.filter(Image.width > Image.height)
+    elif orientation == 'portrait':
+        query = query.filter(Image.width < Image.height)
+    elif orientation == 'square':
+        query = query.filter(Image.width == Image.height)
+
+    aspect = Image.width * 1.0 / Image.height
+    if min_aspect:
+        query = query.filter(aspect >= min_aspect)
+    if max_aspect:
+        query = query.filter(aspect <= max_aspect)
+    return query
@@ -1,67 +1,85 @@
 import os
+from typing import Any, Optional
 
+import requests
 from dotenv import load_dotenv
-from pexels_api import API
-from pexels_api.tools import Photo
 
 from core.db import get_db
-from core.models import Image, ImageStatus, SearchTerm
-from services.image_service import ImageService
+from core.models import Image
+from services.image_service import ImageCandidate, ImageService, ProviderError
 from utils.log_utils import logger
+from utils.metrics_utils import count_provider_error
 
 load_dotenv()
 
 class PexelsService(ImageService):
+    api_name = 'pexels'
+    supports_fetch = True
+
     def __init__(self):
+        # Only immutable configuration lives on the instance; the factory shares it across request threads
         self.api_key = os.getenv('PEXELS_API_KEY')
+        self.api_url = os.getenv('PEXELS_API_URL', 'https://api.pexels.com/v1')
+        self.max_image_kb = int(os.getenv('MAX_KB_IMAGE_SIZE', '512'))
+
         if not self.api_key:
             logger.warning("PEXELS_API_KEY is not set.")
-        else:
-            self.api = API(self.api_key)
 
-        self.max_image_kb = int(os.getenv('MAX_KB_IMAGE_SIZE', '512'))
 
+    def json_to_image(self, item: dict[str, Any]) -> ImageCandidate:
+        src = item.get('src') or {}
+        url_original = src.get('original')
 
-    def search_images(self, term: str, page: int = 1, per_page: int = 15) -> list[Photo]:
+        return ImageCandidate(
+            id=str(item['id']),
+            api='pexels',
+            url=src.get('large2x') or url_original,
+            url_original=url_original,
+            url_thumbnail=src.get('tiny'),
+            url_page=item.get('url'),
+            width=item.get('width'),
+            height=item.get('height'),
+            extension=url_original.split('.')[-1] if url_original else 'jpg',
+            description=item.get('alt') or None
+        )
+
+
+    def search_images(self, term: str, page: int = 1, per_page: int = 15) -> list[ImageCandidate]:
         if not self.api_key:
             return []
 
+        params = {
+            'query': term,
+            'page': page,
+            'per_page': per_page,
+        }
+
         try:
-            self.api.search(term, page=page, results_per_page=per_page)
-            return self.api.get_entries()
-        except Exception as e:
+            response = self.http_get(f"{self.api_url}/search", params=params,
+                                     headers={'Authorization': self.api_key}, hedge=True)
+            response.raise_for_status()
+        except requests.RequestException as e:
             logger.error(f"Error fetching images from Pexels for term '{term}': {e}")
-            return []
+            raise ProviderError(f"Pexels search failed: {e}") from e
 
+        return [self.json_to_image(item) for item in response.json().get('photos', [])]
 
-    def get_all_images(self) -> list[Image]:
-        db = next(get_db())
-        return db.query(Image).filter(Image.source_api == 'pexels').all()
 
+    def fetch_image(self, id: int) -> Optional[ImageCandidate]:
+        if not self.api_key:
+            return None
 
-    def add_image_to_db(self, term_str: str, img: Photo, api_source: str):
-        db = next(get_db())
-        term_obj = db.query(SearchTerm).filter(SearchTerm.term == term_str).first()
+        try:
+            response = self.http_get(f"{self.api_url}/photos/{id}", headers={'Authorization': self.api_key})
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.error(f"Error fetching image from Pexels for id '{id}': {e}")
+            count_provider_error(self.api_name, 'fetch_image')
+            return None
 
-        if not term_obj:
-            logger.error(f"Term {term_str} not found in DB")
-            return
+        return self.json_to_image(response.json())
 
-        img_id = str(getattr(img, 'id', 'unknown'))
-        url_original = getattr(img, "original", None)
-        url_thumbnail = getattr(img, "tiny", None)
-        url_page = getattr(img, "url", None)
-        extension = getattr(img, "extension", "jpg")
 
-        new_image = Image(
-            source_id=img_id,
-            source_api=api_source,
-            url_original=url_original,
-            url_thumbnail=url_thumbnail,
-            extension=extension,
-            url_page=url_page,
-            status=ImageStatus.APPROVED.value,
-            search_term_id=term_obj.id
-        )
-        db.add(new_image)
-        db.commit()
+    def get_all_images(self) -> list[Image]:
+        db = next(get_db())
+        return db.query(Image).filter(Image.source_api == 'pexels').all()
@@ -0,0 +1,127 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from threading import Lock, Thread
+from typing import Optional
+
+from sqlalchemy import or_
+
+from core.db import get_db
+from core.models import Image
+from services.image_service import ImageCandidate, ImageService, bulk_update_images
+from utils.env_constants import refetch_burst, refetch_chunk_size, refetch_rate, refetch_workers
+from utils.log_utils import logger
+from utils.rate_limit_utils import get_rate_limiter
+
+
+@dataclass
+class RefetchJob:
+    api: str
+    stale_before: Optional[datetime] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    status: str = 'pending'
+    total: int = 0
+    fetched: int = 0
+    updated: int = 0
+    failed: int = 0
+    error: Optional[str] = None
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        for key in ('stale_before', 'started_at', 'finished_at'):
+            data[key] = data[key].isoformat(timespec='seconds') if data[key] else None
+        return data
+
+
+_jobs: dict[str, RefetchJob] = {}
+_jobs_lock = Lock()
+
+
+def get_job(job_id: str) -> Optional[RefetchJob]:
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def get_jobs() -> list[RefetchJob]:
+    with _jobs_lock:
+        return sorted(_jobs.values(), key=lambda job: job.started_at, reverse=True)
+
+
+def get_stale_images(api: str, stale_before: Optional[datetime] = None) -> list[tuple[int, str]]:
+    db = next(get_db())
+    query = db.query(Image.id, Image.source_id).filter(Image.source_api == api)
+    if stale_before is not None:
+        query = query.filter(or_(Image.metadata_refreshed_at.is_(None), Image.metadata_refreshed_at < stale_before))
+    return [(row.id, row.source_id) for row in query.order_by(Image.id).all()]
+
+
+def _to_update(image_id: int, candidate: ImageCandidate, refreshed_at: datetime) -> dict:
+    update = {
+        'id': image_id,
+        'url_original': candidate.url_original,
+        'url_thumbnail': candidate.url_thumbnail,
+        'url_page': candidate.url_page,
+        'metadata_refreshed_at': refreshed_at,
+    }
+    # Fills in tags and descriptions for images approved before they were stored
+    if candidate.tags is not None:
+        update['tags'] = candidate.tags
+    if candidate.description is not None:
+        update['description'] = candidate.description
+    return update
+
+
+def run_refetch(job: RefetchJob, service: ImageService):
+    job.status = 'running'
+    limiter = get_rate_limiter(f"refetch:{job.api}", refetch_rate, refetch_burst)
+
+    def fetch(source_id: str) -> Optional[ImageCandidate]:
+        limiter.acquire()
+        return service.fetch_image(source_id)
+
+    try:
+        rows = get_stale_images(job.api, job.stale_before)
+        job.total = len(rows)
+        pending: list[dict] = []
+
+        with ThreadPoolExecutor(max_workers=refetch_workers, thread_name_prefix=f"refetch-{job.api}") as executor:
+            futures = {executor.submit(fetch, source_id): image_id for image_id, source_id in rows}
+            for future in as_completed(futures):
+                job.fetched += 1
+                try:
+                    candidate = future.result()
+                except Exception as e:
+                    logger.error(f"Error refetching {job.api} image {futures[future]}: {e}")
+                    candidate = None
+
+                if candidate is None:
+                    job.failed += 1
+                    continue
+
+                pending.append(_to_update(futures[future], candidate, datetime.utcnow()))
+                if len(pending) >= refetch_chunk_size:
+                    bulk_update_images(pending)
+                    job.updated += len(pending)
+                    pending = []
+
+        bulk_update_images(pending)
+        job.updated += len(pending)
+        job.status = 'finished'
+        logger.info(f"Refetch {job.id} for {job.api} finished: {job.updated} updated, {job.failed} failed")
+    except Exception as e:
+        logger.error(f"Refetch {job.id} for {job.api} failed: {e}")
+        job.status = 'failed'
+        job.error = str(e)
+    finally:
+        job.finished_at = datetime.utcnow()
+
+
+def start_refetch(api: str, service: ImageService, stale_before: Optional[datetime] = None) -> RefetchJob:
+    job = RefetchJob(api=api, stale_before=stale_before)
+    with _jobs_lock:
+        _jobs[job.id] = job
+    Thread(target=run_refetch, args=(job, service), name=f"refetch-{job.id}", daemon=True).start()
+    return job
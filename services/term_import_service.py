@@ -0,0 +1,134 @@
+import csv
+import io
+import os
+import shutil
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from itertools import islice
+from typing import IO
+
+from sqlalchemy import text
+
+from core.db import get_db
+from core.session import get_all_sessions
+from services.variant_service import prune_variants
+from utils.blob_store import blob_store
+from utils.common_utils import term_to_folder_name
+from utils.env_constants import project_name
+from utils.log_utils import logger
+
+INSERT_CHUNK_SIZE = 5000
+DELETE_CHUNK_SIZE = 500  # ids per IN (...) list, well below SQLite's bound parameter limit
+
+
+@dataclass
+class ImportReport:
+    received: int = 0
+    added: int = 0
+    removed: int = 0
+    unchanged: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def iter_terms(stream: IO[bytes], filename: str = '') -> Iterator[str]:
+    """Terms from an uploaded file, one line at a time; for .csv files the first column, skipping a 'term' header."""
+    lines = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+    if filename.lower().endswith('.csv'):
+        rows = (row[0] if row else '' for row in csv.reader(lines))
+    else:
+        rows = lines
+
+    for index, row in enumerate(rows):
+        term = row.strip()
+        if term and not (index == 0 and term.lower() == 'term'):
+            yield term
+
+
+def _remove_files(terms: list[str], file_paths: set[str], sha256s: set[str]):
+    """
+    Releases the downloads of dropped terms, so their blobs are collected with the last reference, along with
+    anything else left in the term folders, then removes their renditions.
+    """
+    for term in terms:
+        folder = f"assets/{project_name}/image_files/{term_to_folder_name(term)}"
+        if os.path.isdir(folder):
+            file_paths.update(os.path.join(folder, name) for name in os.listdir(folder))
+    for path in file_paths:
+        if not os.path.isdir(path):
+            blob_store.release(path)
+    for term in terms:
+        shutil.rmtree(f"assets/{project_name}/image_files/{term_to_folder_name(term)}", ignore_errors=True)
+    prune_variants(sha256s)
+
+
+def import_terms(terms: Iterable[str]) -> ImportReport:
+    """
+    Makes the stored terms match `terms` without touching the ones that stay: the list is streamed into a temp
+    table, new terms are inserted and dropped terms (with their images) are deleted with set-based statements,
+    so approved images of unchanged terms keep their history.
+    """
+    db = next(get_db())
+    report = ImportReport()
+    file_paths: set[str] = set()
+    sha256s: set[str] = set()
+    try:
+        db.execute(text("DROP TABLE IF EXISTS temp.import_terms"))
+        db.execute(text("CREATE TEMP TABLE import_terms (position INTEGER PRIMARY KEY, term TEXT NOT NULL UNIQUE)"))
+        for chunk in _chunks(terms, INSERT_CHUNK_SIZE):
+            # Duplicates in the file keep their first position
+            db.execute(text("INSERT OR IGNORE INTO import_terms (term) VALUES (:term)"),
+                       [{'term': term} for term in chunk])
+        report.received = db.execute(text("SELECT COUNT(*) FROM import_terms")).scalar()
+
+        dropped = db.execute(text(
+            "SELECT id, term FROM search_terms WHERE term NOT IN (SELECT term FROM import_terms)"
+        )).all()
+        dropped_ids = [term_id for term_id, _ in dropped]
+        for chunk in _chunks(dropped_ids, DELETE_CHUNK_SIZE):
+            params = {f"id{i}": term_id for i, term_id in enumerate(chunk)}
+            ids = ', '.join(f":{name}" for name in params)
+            # The files go after the commit, like in the gallery's delete
+            file_paths.update(db.execute(text(
+                f"SELECT file_path FROM images WHERE search_term_id IN ({ids}) AND file_path IS NOT NULL"
+            ), params).scalars())
+            sha256s.update(db.execute(text(
+                "SELECT source_sha256 FROM image_variants "
+                f"WHERE image_id IN (SELECT id FROM images WHERE search_term_id IN ({ids}))"
+            ), params).scalars())
+            db.execute(text(
+                f"DELETE FROM image_variants WHERE image_id IN (SELECT id FROM images WHERE search_term_id IN ({ids}))"
+            ), params)
+            db.execute(text(f"DELETE FROM images WHERE search_term_id IN ({ids})"), params)
+            db.execute(text(f"DELETE FROM search_terms WHERE id IN ({ids})"), params)
+        report.removed = len(dropped_ids)
+
+        # New terms go in the order of the file, so review follows it
+        report.added = db.execute(text(
+            "INSERT INTO search_terms (term, created_at) "
+            "SELECT term, :now FROM import_terms WHERE term NOT IN (SELECT term FROM search_terms) ORDER BY position"
+        ), {'now': datetime.utcnow()}).rowcount
+        report.unchanged = report.received - report.added
+
+        db.execute(text("DROP TABLE temp.import_terms"))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    if dropped:
+        _remove_files([term for _, term in dropped], file_paths, sha256s)
+    if report.added or report.removed:
+        for session in get_all_sessions():
+            session.reset_photo_idx()
+            session.clear_cache()
+    logger.info(f"Term import finished: {report.to_dict()}")
+    return report
@@ -1,73 +1,17 @@
 import os
-from dataclasses import dataclass, field
-from typing import Any, Optional
+from typing import Optional
 
 import requests
 from dotenv import load_dotenv
 
 from core.db import get_db
-from core.models import Image, ImageStatus, SearchTerm
-from services.image_service import ImageService
+from core.models import Image
+from services.image_service import ImageCandidate, ImageService, ProviderError
 from utils.log_utils import logger
+from utils.metrics_utils import count_provider_error
 
 load_dotenv()
 
-@dataclass
-class Urls:
-    raw: Optional[str] = None
-    full: Optional[str] = None
-    regular: Optional[str] = None
-    small: Optional[str] = None
-    thumb: Optional[str] = None
-    small_s3: Optional[str] = None
-
-@dataclass
-class ProfileImage:
-    small: Optional[str] = None
-    medium: Optional[str] = None
-    large: Optional[str] = None
-
-@dataclass
-class UserLinks:
-    self_: Optional[str] = None
-    html: Optional[str] = None
-    photos: Optional[str] = None
-
-@dataclass
-class User:
-    id: str
-    username: str
-    name: Optional[str] = None
-    first_name: Optional[str] = None
-    last_name: Optional[str] = None
-    instagram_username: Optional[str] = None
-    twitter_username: Optional[str] = None
-    portfolio_url: Optional[str] = None
-    profile_image: Optional[ProfileImage] = None
-    links: Optional[UserLinks] = None
-
-@dataclass
-class Links:
-    self_: Optional[str] = None
-    html: Optional[str] = None
-    download: Optional[str] = None
-
-@dataclass
-class UnsplashImage:
-    id: str
-    created_at: Optional[str] = None
-    width: Optional[int] = None
-    height: Optional[int] = None
-    color: Optional[str] = None
-    blur_hash: Optional[str] = None
-    description: Optional[str] = None
-    alt_description: Optional[str] = None
-    urls: Optional[Urls] = None
-    links: Optional[Links] = None
-    user: Optional[User] = None
-    current_user_collections: list[dict] = field(default_factory=list)
-
-
 def remove_id_from_img_url(url: str) -> str:
     if not url:
         return ""
@@ -84,6 +28,9 @@ def get_extension_from_url(url: str) -> str:
 
 
 class UnsplashService(ImageService):
+    api_name = 'unsplash'
+    supports_fetch = True
+
     def __init__(self):
         self.api_key = os.getenv('UNSPLASH_API_KEY')
         self.api_url = os.getenv("UNSPLASH_API_URL", "https://api.unsplash.com")
@@ -93,39 +40,23 @@ class UnsplashService(ImageService):
              logger.warning("UNSPLASH_API_KEY is not set.")
 
 
-    def json_to_image(self, item: dict) -> UnsplashImage:
-        return UnsplashImage(
+    def json_to_image(self, item: dict) -> ImageCandidate:
+        urls = item.get('urls') or {}
+        links = item.get('links') or {}
+        display_url = urls.get('full') or urls.get('regular')
+
+        return ImageCandidate(
             id=item['id'],
-            created_at=item.get('created_at'),
+            api='unsplash',
+            url=remove_id_from_img_url(display_url),
+            url_original=links.get('download'),
+            url_thumbnail=urls.get('small') or urls.get('thumb'),
+            url_page=links.get('html'),
             width=item.get('width'),
             height=item.get('height'),
-            color=item.get('color'),
-            blur_hash=item.get('blur_hash'),
-            description=item.get('description'),
-            alt_description=item.get('alt_description'),
-            urls=Urls(**item['urls']),
-            links=Links(
-                self_=item['links'].get('self'),
-                html=item['links'].get('html'),
-                download=item['links'].get('download')
-            ),
-            user=User(
-                id=item['user']['id'],
-                username=item['user']['username'],
-                name=item['user'].get('name'),
-                first_name=item['user'].get('first_name'),
-                last_name=item['user'].get('last_name'),
-                instagram_username=item['user'].get('instagram_username'),
-                twitter_username=item['user'].get('twitter_username'),
-                portfolio_url=item['user'].get('portfolio_url'),
-                profile_image=ProfileImage(**item['user']['profile_image']),
-                links=UserLinks(
-                    self_=item['user']['links'].get('self'),
-                    html=item['user']['links'].get('html'),
-                    photos=item['user']['links'].get('photos')
-                )
-            ),
-            current_user_collections=item.get('current_user_collections', [])
+            extension=get_extension_from_url(display_url or ''),
+            tags=', '.join(tag['title'] for tag in item.get('tags') or [] if tag.get('title')) or None,
+            description=item.get('description') or item.get('alt_description')
         )
 
 
@@ -134,56 +65,43 @@ class UnsplashService(ImageService):
         return db.query(Image).filter(Image.source_api == 'unsplash').all()
 
 
-    def search_images(self, query: str, per_page: int = 15) -> list[UnsplashImage]:
+    def search_images(self, query: str, page: int = 1, per_page: int = 15) -> list[ImageCandidate]:
         if not self.api_key:
             return []
 
         url = f"{self.api_url}/search/photos"
         params = {
             "query": query,
+            "page": page,
             "per_page": per_page,
             "client_id": self.api_key,
             "order_by": "relevant"
         }
 
         try:
-            response = requests.get(url, params=params)
+            response = self.http_get(url, params=params, hedge=True)
         except requests.RequestException as e:
             logger.error(f"Error fetching images from Unsplash for query '{query}': {e}")
-            return []
+            raise ProviderError(f"Unsplash search failed: {e}") from e
 
         if response.status_code != 200:
             logger.error(f"Error occurred: {response.status_code} - {response.text}")
-            return []
+            raise ProviderError(f"Unsplash search failed with status {response.status_code}")
 
         data = response.json()
         return [self.json_to_image(item) for item in data['results']]
 
 
-    def add_image_to_db(self, term_str: str, img: Any, api_source: str):
-        db = next(get_db())
-        term_obj = db.query(SearchTerm).filter(SearchTerm.term == term_str).first()
-
-        if not term_obj:
-            logger.error(f"Term {term_str} not found in DB")
-            return
-
-        img_id = str(getattr(img, 'id', 'unknown'))
-        links = getattr(img, "links", None)
-        url_original = getattr(links, "download", None)
-        url_thumbnail = getattr(links, "download", None)
-        url_page = getattr(links, "html", None)
-        extension = getattr(img, "extension", "jpg")
-
-        new_image = Image(
-            source_id=img_id,
-            source_api=api_source,
-            url_original=url_original,
-            url_thumbnail=url_thumbnail,
-            url_page=url_page,
-            status=ImageStatus.APPROVED.value,
-            search_term_id=term_obj.id,
-            extension=extension
-        )
-        db.add(new_image)
-        db.commit()
+    def fetch_image(self, id: str) -> Optional[ImageCandidate]:
+        if not self.api_key:
+            return None
+
+        try:
+            response = self.http_get(f"{self.api_url}/photos/{id}", params={"client_id": self.api_key})
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.error(f"Error fetching image from Unsplash for id '{id}': {e}")
+            count_provider_error(self.api_name, 'fetch_image')
+            return None
+
+        return self.json_to_image(response.json())
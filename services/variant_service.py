@@ -0,0 +1,228 @@
+import os
+from collections.abc import Iterable
+from concurrent.futures import as_completed
+from dataclasses import dataclass
+from threading import Lock, Thread
+from typing import Optional
+
+from PIL import Image as PILImage
+from PIL import ImageOps
+from sqlalchemy.orm import joinedload, selectinload
+
+from core.db import get_db
+from core.models import Image, ImageStatus, ImageVariant
+from services.download_sync_service import local_path
+from utils.env_constants import image_variants, variants_dir, webp_compression_quality
+from utils.executor_utils import get_cpu_executor
+from utils.image_utils import read_image_header
+from utils.log_utils import logger
+
+FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG', 'jpeg': 'JPEG', 'png': 'PNG'}
+
+# Background runs write the same renditions, so they take turns
+_background_lock = Lock()
+
+
+@dataclass(frozen=True)
+class VariantSpec:
+    name: str
+    max_edge: int
+    image_format: str = 'WEBP'
+
+    @property
+    def extension(self) -> str:
+        return 'jpg' if self.image_format == 'JPEG' else self.image_format.lower()
+
+
+def parse_variant_specs(specs: list[str]) -> list[VariantSpec]:
+    """`name:max_edge[:format]` entries, largest first so each rendition can be shrunk from the previous one."""
+    parsed = []
+    for spec in specs:
+        try:
+            name, max_edge, *image_format = spec.split(':')
+            parsed.append(VariantSpec(name, int(max_edge), FORMATS[(image_format or ['webp'])[0].lower()]))
+        except (ValueError, KeyError):
+            logger.error(f"Ignoring invalid IMAGE_VARIANTS entry '{spec}'")
+    return sorted(parsed, key=lambda spec: spec.max_edge, reverse=True)
+
+
+VARIANT_SPECS = parse_variant_specs(image_variants)
+
+
+def variant_path(sha256: str, spec: VariantSpec) -> str:
+    # Keyed on the original's content, so identical downloads share renditions and a changed original gets new ones
+    return os.path.join(variants_dir, sha256[:2], f"{sha256}-{spec.name}-{spec.max_edge}.{spec.extension}")
+
+
+def _save(img: PILImage.Image, spec: VariantSpec, path: str, quality: int) -> dict:
+    if spec.image_format == 'JPEG' and img.mode != 'RGB':
+        img = img.convert('RGB')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    part_path = f"{path}.part"
+    img.save(part_path, spec.image_format, quality=quality)
+    os.replace(part_path, path)
+    return {'path': path, 'width': img.width, 'height': img.height, 'file_size': os.path.getsize(path),
+            'image_format': spec.image_format}
+
+
+def render_variants(source: str, jobs: list[tuple[VariantSpec, str]], quality: int) -> dict[str, dict]:
+    """
+    Runs in a worker process. The original is decoded once: JPEG draft() lets libjpeg scale by 1/2, 1/4 or 1/8
+    while decoding, as far as the largest rendition allows, then reduce() box-averages by whole factors down to
+    about twice each target before the final Lanczos resize.
+    """
+    results = {}
+    largest = max(spec.max_edge for spec, _ in jobs)
+    with PILImage.open(source) as original:
+        original.draft(None, (largest, largest))
+        img = ImageOps.exif_transpose(original)
+
+    if img.mode not in ('RGB', 'RGBA', 'L'):
+        img = img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+
+    for spec, path in sorted(jobs, key=lambda job: job[0].max_edge, reverse=True):
+        factor = max(img.size) // (spec.max_edge * 2)
+        if factor >= 2:
+            img = img.reduce(factor)
+        rendition = img.copy()
+        rendition.thumbnail((spec.max_edge, spec.max_edge), PILImage.Resampling.LANCZOS, reducing_gap=None)
+        results[spec.name] = _save(rendition, spec, path, quality)
+    return results
+
+
+def _describe(spec: VariantSpec, path: str) -> Optional[dict]:
+    header = read_image_header(path)
+    if header is None:
+        return None
+    return {'path': path, 'width': header['width'], 'height': header['height'],
+            'file_size': os.path.getsize(path), 'image_format': spec.image_format}
+
+
+def generate_variants(image_ids: Optional[list[int]] = None, force: bool = False) -> dict:
+    """
+    Builds the configured renditions for downloaded images (all approved ones, or just `image_ids`) on the shared
+    CPU pool. A rendition is rebuilt only when the original's SHA-256 or the variant settings changed, or with
+    `force`.
+    """
+    db = next(get_db())
+    query = (
+        db.query(Image)
+        .options(joinedload(Image.search_term), selectinload(Image.variants))
+        .filter(Image.status == ImageStatus.APPROVED.value, Image.file_sha256.isnot(None))
+        .populate_existing()
+    )
+    if image_ids is not None:
+        query = query.filter(Image.id.in_(image_ids))
+    images = query.all()
+
+    report = {'total': len(images), 'generated': 0, 'up_to_date': 0, 'failed': 0}
+    stale: list[tuple[Image, VariantSpec, str]] = []
+    # sha256 -> (original on disk, renditions to build); shared originals are rendered once
+    to_render: dict[str, tuple[str, dict[VariantSpec, str]]] = {}
+    for img in images:
+        existing = {variant.name: variant for variant in img.variants}
+        source = None
+        for spec in VARIANT_SPECS:
+            path = variant_path(img.file_sha256, spec)
+            variant = existing.get(spec.name)
+            if not force and variant and variant.path == path and os.path.exists(path):
+                report['up_to_date'] += 1
+                continue
+
+            source = source or local_path(img)
+            if source is None:
+                report['failed'] += 1
+                continue
+            stale.append((img, spec, path))
+            if force or not os.path.exists(path):
+                to_render.setdefault(img.file_sha256, (source, {}))[1][spec] = path
+
+    rendered: dict[tuple[str, str], dict] = {}
+    if to_render:
+        executor = get_cpu_executor()
+        # The pool's processes may have been started from another working directory, so they get absolute paths
+        futures = {
+            executor.submit(render_variants, os.path.abspath(source),
+                            [(spec, os.path.abspath(path)) for spec, path in jobs.items()],
+                            webp_compression_quality): sha256
+            for sha256, (source, jobs) in to_render.items()
+        }
+        for future in as_completed(futures):
+            sha256 = futures[future]
+            paths = {spec.name: path for spec, path in to_render[sha256][1].items()}
+            try:
+                for name, result in future.result().items():
+                    rendered[(sha256, name)] = {**result, 'path': paths[name]}
+            except Exception as e:
+                logger.error(f"Could not build variants of {to_render[sha256][0]}: {e}")
+
+    replaced_paths = set()
+    for img, spec, path in stale:
+        result = rendered.get((img.file_sha256, spec.name)) or (os.path.exists(path) and _describe(spec, path))
+        if not result:
+            report['failed'] += 1
+            continue
+
+        variant = next((variant for variant in img.variants if variant.name == spec.name), None)
+        if variant is None:
+            variant = ImageVariant(name=spec.name)
+            img.variants.append(variant)
+        elif variant.path != path:
+            replaced_paths.add(variant.path)
+        variant.source_sha256 = img.file_sha256
+        for key, value in result.items():
+            setattr(variant, key, value)
+        report['generated'] += 1
+
+    try:
+        db.commit()
+    except Exception as e:
+        logger.error(f"Error saving image variants: {e}")
+        db.rollback()
+        return report
+
+    for path in replaced_paths:
+        if not db.query(ImageVariant).filter(ImageVariant.path == path).count() and os.path.exists(path):
+            os.remove(path)
+
+    logger.info(f"Variant generation finished: {report}")
+    return report
+
+
+def _generate_in_background(image_ids: list[int]):
+    with _background_lock:
+        try:
+            generate_variants(image_ids)
+        except Exception as e:
+            logger.error(f"Background variant generation failed: {e}")
+
+
+def start_variant_generation(image_ids: list[int]):
+    """Builds the renditions of `image_ids` on a background thread, so a download request doesn't wait for them."""
+    Thread(target=_generate_in_background, args=(image_ids,), name='variants', daemon=True).start()
+
+
+def prune_variants(sha256s: Iterable[str]) -> int:
+    """
+    Removes the rendition files of originals that no ImageVariant row refers to any more, e.g. after their images
+    were deleted. Renditions of earlier IMAGE_VARIANTS settings go too, since all of them start with the SHA-256.
+    """
+    sha256s = {sha256 for sha256 in sha256s if sha256}
+    if not sha256s:
+        return 0
+    db = next(get_db())
+    used = {sha256 for sha256, in db.query(ImageVariant.source_sha256).filter(
+        ImageVariant.source_sha256.in_(sha256s)).distinct()}
+
+    removed = 0
+    for sha256 in sha256s - used:
+        folder = os.path.join(variants_dir, sha256[:2])
+        if not os.path.isdir(folder):
+            continue
+        for name in os.listdir(folder):
+            if name.startswith(f"{sha256}-"):
+                os.remove(os.path.join(folder, name))
+                removed += 1
+    if removed:
+        logger.info(f"Removed {removed} variant files of deleted images")
+    return removed
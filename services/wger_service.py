@@ -1,116 +1,135 @@
 import os
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Optional
+from urllib.parse import urljoin, urlparse
 
 import requests
 from dotenv import load_dotenv
 
 from core.db import get_db
-from core.models import Image, ImageStatus, SearchTerm
-from services.image_service import ImageService
+from core.models import Image
+from services.image_service import ImageCandidate, ImageService, ProviderError
+from utils.disk_cache import DiskCache
+from utils.env_constants import wger_image_cache_ttl_hours, wger_image_workers
 from utils.log_utils import logger
+from utils.metrics_utils import count_provider_error
+from utils.resilience_utils import CircuitOpenError
 
 load_dotenv()
 
-@dataclass
-class WgerImage:
-    id: int
-    base_id: int
-    value: str
-    name: str
-    category: str
-    image: str
-    image_thumbnail: str
+WGER_IMAGE_CACHE = "assets/cache/wger_images.sqlite3"
+PUBLIC_DOMAIN_LICENSE = 1
+
 
 class WgerService(ImageService):
+    api_name = 'wger'
+    max_pages = 1  # the search endpoint has no pagination
+
     def __init__(self):
         self.wger_api_url = os.getenv("WGER_API_URL", "https://wger.de/api/v2")
         self.wger_base_url = os.getenv('WGER_BASE_URL', "https://wger.de")
+        # exercise id -> image URL, or None for exercises without a public domain image
+        self.image_cache = DiskCache(WGER_IMAGE_CACHE, wger_image_cache_ttl_hours * 3600)
 
     def _generate_search_url(self, term: str, limit=15, lang='en') -> str:
         return f"{self.wger_api_url}/exercise/search/?language={lang}&term={term}&limit={limit}"
 
-    def json_to_image(self, json_data: dict) -> WgerImage:
-        return WgerImage(
-            value=json_data['value'],
-            id=json_data['data']['id'],
-            base_id=json_data['data']['baseId'],
-            name=json_data['data']['name'],
-            category=json_data['data']['category'],
-            image=f"{self.wger_base_url}/{json_data['data']['image']}",
-            image_thumbnail=f"{self.wger_base_url}/{json_data['data']['image_thumbnail']}",
+    def _media_url(self, path: Optional[str]) -> Optional[str]:
+        return urljoin(f"{self.wger_base_url}/", path) if path else None
+
+    def _page_url(self, exercise_id: int) -> str:
+        return f"{self.wger_base_url}/exercise/{exercise_id}/"
+
+    @staticmethod
+    def _extension(url: str) -> str:
+        return os.path.splitext(urlparse(url).path)[1].lstrip('.').lower() or 'jpg'
+
+    def json_to_image(self, item: dict[str, Any], image: Optional[str] = None) -> ImageCandidate:
+        data = item['data']
+        image = self._media_url(data.get('image')) or image
+        # The exercise (base) id, not the id of the translation the search matched: images, exercise pages and
+        # fetch_image all go by it
+        return ImageCandidate(
+            id=str(data['baseId']),
+            api='wger',
+            url=image,
+            url_original=image,
+            url_thumbnail=self._media_url(data.get('image_thumbnail')) or image,
+            url_page=self._page_url(data['baseId']),
+            extension=self._extension(image) if image else 'jpg',
+            tags=data.get('category'),
+            description=data.get('name') or item.get('value'),
         )
 
-    def search_images(self, term: str, page: int = 1, per_page: int = 15) -> list[WgerImage]:
+    def _lookup_image(self, exercise_id: int) -> Optional[str]:
+        response = self.http_get(f"{self.wger_api_url}/exerciseimage/",
+                                 params={'exercise': exercise_id, 'license': PUBLIC_DOMAIN_LICENSE})
+        response.raise_for_status()
+        results = response.json().get('results') or []
+        main = next((result for result in results if result.get('is_main')), results[0] if results else None)
+        return self._media_url(main['image']) if main else None
+
+    def resolve_images(self, exercise_ids: list[int]) -> dict[int, Optional[str]]:
+        """
+        Image URLs for exercises, from the disk cache or else looked up concurrently, so a whole suggestion list
+        costs one extra round trip at most. Failed lookups are left out and not cached.
+        """
+        cached = self.image_cache.get_many(str(exercise_id) for exercise_id in exercise_ids)
+        images = {exercise_id: cached[str(exercise_id)] for exercise_id in exercise_ids if str(exercise_id) in cached}
+        missing = [exercise_id for exercise_id in dict.fromkeys(exercise_ids) if exercise_id not in images]
+        if not missing:
+            return images
+
+        def lookup(exercise_id: int) -> tuple[int, Optional[str], bool]:
+            try:
+                return exercise_id, self._lookup_image(exercise_id), True
+            except (CircuitOpenError, requests.RequestException, ValueError) as e:
+                logger.error(f"Error fetching images from Wger for exercise id '{exercise_id}': {e}")
+                count_provider_error(self.api_name, 'resolve_images')
+                return exercise_id, None, False
+
+        with ThreadPoolExecutor(max_workers=min(len(missing), wger_image_workers),
+                                thread_name_prefix='wger-images') as executor:
+            resolved = {exercise_id: image for exercise_id, image, ok in executor.map(lookup, missing) if ok}
+        self.image_cache.set_many({str(exercise_id): image for exercise_id, image in resolved.items()})
+        return {**images, **resolved}
+
+    def search_images(self, term: str, page: int = 1, per_page: int = 15) -> list[ImageCandidate]:
         """
-        Search for images in Wger API.
-        Note: Wger search endpoint pagination might work differently or not be supported in the same way.
-        This implementation uses the existing search logic from wger_utils.
+        One search request for the suggestions, then one concurrent round of image lookups for the suggestions that
+        came without an image. Exercises with no image at all are left out.
         """
-        # Wger search seems to use 'limit' but maybe not 'page' in the same way
-        # as standard paginated APIs in this specific endpoint?
-        # The original utils used 'limit'. We will map per_page to limit.
+        if page > self.max_pages:
+            return []
         url = self._generate_search_url(term, limit=per_page)
-        exercises = []
 
         try:
-            response = requests.get(url).json()
-            if 'suggestions' in response:
-                data = response['suggestions']
-                for img in data:
-                    w_img = self.json_to_image(img)
-                    exercises.append(w_img)
-            return exercises
+            response = self.http_get(url, hedge=True)
+            response.raise_for_status()
+            suggestions = response.json().get('suggestions') or []
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error fetching images from Wger for term '{term}': {e}")
-            return []
+            raise ProviderError(f"Wger search failed: {e}") from e
+
+        without_image = [item['data']['baseId'] for item in suggestions if not item['data'].get('image')]
+        images = self.resolve_images(without_image) if without_image else {}
+        # Images that came with the suggestion are cached too, so fetch_image finds the one that was approved
+        self.image_cache.set_many({str(item['data']['baseId']): self._media_url(item['data']['image'])
+                                   for item in suggestions if item['data'].get('image')})
+
+        candidates = [self.json_to_image(item, images.get(item['data']['baseId'])) for item in suggestions]
+        return [candidate for candidate in candidates if candidate.url_original]
 
     def get_all_images(self) -> list[Image]:
         db = next(get_db())
         return db.query(Image).filter(Image.source_api == 'wger').all()
 
-    def add_image_to_db(self, term_str: str, img: WgerImage, api_source: str = 'wger'):
-        db = next(get_db())
-        term_obj = db.query(SearchTerm).filter(SearchTerm.term == term_str).first()
-
-        if not term_obj:
-            logger.error(f"Term {term_str} not found in DB")
-            return
-
-        # Map WgerImage fields to Image model
-        new_image = Image(
-            source_id=str(img.id),
-            source_api=api_source,
-            url_original=img.image,
-            url_thumbnail=img.image_thumbnail,
-            # Wger images are usually jpg/png, we can infer or default.
-            # The original util treated it as just a string URL.
-            # We'll assume jpg or check extension if possible, but default is fine.
-            extension="jpg",
-            url_page=f"{self.wger_base_url}/exercise/{img.base_id}/", # Constructing a page URL best effort
-            status=ImageStatus.APPROVED.value,
-            search_term_id=term_obj.id
-        )
-
-        try:
-            db.add(new_image)
-            db.commit()
-        except Exception as e:
-            logger.error(f"Error adding Wger image to DB: {e}")
-            db.rollback()
-
-    def fetch_image(self, id: int) -> Optional[Any]:
-        # Implementation depends on if we need to fetch a single image by ID from API
-        # The utils had 'get_exercise_image' which fetched by exercise_id.
-        # We can implement that logic here if needed, or leave pass if not used by interface yet.
-        # But let's implement similar to utils for completeness.
-        img_url = f"{self.wger_api_url}/exerciseimage/?exercise={id}&license=1"
-        try:
-            res = requests.get(img_url).json()
-            if res.get('results'):
-                # This returns just the image URL in the utils, but fetch_image usually returns an object.
-                # For now keeping it consistent with the interface return type hint Any/Optional
-                return res['results'][0]
-        except Exception as e:
-            logger.error(f"Error fetching images from Wger for exercise id '{id}': {e}")
+    def fetch_image(self, id: int) -> Optional[ImageCandidate]:
+        """The image of exercise `id` (a stored source_id), through the same cached lookup as search."""
+        image = self.resolve_images([int(id)]).get(int(id))
+        if image is None:
             return None
+        return ImageCandidate(id=str(id), api='wger', url=image, url_original=image, url_thumbnail=image,
+                              url_page=self._page_url(id), extension=self._extension(image))
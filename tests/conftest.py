@@ -2,8 +2,9 @@ import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from app import app
+from app import create_app
 from core.db import Base, get_db
+from core.search_index import init_search_index
 
 # Use in-memory SQLite for tests
 TEST_DATABASE_URL = "sqlite:///:memory:"
@@ -13,6 +14,7 @@ TEST_DATABASE_URL = "sqlite:///:memory:"
 def db_engine():
     engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
     Base.metadata.create_all(bind=engine)
+    init_search_index(engine)
     yield engine
     Base.metadata.drop_all(bind=engine)
 
@@ -31,7 +33,26 @@ def db_session(db_engine):
 
 
 @pytest.fixture
-def client(db_session):
+def patch_get_db(db_session, monkeypatch):
+    """Points `get_db` of the given modules at the test session: patch_get_db(module, ...)."""
+    def override_get_db():
+        yield db_session
+
+    def patch(*modules):
+        for module in modules:
+            monkeypatch.setattr(module, 'get_db', override_get_db)
+        return db_session
+
+    return patch
+
+
+@pytest.fixture(scope="session")
+def app():
+    return create_app()
+
+
+@pytest.fixture
+def client(app, db_session):
     def override_get_db():
         yield db_session
 
@@ -22,3 +22,12 @@ def test_add_search_term(client, db_session):
     db_session.commit()
 
     assert db_session.query(SearchTerm).count() == 1
+
+
+def test_templates_are_compiled_once(app, client):
+    client.get("/setup")
+    client.get("/setup")
+
+    template = app.jinja_env.get_template("txt_setup_page.html")
+    assert app.jinja_env.get_template("txt_setup_page.html") is template
+    assert app.jinja_env.bytecode_cache is not None
@@ -0,0 +1,70 @@
+import os
+import sqlite3
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.models import Image
+from utils.blob_store import BlobStore
+from utils.download_utils import download_image
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    monkeypatch.setattr('utils.download_utils.blob_store', store)
+    return store
+
+
+def get_response(content: bytes):
+    response = MagicMock(status_code=200, headers={'Content-Length': str(len(content))})
+    response.iter_content.return_value = [content]
+    response.__enter__.return_value = response
+    return response
+
+
+def test_same_photo_for_two_terms_is_downloaded_and_stored_once(store, tmp_path):
+    img = Image(source_id='42', source_api='pixabay', url_original='https://img.test/42.jpg', extension='jpg')
+
+    with patch('utils.download_utils.requests.get', return_value=get_response(b'photo')) as mock_get:
+        first = download_image(img, str(tmp_path / 'apple'))
+        second = download_image(img, str(tmp_path / 'fruit'))
+
+    assert mock_get.call_count == 1
+    assert first['file_sha256'] == second['file_sha256']
+    assert os.path.samefile(first['file_path'], second['file_path'])
+    assert store.stats() == {'blobs': 1, 'stored_bytes': 5, 'references': 2, 'linked_bytes': 10}
+
+
+def test_blobs_are_removed_with_their_last_reference(store, tmp_path):
+    source = tmp_path / 'download.part'
+    source.write_bytes(b'photo')
+    store.put(str(source), 'ab' * 32)
+    store.link('ab' * 32, str(tmp_path / 'apple' / '1.jpg'))
+    store.link('ab' * 32, str(tmp_path / 'fruit' / '1.jpg'), project='other')
+
+    assert store.release(str(tmp_path / 'apple' / '1.jpg'))
+    assert store.has_blob('ab' * 32)
+    assert not (tmp_path / 'apple' / '1.jpg').exists()
+
+    store.release_project('other')
+    assert not store.has_blob('ab' * 32)
+    assert store.stats()['blobs'] == 0
+
+
+def test_index_from_before_the_encoding_columns_is_migrated(tmp_path):
+    root = tmp_path / 'blobs'
+    root.mkdir()
+    with sqlite3.connect(root / 'index.sqlite3') as connection:
+        connection.executescript(
+            'CREATE TABLE blob_sources (source_api TEXT NOT NULL, source_id TEXT NOT NULL, sha256 TEXT NOT NULL, '
+            'PRIMARY KEY (source_api, source_id));'
+        )
+    store = BlobStore(str(root))
+    source = tmp_path / 'download.part'
+    source.write_bytes(b'photo')
+    store.put(str(source), 'ab' * 32)
+    store.link('ab' * 32, str(tmp_path / 'apple' / '1.webp'), ('pixabay', '1'), encoding={'source_file_size': 9})
+
+    assert store.find_source('pixabay', '1') == {'sha256': 'ab' * 32, 'size': 5, 'extension': 'webp',
+                                                 'fit_quality': None, 'fit_scale': None, 'source_file_size': 9}
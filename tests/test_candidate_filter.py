@@ -0,0 +1,47 @@
+from unittest.mock import MagicMock, patch
+
+from services import candidate_filter
+from services.candidate_filter import filter_candidates, filter_pages
+from services.image_service import ImageCandidate
+
+
+def candidate(id, **kwargs) -> ImageCandidate:
+    return ImageCandidate(id=id, api='test', url_original=f"https://img.test/{id}.jpg", **kwargs)
+
+
+def test_provider_metadata_skips_probes():
+    small = candidate('small', size=100_000, width=1920, height=1080)
+    tiny = candidate('tiny', size=10_000, width=320, height=200)
+
+    with patch.object(candidate_filter.requests, 'head') as mock_head, \
+            patch.object(candidate_filter, 'min_image_width', 640):
+        kept = filter_candidates([small, tiny], mode='drop', max_kb=512)
+        assert [c.id for c in kept] == ['small']
+    mock_head.assert_not_called()
+
+
+@patch.object(candidate_filter.requests, 'head')
+def test_oversized_candidates_are_probed_once_and_demoted(mock_head):
+    sizes = {'https://img.test/big.jpg': '900000', 'https://img.test/ok.jpg': '200000'}
+    mock_head.side_effect = lambda url, **kwargs: MagicMock(ok=True, headers={'Content-Length': sizes[url]})
+    # Pixabay-style upper bound above the limit, so the download URL has to be probed
+    big, ok = candidate('big', size=5_000_000), candidate('ok', size=3_000_000)
+
+    assert [c.id for c in filter_candidates([big, ok], mode='demote', max_kb=512)] == ['ok', 'big']
+    assert [c.id for c in filter_candidates([big, ok], mode='drop', max_kb=512)] == ['ok']
+    assert mock_head.call_count == 2
+
+
+def test_filter_pages_skips_pages_that_are_filtered_away():
+    pages = [[candidate('a', width=10)], [candidate('b', width=2000)]]
+    with patch.object(candidate_filter, 'min_image_width', 640):
+        result = list(filter_pages(pages, mode='drop', probe=False))
+    assert [[c.id for c in page] for page in result] == [['b']]
+
+
+def test_fit_mode_keeps_oversized_candidates_without_probing():
+    big = candidate('big', size=5_000_000)
+    with patch.object(candidate_filter.requests, 'head') as mock_head, \
+            patch.object(candidate_filter, 'oversize_mode', 'fit'):
+        assert [c.id for c in filter_candidates([big], mode='drop', max_kb=512)] == ['big']
+    mock_head.assert_not_called()
@@ -0,0 +1,95 @@
+import time
+from threading import Thread
+
+from services import candidate_filter
+from services.candidate_stream import CandidateStream
+from services.image_service import ImageCandidate, ImageService
+from utils import executor_utils
+from utils.executor_utils import get_io_executor, new_io_executor
+from utils.resilience_utils import hedged_call
+
+
+def make_page(start: int, size: int) -> list[ImageCandidate]:
+    return [ImageCandidate(id=str(i), api='test') for i in range(start, start + size)]
+
+
+class PagedService(ImageService):
+    api_name = 'paged'
+    max_pages = 3
+
+    def __init__(self, total: int):
+        self.total = total
+        self.requested_pages = []
+
+    def search_images(self, term: str, page: int = 1, per_page: int = 15) -> list[ImageCandidate]:
+        self.requested_pages.append(page)
+        start = (page - 1) * per_page
+        return make_page(start, max(0, min(per_page, self.total - start)))
+
+
+def test_iter_pages_stops_at_short_page_and_page_limit():
+    short = PagedService(total=25)
+    assert [len(page) for page in short.iter_pages('cat', per_page=10)] == [10, 10, 5]
+
+    deep = PagedService(total=1000)
+    assert [len(page) for page in deep.iter_pages('cat', per_page=10)] == [10, 10, 10]
+    assert deep.requested_pages == [1, 2, 3]
+
+
+def test_stream_fetches_next_page_only_near_the_end():
+    service = PagedService(total=1000)
+    stream = CandidateStream(service.search_images('cat', page=1, per_page=10),
+                             service.iter_pages('cat', per_page=10, start_page=2), margin=2)
+
+    assert stream.ensure(5)
+    assert service.requested_pages == [1]
+
+    assert stream[9].id == '9'  # within the margin, page 2 is prefetched in the background
+    assert stream.ensure(10)
+    assert service.requested_pages == [1, 2]
+    assert len(stream) == 20
+
+
+def test_stream_stops_when_provider_runs_out():
+    service = PagedService(total=12)
+    stream = CandidateStream(service.search_images('cat', page=1, per_page=10),
+                             service.iter_pages('cat', per_page=10, start_page=2))
+
+    assert stream.ensure(11)
+    assert not stream.ensure(12)
+    assert stream.exhausted
+    assert [photo.id for photo in stream][-1] == '11'
+
+
+def test_prefetches_dont_deadlock_a_small_io_pool(monkeypatch):
+    monkeypatch.setattr(executor_utils, '_io_executor', new_io_executor(2))
+    monkeypatch.setattr(candidate_filter, 'probe_size', lambda url: time.sleep(0.01) or 1000)
+
+    def pages(name: str):
+        # Each page is probed and fetched with a hedge, both of which fan out onto the I/O pool
+        for page in range(2, 5):
+            hedged_call(lambda: time.sleep(0.01), delay=0)
+            yield candidate_filter.filter_candidates(
+                [ImageCandidate(id=f"{name}{page}-{i}", api='test', url_original=f"https://img.test/{name}{page}-{i}")
+                 for i in range(5)],
+                mode='drop', max_kb=500, probe=True)
+
+    streams = [CandidateStream(make_page(0, 5), pages(name), margin=2) for name in 'ab']
+
+    def review():
+        for stream in streams:
+            stream.ensure(3)  # schedules both prefetches at once
+        for stream in streams:
+            stream.ensure(19)
+
+    reviewer = Thread(target=review, daemon=True)
+    reviewer.start()
+    reviewer.join(timeout=5)
+    assert not reviewer.is_alive()
+    assert [len(stream) for stream in streams] == [20, 20]
+
+    # Filtering on an I/O worker itself probes inline instead of waiting on its own pool
+    monkeypatch.setattr(executor_utils, '_io_executor', new_io_executor(1))
+    page = [ImageCandidate(id='x', api='test', url_original='https://img.test/x')]
+    assert get_io_executor().submit(candidate_filter.filter_candidates, page, mode='drop', max_kb=500,
+                                    probe=True).result(timeout=5) == page
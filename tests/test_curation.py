@@ -0,0 +1,123 @@
+import io
+import json
+import random
+
+import pytest
+from PIL import Image as PILImage
+
+from core.models import Image, ImageStatus, SearchTerm
+from factory.image_service_factory import ImageServiceFactory
+from services import curation_service, image_service
+from services.curation_service import CurationRules, run_curation
+from services.image_service import ImageCandidate, ImageService, ProviderError
+from utils.image_utils import dhash, hamming_distance
+
+# Thumbnail hashes by candidate id: 'b' is a near duplicate of 'a', 'c' is a different photo
+HASHES = {'a': '0f0f0f0f0f0f0f0f', 'b': '0f0f0f0f0f0f0f0e', 'c': 'f0f0f0f0f0f0f0f0', 'd': 'ffff0000ffff0000'}
+
+
+class FakeService(ImageService):
+    api_name = 'fake'
+
+    def __init__(self, results=None, fail=False):
+        self.results = results or {}
+        self.fail = fail
+        self.searched = []
+
+    def search_images(self, term, page=1, per_page=15):
+        self.searched.append(term)
+        if self.fail:
+            # Another worker's successful call to the same provider leaves the shared breaker looking healthy
+            self.breaker.record_success(0.0)
+            raise ProviderError('provider down')
+        return [ImageCandidate(id=id, api=self.api_name, url_original=f"https://img.test/{id}.jpg",
+                               url_thumbnail=f"https://img.test/{id}_thumb.jpg", size=100_000, width=width,
+                               height=1000)
+                for id, width in self.results.get(term, [])]
+
+
+@pytest.fixture
+def curation_db(db_session, patch_get_db, monkeypatch, tmp_path):
+    patch_get_db(curation_service, image_service)
+    monkeypatch.setattr(curation_service, 'curate_provider_rate', 0)
+    monkeypatch.setattr(curation_service, '_thumbnail_hash', lambda candidate: HASHES.get(candidate.id))
+    monkeypatch.setattr(ImageServiceFactory, '_services', {})
+    monkeypatch.setattr(ImageServiceFactory, '_registry', {})
+    return db_session
+
+
+def register(service: FakeService, api='fake'):
+    service.api_name = api
+    ImageServiceFactory.register(api, lambda: service)
+    return service
+
+
+def test_curation_applies_rules_and_checkpoints(curation_db, tmp_path):
+    sky, sea = SearchTerm(term='sky'), SearchTerm(term='sea')
+    curation_db.add_all([sky, sea])
+    curation_db.flush()
+    curation_db.add(Image(source_id='taken', source_api='fake', status=ImageStatus.REJECTED.value,
+                          search_term_id=sea.id))
+    curation_db.commit()
+
+    register(FakeService({
+        # too narrow, then a near duplicate of 'a'
+        'sky': [('narrow', 300), ('a', 2000), ('b', 2000), ('c', 2000)],
+        'sea': [('taken', 2000)],
+    }))
+    register(FakeService({'sea': [('d', 2000)]}), api='backup')
+    checkpoint = str(tmp_path / 'checkpoint.jsonl')
+    rules = CurationRules(per_term=2, providers=['fake', 'backup'], min_width=1000, max_kb=512, dedupe_distance=4)
+
+    report = run_curation(rules, workers=2, download=False, checkpoint_path=checkpoint)
+
+    assert (report.terms, report.completed, report.short, report.failed) == (2, 1, 1, 0)
+    assert (report.approved, report.near_duplicates) == (3, 1)
+    approved = curation_db.query(Image.source_api, Image.source_id, Image.dhash).filter(
+        Image.status == ImageStatus.APPROVED.value).order_by(Image.source_id).all()
+    assert approved == [('fake', 'a', HASHES['a']), ('fake', 'c', HASHES['c']), ('backup', 'd', HASHES['d'])]
+    with open(checkpoint) as file:
+        assert sorted((entry['term'], entry['approved']) for entry in map(json.loads, file)) == \
+            [('sea', 1), ('sky', 2)]
+
+
+def test_curation_resumes_from_checkpoint_and_retries_failed_terms(curation_db, tmp_path):
+    curation_db.add_all([SearchTerm(term='sky'), SearchTerm(term='sea'), SearchTerm(term='sun')])
+    curation_db.commit()
+    checkpoint = tmp_path / 'checkpoint.jsonl'
+    # The last line was cut short by the interruption
+    checkpoint.write_text(json.dumps({'term': 'sky', 'approved': 0}) + '\n{"term": "se')
+
+    service = register(FakeService(fail=True))
+    report = run_curation(CurationRules(per_term=1, providers=['fake']), workers=1, download=False,
+                          checkpoint_path=str(checkpoint))
+
+    assert sorted(service.searched) == ['sea', 'sun']
+    assert (report.resumed, report.failed) == (1, 2)
+
+    service.fail, service.searched = False, []
+    report = run_curation(CurationRules(per_term=1, providers=['fake']), workers=1, download=False,
+                          checkpoint_path=str(checkpoint))
+    assert sorted(service.searched) == ['sea', 'sun']
+    assert (report.resumed, report.short) == (1, 2)
+    lines = checkpoint.read_text().splitlines()
+    assert [json.loads(line)['term'] for line in lines[2:]] in (['sea', 'sun'], ['sun', 'sea'])
+
+
+def photo(seed: int) -> PILImage.Image:
+    # Random 12x9 blocks blown up into smooth shapes
+    pixels = random.Random(seed).randbytes(12 * 9 * 3)
+    return PILImage.frombytes('RGB', (12, 9), pixels).resize((400, 300), PILImage.Resampling.BICUBIC)
+
+
+def encoded(image: PILImage.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def test_dhash_matches_resized_copies():
+    original = dhash(encoded(photo(1)))
+    assert hamming_distance(original, dhash(encoded(photo(1).resize((200, 150))))) <= 2
+    assert hamming_distance(original, dhash(encoded(photo(2)))) > 16
+    assert dhash(b'not an image') is None
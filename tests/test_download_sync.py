@@ -0,0 +1,184 @@
+import io
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+from PIL import Image as PILImage
+
+from core.models import Image, ImageStatus, SearchTerm
+from services import image_service
+from services.download_sync_service import header_check, local_path, sync_downloads
+from utils import download_utils
+from utils.env_constants import project_name
+from utils.image_utils import fit_to_budget, transcode
+
+
+def jpeg_bytes(color: str = 'red') -> bytes:
+    buffer = io.BytesIO()
+    PILImage.new('RGB', (32, 32), color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+COLORS = {'0': 'red', '1': 'green', '2': 'blue'}
+
+
+def noise_jpeg_bytes(size=(800, 600)) -> bytes:
+    buffer = io.BytesIO()
+    PILImage.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3)).save(buffer, 'JPEG', quality=95)
+    return buffer.getvalue()
+
+
+def get_by_url(url, **kwargs):
+    return get_response(jpeg_bytes(COLORS[url.rsplit('/', 1)[1].split('.')[0]]))
+
+
+def get_response(content: bytes, status: int = 200):
+    response = MagicMock(status_code=status, headers={'Content-Length': str(len(content)), 'ETag': '"abc"'})
+    response.iter_content.return_value = [content]
+    response.__enter__.return_value = response
+    return response
+
+
+@pytest.fixture
+def sync_db(db_session, patch_get_db, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    patch_get_db(image_service)
+    term = SearchTerm(term='red apple')
+    db_session.add(term)
+    db_session.flush()
+    db_session.add_all([
+        Image(source_id=str(i), source_api='pixabay', url_original=f"https://img.test/{i}.jpg",
+              status=ImageStatus.APPROVED.value, search_term_id=term.id)
+        for i in range(3)
+    ])
+    db_session.commit()
+    return db_session
+
+
+def test_resync_skips_intact_files_and_repairs_truncated_ones(sync_db):
+    images = sync_db.query(Image).all()
+
+    with patch('utils.download_utils.requests.get', side_effect=get_by_url) as mock_get:
+        report = sync_downloads(images)
+    assert (report.downloaded, mock_get.call_count) == (3, 3)
+
+    sync_db.expire_all()
+    images = sync_db.query(Image).all()
+    assert all(img.file_size == os.path.getsize(img.file_path) and len(img.file_sha256) == 64 for img in images)
+    assert images[0].download_etag == '"abc"'
+
+    with open(images[0].file_path, 'r+b') as file:
+        file.truncate(images[0].file_size // 2)
+
+    with patch('utils.download_utils.requests.get', side_effect=get_by_url) as mock_get:
+        report = sync_downloads(images)
+    assert (report.skipped, report.downloaded, mock_get.call_count) == (2, 1, 1)
+    assert header_check(images[0].file_path)
+
+
+def test_existing_files_are_adopted_after_header_check(sync_db):
+    images = sync_db.query(Image).all()
+    content = jpeg_bytes()
+    for img in images:
+        folder = os.path.join('assets', project_name, 'image_files', 'red_apple')
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"{img.source_id}.jpg"), 'wb') as file:
+            file.write(content if img.source_id != '2' else content[:len(content) // 2])
+
+    assert header_check(local_path(images[0]))
+    assert not header_check(local_path(images[2]))
+
+    with patch('utils.download_utils.requests.get', return_value=get_response(content)) as mock_get:
+        report = sync_downloads(images)
+    assert (report.adopted, report.downloaded, mock_get.call_count) == (2, 1, 1)
+
+
+def test_revalidation_uses_conditional_requests(sync_db):
+    images = sync_db.query(Image).all()
+    with patch('utils.download_utils.requests.get', return_value=get_response(jpeg_bytes())):
+        sync_downloads(images)
+    sync_db.expire_all()
+
+    with patch('utils.download_utils.requests.get', return_value=get_response(b'', status=304)) as mock_get:
+        report = sync_downloads(sync_db.query(Image).all(), revalidate=True)
+    assert report.not_modified == 3
+    assert mock_get.call_args.kwargs['headers'] == {'If-None-Match': '"abc"'}
+
+
+def test_fit_to_budget_lowers_quality_then_scale(tmp_path):
+    source = str(tmp_path / 'noise.jpg')
+    with open(source, 'wb') as file:
+        file.write(noise_jpeg_bytes())
+
+    fitted = fit_to_budget(source, str(tmp_path / 'fitted.jpg'), 30_000)
+    assert fitted['scale'] < 1 and fitted['file_size'] <= 30_000
+    assert os.path.getsize(tmp_path / 'fitted.jpg') == fitted['file_size']
+    with PILImage.open(tmp_path / 'fitted.jpg') as fitted_image:
+        assert fitted_image.size == (fitted['width'], fitted['height'])
+
+    assert fit_to_budget(source, str(tmp_path / 'none.jpg'), 10) is None
+
+
+def test_oversized_downloads_are_fitted_instead_of_skipped(sync_db, monkeypatch):
+    images = sync_db.query(Image).all()
+    content = noise_jpeg_bytes()
+    monkeypatch.setattr(download_utils, 'oversize_mode', 'fit')
+
+    with patch('utils.download_utils.requests.get', return_value=get_response(content)):
+        result = download_utils.download_image(images[0], 'assets/fit', max_kb=100)
+
+    assert result['file_size'] == os.path.getsize(result['file_path']) <= 100_000
+    assert result['source_file_size'] == len(content)
+    assert 40 <= result['fit_quality'] <= 90 and result['fit_scale'] <= 1
+    assert header_check(result['file_path'])
+
+    monkeypatch.setattr(download_utils, 'oversize_mode', 'skip')
+    with patch('utils.download_utils.requests.get', return_value=get_response(content)):
+        assert download_utils.download_image(images[1], 'assets/fit', max_kb=100) is None
+
+
+def test_downloads_are_transcoded_in_memory_and_written_once(sync_db, monkeypatch):
+    images = sync_db.query(Image).all()
+    monkeypatch.setattr(download_utils, 'transcode_format', 'webp')
+
+    with patch('utils.download_utils.requests.get', side_effect=get_by_url):
+        report = sync_downloads(images)
+    assert report.downloaded == 3
+
+    sync_db.expire_all()
+    img = sync_db.query(Image).filter(Image.source_id == '0').one()
+    assert img.extension == 'webp' and img.file_path.endswith('0.webp')
+    assert img.image_format == 'WEBP' and img.source_file_size == len(jpeg_bytes('red'))
+    assert sorted(os.listdir(os.path.dirname(img.file_path))) == ['0.webp', '1.webp', '2.webp']
+
+    webp = transcode(jpeg_bytes(), 'WEBP', 80)
+    assert transcode(webp['data'], 'WEBP', 80)['quality'] is None
+
+
+def test_deduplicated_downloads_keep_the_blobs_encoding(sync_db, monkeypatch, tmp_path):
+    img = sync_db.query(Image).filter(Image.source_id == '0').one()
+    content = noise_jpeg_bytes()
+    monkeypatch.setattr(download_utils, 'oversize_mode', 'fit')
+    with patch('utils.download_utils.requests.get', return_value=get_response(content)):
+        fitted = download_utils.download_image(img, str(tmp_path / 'fit'), max_kb=100)
+
+    with patch('utils.download_utils.requests.get') as mock_get:
+        again = download_utils.download_image(img, str(tmp_path / 'again'), max_kb=100)
+    mock_get.assert_not_called()
+    assert again['file_path'] == os.path.join(str(tmp_path / 'again'), '0.jpg')
+    assert {key: again[key] for key in ('file_sha256', 'fit_quality', 'fit_scale', 'source_file_size')} == \
+        {key: fitted[key] for key in ('file_sha256', 'fit_quality', 'fit_scale', 'source_file_size')}
+
+    # A WebP of the image is not what the store holds, so it is downloaded and encoded again
+    monkeypatch.setattr(download_utils, 'transcode_format', 'webp')
+    with patch('utils.download_utils.requests.get', return_value=get_response(jpeg_bytes())) as mock_get:
+        webp = download_utils.download_image(img, str(tmp_path / 'webp'), max_kb=100)
+    assert mock_get.call_count == 1
+    assert webp['extension'] == 'webp' and webp['source_file_size'] == len(jpeg_bytes())
+
+    monkeypatch.setattr(download_utils, 'transcode_format', 'none')
+    img.extension = 'jpg'
+    with patch('utils.download_utils.requests.get', return_value=get_response(jpeg_bytes())) as mock_get:
+        original = download_utils.download_image(img, str(tmp_path / 'original'), max_kb=100)
+    assert mock_get.call_count == 1
+    assert original['file_path'].endswith('0.jpg') and 'source_file_size' not in original
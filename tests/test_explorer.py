@@ -0,0 +1,44 @@
+import os
+
+from utils import common_utils
+from utils.common_utils import get_directory_listing
+from utils.env_constants import project_name
+
+
+def make_files(folder, count):
+    os.makedirs(folder, exist_ok=True)
+    for i in range(count):
+        with open(os.path.join(folder, f"{i:03}.jpg"), 'wb') as file:
+            file.write(b'x' * (i + 1))
+
+
+def test_list_directory_pages_with_counts(client, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    root = os.path.join('assets', project_name)
+    make_files(os.path.join(root, 'image_files', 'red_apple'), 5)
+    os.makedirs(os.path.join(root, 'database'))
+
+    data = client.get('/explorer/api/list').get_json()
+    assert [(e['name'], e['count']) for e in data['entries']] == [('database', 0), ('image_files', 1)]
+
+    data = client.get('/explorer/api/list?path=image_files/red_apple&offset=3&limit=10').get_json()
+    assert [e['name'] for e in data['entries']] == ['003.jpg', '004.jpg']
+    assert (data['total'], data['files'], data['bytes']) == (5, 5, 15)
+
+    assert client.get('/explorer/api/list?path=../..').status_code == 400
+    assert client.get('/explorer/api/list?path=missing').status_code == 404
+
+
+def test_listing_is_cached_until_the_directory_changes(monkeypatch, tmp_path):
+    folder = str(tmp_path / 'term')
+    make_files(folder, 2)
+    old = os.stat(folder).st_mtime_ns - 10 * common_utils.RACY_MTIME_NS
+    os.utime(folder, ns=(old, old))
+
+    first = get_directory_listing(folder)
+    monkeypatch.setattr(common_utils, '_scan_directory', lambda path: [])
+    assert get_directory_listing(folder) is first
+
+    monkeypatch.undo()
+    make_files(folder, 3)
+    assert len(get_directory_listing(folder)) == 3
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from core import leases
+from core.models import Image, ImageStatus, SearchTerm
+
+
+@pytest.fixture
+def lease_db(db_session, patch_get_db):
+    patch_get_db(leases)
+    db_session.add_all([SearchTerm(term=f"term {i}") for i in range(5)])
+    db_session.commit()
+    return db_session
+
+
+def test_claim_terms_is_exclusive(lease_db):
+    first = leases.claim_terms('alice', batch_size=3)
+    second = leases.claim_terms('bob', batch_size=3)
+
+    assert [t['term'] for t in first] == ['term 0', 'term 1', 'term 2']
+    assert [t['term'] for t in second] == ['term 3', 'term 4']
+    assert leases.claim_terms('carol', batch_size=3) == []
+
+
+def test_expired_lease_returns_to_pool(lease_db):
+    leases.claim_terms('alice', batch_size=2)
+    lease_db.query(SearchTerm).filter(SearchTerm.leased_by == 'alice').update(
+        {SearchTerm.lease_expires_at: datetime.utcnow() - timedelta(seconds=1)}
+    )
+    lease_db.commit()
+
+    assert leases.get_leased_terms('alice') == []
+    claimed = leases.claim_terms('bob', batch_size=2)
+    assert [t['term'] for t in claimed] == ['term 0', 'term 1']
+
+
+def test_claim_skips_done_terms(lease_db):
+    done_term = lease_db.query(SearchTerm).filter(SearchTerm.term == 'term 0').first()
+    lease_db.add(Image(source_id='1', source_api='pixabay', status=ImageStatus.APPROVED.value,
+                       search_term_id=done_term.id))
+    lease_db.commit()
+
+    claimed = leases.claim_terms('alice', batch_size=1)
+    assert [t['term'] for t in claimed] == ['term 1']
+
+
+def test_release_and_extend_lease(lease_db):
+    leases.claim_terms('alice', batch_size=2)
+
+    assert leases.extend_lease('alice', lease_seconds=60) == 2
+    assert leases.release_lease('alice') == 2
+    assert leases.get_leased_terms('alice') == []
+    assert len(leases.claim_terms('bob', batch_size=5)) == 5
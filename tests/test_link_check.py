@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.models import Image, ImageStatus
+from services import image_service, link_check_service
+from services.link_check_service import LinkScanJob, link_state, run_link_scan
+
+
+@pytest.fixture
+def link_db(db_session, patch_get_db, monkeypatch):
+    patch_get_db(link_check_service, image_service)
+    monkeypatch.setattr(link_check_service, 'link_check_host_rate', 0)
+    return db_session
+
+
+def head_response(status, headers=None):
+    return MagicMock(status_code=status, headers=headers or {})
+
+
+def test_link_state():
+    assert link_state(None) == 'unchecked'
+    assert link_state(304) == 'ok'
+    assert link_state(404) == 'dead'
+    assert link_state(503, failures=1) == 'error'
+    assert link_state(0, failures=3) == 'broken'
+
+
+def test_scan_records_status_and_sends_validators(link_db):
+    future = datetime.utcnow() + timedelta(days=1)
+    link_db.add_all([
+        Image(source_id='alive', source_api='pixabay', url_original='https://a.test/alive.jpg',
+              status=ImageStatus.APPROVED.value, link_etag='"v1"', link_next_check_at=datetime.utcnow()),
+        Image(source_id='gone', source_api='flickr', url_original='https://b.test/gone.jpg',
+              status=ImageStatus.APPROVED.value),
+        Image(source_id='later', source_api='flickr', url_original='https://b.test/later.jpg',
+              status=ImageStatus.APPROVED.value, link_next_check_at=future),
+    ])
+    link_db.commit()
+
+    def head(url, headers=None, **kwargs):
+        if 'alive' in url:
+            assert headers == {'If-None-Match': '"v1"'}
+            return head_response(304)
+        return head_response(404)
+
+    session = MagicMock()
+    session.head.side_effect = head
+    with patch.object(link_check_service, '_http_session', return_value=session):
+        job = LinkScanJob()
+        run_link_scan(job)
+
+    assert (job.status, job.checked, job.ok, job.dead) == ('finished', 2, 1, 1)
+    assert session.head.call_count == 2  # 'later' is not due yet
+
+    link_db.expire_all()
+    rows = {img.source_id: img for img in link_db.query(Image).all()}
+    assert rows['alive'].link_status == 304
+    assert rows['gone'].link_status == 404
+    assert rows['gone'].link_next_check_at > rows['alive'].link_next_check_at
+    assert rows['later'].link_status is None
+
+
+def test_scheduler_starts_once_per_process(monkeypatch):
+    monkeypatch.setattr(link_check_service, 'link_check_every_minutes', 60)
+    monkeypatch.setattr(link_check_service, '_scheduler_started', False)
+    with patch.object(link_check_service.threading, 'Thread') as thread:
+        link_check_service.start_link_scheduler()
+        link_check_service.start_link_scheduler()
+    assert thread.call_count == 1
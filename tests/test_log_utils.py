@@ -0,0 +1,65 @@
+import json
+import logging
+import queue
+import sys
+
+from utils.log_utils import (
+    DebugRateLimitFilter,
+    JsonFormatter,
+    LazyQueueHandler,
+    SizedTimedRotatingFileHandler,
+    formatter,
+)
+
+
+def _record(level=logging.DEBUG, msg="hot path", lineno=10):
+    return logging.LogRecord("test", level, "/app/routes/review.py", lineno, msg, None, None)
+
+
+def test_debug_rate_limit_filter():
+    rate_filter = DebugRateLimitFilter(rate=2)
+
+    allowed = [rate_filter.filter(_record()) for _ in range(5)]
+
+    assert allowed == [True, True, False, False, False]
+    assert rate_filter.filter(_record(lineno=11))
+    assert rate_filter.filter(_record(level=logging.INFO))
+
+
+def test_json_formatter():
+    payload = json.loads(JsonFormatter().format(_record(level=logging.INFO, msg="downloaded")))
+
+    assert payload['level'] == 'INFO'
+    assert payload['message'] == 'downloaded'
+    assert payload['line'] == 10
+
+
+def test_queued_records_keep_the_traceback_apart_from_the_message():
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        record = logging.LogRecord("test", logging.ERROR, "/app/routes/review.py", 10, "failed %s", ("id",),
+                                   sys.exc_info())
+
+    prepared = LazyQueueHandler(queue.SimpleQueue()).prepare(record)
+    payload = json.loads(JsonFormatter().format(prepared))
+
+    assert prepared.exc_info is None
+    assert payload['message'] == 'failed id'
+    assert payload['exc_info'].startswith('Traceback') and 'ZeroDivisionError' in payload['exc_info']
+    assert formatter.format(prepared).endswith(payload['exc_info'])
+
+
+def test_size_rollover_keeps_every_backup(tmp_path):
+    log_file = tmp_path / "logs" / "app.log"
+    handler = SizedTimedRotatingFileHandler(str(log_file), max_bytes=200, when='midnight', backupCount=10,
+                                            encoding='utf-8', delay=True)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+
+    for i in range(20):
+        handler.emit(_record(level=logging.INFO, msg=f"line {i} " + "x" * 40))
+    handler.close()
+
+    files = list((tmp_path / "logs").iterdir())
+    assert len(files) > 2
+    assert all(f.stat().st_size <= 200 for f in files)
@@ -0,0 +1,62 @@
+import os
+from unittest.mock import patch
+
+from PIL import Image as PILImage
+
+from core.models import Image, ImageStatus, SearchTerm
+from services import image_service, metadata_service
+from services.metadata_service import backfill_metadata, filter_by_dimensions
+from utils.env_constants import project_name
+from utils.image_utils import EXIF_ORIENTATION, read_image_header
+
+
+def save_jpeg(path, size, orientation=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    image = PILImage.new('RGB', size)
+    exif = image.getexif()
+    if orientation:
+        exif[EXIF_ORIENTATION] = orientation
+    image.save(path, 'JPEG', exif=exif)
+
+
+def test_read_image_header_applies_orientation(tmp_path):
+    path = str(tmp_path / 'rotated.jpg')
+    save_jpeg(path, (400, 300), orientation=6)
+
+    assert read_image_header(path) == {'width': 300, 'height': 400, 'color_mode': 'RGB',
+                                       'image_format': 'JPEG', 'orientation': 6}
+    assert read_image_header(str(tmp_path / 'missing.jpg')) is None
+
+
+def test_backfill_and_filter_in_sql(db_session, patch_get_db, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    patch_get_db(metadata_service, image_service)
+
+    term = SearchTerm(term='sky')
+    db_session.add(term)
+    db_session.flush()
+    for source_id, size in (('wide', (800, 400)), ('tall', (300, 600)), ('small', (100, 100))):
+        save_jpeg(f"assets/{project_name}/image_files/sky/{source_id}.jpg", size)
+        db_session.add(Image(source_id=source_id, source_api='pixabay', status=ImageStatus.APPROVED.value,
+                             search_term_id=term.id))
+    db_session.commit()
+
+    assert backfill_metadata(workers=2) == {'total': 3, 'updated': 3, 'missing': 0}
+    db_session.expire_all()
+
+    def ids(**filters):
+        return sorted(img.source_id for img in filter_by_dimensions(db_session.query(Image), **filters).all())
+
+    assert ids(min_width=300) == ['tall', 'wide']
+    assert ids(orientation='portrait') == ['tall']
+    assert ids(min_aspect=1.5) == ['wide']
+    assert backfill_metadata(workers=2)['total'] == 0
+
+
+def test_backfill_cli_command(app):
+    with patch('app.backfill_metadata', return_value={'total': 2, 'updated': 2, 'missing': 0}) as mock_backfill:
+        result = app.test_cli_runner().invoke(args=['backfill-metadata', '--workers', '4'])
+
+    assert result.exit_code == 0
+    assert 'Updated 2 of 2 images' in result.output
+    mock_backfill.assert_called_once_with(workers=4, force=False)
@@ -0,0 +1,45 @@
+from unittest.mock import patch
+
+from services.pixabay_service import PixabayService
+from utils.metrics_utils import Counter, Histogram, provider_call_duration
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram('test_latency_seconds', 'Test latency.', ('endpoint',), buckets=(0.1, 1.0))
+    histogram.observe(0.05, endpoint='a')
+    histogram.observe(0.5, endpoint='a')
+    histogram.observe(5, endpoint='a')
+
+    lines = histogram.render()
+
+    assert 'test_latency_seconds_bucket{endpoint="a",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{endpoint="a",le="1"} 2' in lines
+    assert 'test_latency_seconds_bucket{endpoint="a",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{endpoint="a"} 3' in lines
+
+
+def test_counter_escapes_label_values():
+    counter = Counter('test_errors_total', 'Test errors.', ('provider',))
+    counter.inc(provider='say "hi"')
+    counter.inc(2, provider='say "hi"')
+
+    assert 'test_errors_total{provider="say \\"hi\\""} 3' in counter.render()
+
+
+@patch.dict('os.environ', {'PIXABAY_API_KEY': ''})
+def test_provider_calls_are_timed():
+    before = provider_call_duration.count(provider='pixabay', method='search_images')
+
+    PixabayService().search_images("test")
+
+    assert provider_call_duration.count(provider='pixabay', method='search_images') == before + 1
+
+
+def test_metrics_endpoint(client):
+    client.get("/health")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    assert b'http_request_duration_seconds_bucket{endpoint="health_check",method="GET",status="200"' in response.data
+    assert b'http_request_db_queries_count{endpoint="health_check"}' in response.data
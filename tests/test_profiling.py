@@ -0,0 +1,70 @@
+import cProfile
+import pstats
+
+from utils import profile_utils
+
+
+def _work(n):
+    return sum(i * i for i in range(n))
+
+
+def test_collapsed_stacks_from_profile():
+    profiler = cProfile.Profile()
+    profiler.enable()
+    _work(50000)
+    profiler.disable()
+
+    lines = profile_utils.collapsed_stacks(pstats.Stats(profiler).stats)
+
+    assert lines
+    assert any('_work (test_profiling.py' in line for line in lines)
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+
+def test_sampled_request_is_listed(client, monkeypatch):
+    monkeypatch.setattr(profile_utils, 'profile_sample_rate', 1.0)
+
+    client.get("/health")
+    response = client.get("/admin/profiles")
+
+    assert response.status_code == 200
+    slow_requests = response.json['slow_requests']
+    assert any(r['endpoint'] == 'health_check' for r in slow_requests)
+    assert 'cumulative' in slow_requests[0]['top_functions']
+
+
+def test_memory_snapshot(client):
+    profile_utils.set_tracemalloc(True)
+    try:
+        response = client.post("/admin/memory/snapshot")
+    finally:
+        profile_utils.set_tracemalloc(False)
+
+    assert response.status_code == 200
+    assert 'cached_candidates' in response.json['report']
+
+
+def test_only_kept_profiles_stay_on_disk(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(profile_utils, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setattr(profile_utils, 'profile_sample_rate', 1.0)
+    monkeypatch.setattr(profile_utils, 'profile_slow_requests', 2)
+    monkeypatch.setattr(profile_utils, '_slow_requests', [])
+
+    for _ in range(5):
+        client.get("/health")
+
+    assert len(list(tmp_path.glob('*.pstats'))) == 2
+    assert len(list(tmp_path.glob('*.folded'))) == 2
+
+
+def test_only_baseline_and_latest_snapshots_stay_on_disk(monkeypatch, tmp_path):
+    monkeypatch.setattr(profile_utils, 'PROFILE_DIR', str(tmp_path))
+    profile_utils.set_tracemalloc(True)
+    try:
+        reports = [profile_utils.take_memory_snapshot() for _ in range(4)]
+        kept = sorted(p.name for p in tmp_path.glob('*.snapshot'))
+    finally:
+        profile_utils.set_tracemalloc(False)
+
+    assert kept == sorted([reports[0]['snapshot_file'], reports[-1]['snapshot_file']])
+    assert not list(tmp_path.glob('*.snapshot'))
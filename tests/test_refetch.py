@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.models import Image, ImageStatus
+from services import image_service, refetch_service
+from services.image_service import ImageCandidate, ImageService
+from utils.rate_limit_utils import TokenBucket
+
+
+class FakeService(ImageService):
+    api_name = 'fake'
+    supports_fetch = True
+
+    def __init__(self):
+        self.fetched = []
+
+    def fetch_image(self, id):
+        self.fetched.append(id)
+        if id == 'missing':
+            return None
+        return ImageCandidate(id=id, api='fake', url_original=f"https://img.test/{id}/new.jpg")
+
+
+@pytest.fixture
+def refetch_db(db_session, patch_get_db, monkeypatch):
+    patch_get_db(refetch_service, image_service)
+    monkeypatch.setattr(refetch_service, 'refetch_rate', 0)
+    monkeypatch.setattr(refetch_service, 'refetch_chunk_size', 2)
+    return db_session
+
+
+def test_refetch_updates_stale_rows_in_chunks(refetch_db):
+    fresh_at = datetime.utcnow()
+    refetch_db.add_all([
+        Image(source_id='a', source_api='fake', url_original='old', status=ImageStatus.APPROVED.value),
+        Image(source_id='b', source_api='fake', url_original='old', status=ImageStatus.APPROVED.value),
+        Image(source_id='c', source_api='fake', url_original='old', status=ImageStatus.APPROVED.value,
+              metadata_refreshed_at=fresh_at),
+        Image(source_id='missing', source_api='fake', url_original='old', status=ImageStatus.APPROVED.value),
+        Image(source_id='x', source_api='other', url_original='old', status=ImageStatus.APPROVED.value),
+    ])
+    refetch_db.commit()
+
+    service = FakeService()
+    job = refetch_service.RefetchJob(api='fake', stale_before=fresh_at - timedelta(days=1))
+    refetch_service.run_refetch(job, service)
+
+    assert job.status == 'finished'
+    assert sorted(service.fetched) == ['a', 'b', 'missing']
+    assert (job.total, job.updated, job.failed) == (3, 2, 1)
+
+    refetch_db.expire_all()
+    urls = dict(refetch_db.query(Image.source_id, Image.url_original).all())
+    assert urls == {'a': 'https://img.test/a/new.jpg', 'b': 'https://img.test/b/new.jpg',
+                    'c': 'old', 'missing': 'old', 'x': 'old'}
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=1000, burst=2)
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    bucket.acquire()  # waits roughly a millisecond for the next token
@@ -0,0 +1,110 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from routes import review
+from services.image_service import ImageCandidate, ImageService, ProviderError
+from services.pixabay_service import PixabayService
+from utils.resilience_utils import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, hedged_call
+
+
+def failing_call():
+    raise requests.ConnectionError("down")
+
+
+def test_breaker_opens_and_fails_fast():
+    breaker = CircuitBreaker('test', failure_threshold=2, recovery_seconds=60)
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            breaker.call(failing_call)
+
+    assert breaker.state == OPEN
+    fn = MagicMock()
+    with pytest.raises(CircuitOpenError):
+        breaker.call(fn)
+    fn.assert_not_called()
+
+
+def test_breaker_half_open_probe_closes_circuit():
+    breaker = CircuitBreaker('test', failure_threshold=1, recovery_seconds=0)
+    with pytest.raises(requests.ConnectionError):
+        breaker.call(failing_call)
+    assert breaker.state == OPEN
+
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()  # only one probe at a time
+
+    breaker.record_success(0.01)
+    assert breaker.state == CLOSED
+
+
+def test_breaker_counts_latency_budget_overruns():
+    breaker = CircuitBreaker('test', failure_threshold=1, latency_budget=0.01)
+    breaker.call(lambda: time.sleep(0.02))
+    assert breaker.state == OPEN
+
+
+def test_hedged_call_returns_faster_attempt():
+    calls = []
+
+    def fn():
+        calls.append(None)
+        if len(calls) == 1:
+            time.sleep(0.5)
+            return 'slow'
+        return 'fast'
+
+    start = time.perf_counter()
+    assert hedged_call(fn, delay=0.05) == 'fast'
+    assert time.perf_counter() - start < 0.4
+
+
+@patch('services.pixabay_service.requests.get')
+def test_provider_5xx_opens_circuit(mock_get):
+    mock_get.return_value = MagicMock(spec=requests.Response, status_code=503)
+    mock_get.return_value.raise_for_status.side_effect = requests.HTTPError("503")
+    service = PixabayService()
+    service.api_key, service.api_url = 'key', 'http://pixabay.test'
+
+    for _ in range(service.breaker.failure_threshold):
+        with pytest.raises(ProviderError):
+            service.search_images('cat')
+    with pytest.raises(CircuitOpenError):
+        service.search_images('cat')
+    assert mock_get.call_count == service.breaker.failure_threshold
+
+
+def test_review_falls_back_when_provider_is_down():
+    cached = [ImageCandidate(id='1', api='pexels')]
+    fallback = [ImageCandidate(id='2', api='pixabay')]
+
+    def search(api, term):
+        return {'pixabay': fallback}.get(api)
+
+    with patch.object(review, '_search_provider', side_effect=search), \
+            patch.object(review, 'provider_fallback_order', ['pixabay']):
+        assert review.search_with_fallback('cat', 'pexels') == fallback
+
+        review._remember_results('pexels', 'cat', cached)
+        assert review.search_with_fallback('cat', 'pexels') == cached
+
+
+def test_failed_search_falls_back_even_if_another_call_succeeded_meanwhile():
+    class Failing(ImageService):
+        api_name = 'failing'
+
+        def search_images(self, term, page=1, per_page=15):
+            self.breaker.record_success(0.0)  # another thread's call to the provider went through
+            raise ProviderError('down')
+
+    fallback = [ImageCandidate(id='2', api='pixabay')]
+    backup = MagicMock(spec=ImageService, breaker=CircuitBreaker('pixabay'))
+    backup.search_images.return_value = fallback
+    services = {'failing': Failing(), 'pixabay': backup}
+
+    with patch.object(review.ImageServiceFactory, 'get_service', side_effect=services.get), \
+            patch.object(review, 'provider_fallback_order', ['pixabay']):
+        assert review.search_with_fallback('dog', 'failing') == fallback
@@ -0,0 +1,150 @@
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+
+from core import search_index
+from core.models import Image, ImageStatus, SearchTerm
+from core.search_index import to_match_query
+from core.session import session
+from factory.image_service_factory import ImageServiceFactory
+from routes import review
+from services.image_service import ImageCandidate
+
+
+@pytest.fixture
+def search_db(db_session, patch_get_db):
+    patch_get_db(search_index)
+    apple, sky = SearchTerm(term='red apple'), SearchTerm(term='blue sky')
+    db_session.add_all([apple, sky])
+    db_session.flush()
+    db_session.add_all([
+        Image(source_id='1', source_api='pixabay', tags='fruit, orchard', status=ImageStatus.APPROVED.value,
+              search_term_id=apple.id),
+        Image(source_id='2', source_api='unsplash', description='clouds over an apple orchard',
+              status=ImageStatus.APPROVED.value, search_term_id=sky.id),
+        Image(source_id='3', source_api='pixabay', tags='apple', status=ImageStatus.REJECTED.value,
+              search_term_id=apple.id),
+    ])
+    db_session.commit()
+    return db_session
+
+
+def ids(client, query, **params):
+    data = client.get('/api/search', query_string={'q': query, **params}).get_json()
+    return [row['source_id'] for row in data['results']], data['has_more']
+
+
+def test_to_match_query_quotes_words_and_prefixes_the_last():
+    assert to_match_query('Red AND app-') == '"red" "and" "app"*'
+    assert to_match_query('apple a') == '"apple" "a"'
+    assert to_match_query(' "* ') is None
+
+
+def test_search_ranks_term_matches_first_and_pages(client, search_db):
+    assert ids(client, 'appl') == (['1', '2'], False)
+    assert ids(client, 'orchard', per_page=1) == (['1'], True)
+    assert ids(client, 'orchard', per_page=1, page=2) == (['2'], False)
+    assert ids(client, 'nothing') == ([], False)
+
+
+def test_index_follows_updates_and_deletes(client, search_db):
+    term = search_db.query(SearchTerm).filter(SearchTerm.term == 'blue sky').one()
+    term.term = 'grey sky'
+    image = search_db.query(Image).filter(Image.source_id == '1').one()
+    image.tags = 'tree'
+    search_db.commit()
+
+    assert ids(client, 'grey') == (['2'], False)
+    assert ids(client, 'tree') == (['1'], False)
+
+    search_db.delete(image)
+    search_db.commit()
+    assert ids(client, 'red apple') == ([], False)
+
+
+def test_only_approved_images_are_indexed(client, search_db, monkeypatch):
+    term = SearchTerm(term='dog')
+    search_db.add(term)
+    search_db.flush()
+    # Enough rejected matches to fill the ranking window many times over
+    search_db.bulk_insert_mappings(Image, [
+        {'source_id': f"r{i}", 'source_api': 'pixabay', 'status': ImageStatus.REJECTED.value,
+         'search_term_id': term.id}
+        for i in range(6000)
+    ])
+    search_db.add(Image(source_id='dog', source_api='pixabay', status=ImageStatus.APPROVED.value,
+                        search_term_id=term.id))
+    search_db.commit()
+    assert ids(client, 'dog') == (['dog'], False)
+
+    rejected = search_db.query(Image).filter(Image.source_id == '3').one()
+    rejected.status = ImageStatus.APPROVED.value
+    approved = search_db.query(Image).filter(Image.source_id == '1').one()
+    approved.status = ImageStatus.REJECTED.value
+    search_db.commit()
+    assert ids(client, 'apple') == (['3', '2'], False)
+
+    monkeypatch.setattr(search_index, 'RANK_WINDOW', 1)
+    data = client.get('/api/search', query_string={'q': 'apple'}).get_json()
+    assert (len(data['results']), data['truncated']) == (1, True)
+    assert client.get('/api/search', query_string={'q': 'dog'}).get_json()['truncated'] is False
+
+
+def events(response) -> list[tuple[str, dict]]:
+    parsed = []
+    for block in response.get_data(as_text=True).strip().split('\n\n'):
+        name, data = block.split('\n')
+        parsed.append((name.removeprefix('event: '), json.loads(data.removeprefix('data: '))))
+    return parsed
+
+
+def fake_search(api, term):
+    if api == 'down':
+        return None
+    if api == 'slow':
+        time.sleep(0.3)
+    return [ImageCandidate(id=f"{api}-{i}", api=api, url=f"https://img.test/{api}/{i}.jpg") for i in range(2)]
+
+
+@pytest.fixture
+def stream_providers(monkeypatch):
+    monkeypatch.setattr(ImageServiceFactory, 'available_services', classmethod(lambda cls: ['slow', 'fast', 'down']))
+    with patch.object(review, '_search_provider', side_effect=fake_search) as search:
+        yield search
+
+
+def test_stream_sends_each_provider_as_it_answers(client, stream_providers):
+    response = client.get('/api/search/stream', query_string={'term': 'cat', 'providers': 'slow,fast,down'})
+
+    assert response.mimetype == 'text/event-stream'
+    received = events(response)
+    assert [(name, data.get('provider')) for name, data in received] == [
+        ('results', 'fast'), ('provider_error', 'down'), ('results', 'slow'), ('done', None)]
+    assert [c['id'] for c in received[0][1]['results']] == ['fast-0', 'fast-1']
+    assert received[-1][1]['total'] == 4
+    assert received[-1][1]['providers']['down']['status'] == 'failed'
+
+    assert client.get('/api/search/stream', query_string={'term': 'cat', 'providers': 'nope'}).status_code == 400
+    assert client.get('/api/search/stream', query_string={'providers': 'fast'}).status_code == 400
+
+
+def test_review_page_streams_candidates_into_the_queue(client, db_session, patch_get_db, monkeypatch,
+                                                       stream_providers):
+    patch_get_db(review)
+    monkeypatch.setattr(review, 'provider_fallback_order', ['slow', 'fast'])
+    monkeypatch.setattr(session, 'current_api', 'slow')
+    monkeypatch.setattr(session, 'photos_cache', {})
+    monkeypatch.setattr(session, 'term_idx', 0)
+    monkeypatch.setattr(session, 'photo_idx', 0)
+    db_session.add(SearchTerm(term='cat'))
+    db_session.commit()
+
+    page = client.get('/review').get_data(as_text=True)
+    assert 'EventSource("/api/search/stream?term=cat\\u0026providers=slow,fast\\u0026review=1")' in page
+    stream_providers.assert_not_called()
+
+    events(client.get('/api/search/stream', query_string={'term': 'cat', 'providers': 'slow,fast', 'review': 1}))
+    assert [photo.id for photo in session.photos_cache[0]] == ['fast-0', 'fast-1', 'slow-0', 'slow-1']
+    assert 'https://img.test/fast/0.jpg' in client.get('/review').get_data(as_text=True)
@@ -1,27 +1,109 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock, patch
 
+from services.image_service import ImageCandidate
 from services.pexels_service import PexelsService
+from services.pixabay_service import PixabayService
+from services.unsplash_service import UnsplashService
+from utils.common_utils import read_json_file
+
+PEXELS_PHOTO = {
+    "id": 123,
+    "width": 4000,
+    "height": 3000,
+    "url": "https://www.pexels.com/photo/test-123/",
+    "src": {
+        "original": "https://images.pexels.com/photos/123/test.jpeg",
+        "large2x": "https://images.pexels.com/photos/123/test.jpeg?w=1880",
+        "tiny": "https://images.pexels.com/photos/123/test.jpeg?h=200"
+    }
+}
 
 
 @patch.dict('os.environ', {'PEXELS_API_KEY': 'dummy_key'})
-@patch('services.pexels_service.API')
-def test_pexels_search(mock_api_cls):
-    # Setup mock
-    mock_api = MagicMock()
-    mock_api_cls.return_value = mock_api
-
-    # Mock search results
-    mock_photo = MagicMock()
-    mock_photo.id = 123
-    mock_api.get_entries.return_value = [mock_photo]
-
-    # Init service
-    service = PexelsService()
+@patch('services.pexels_service.requests.get')
+def test_pexels_search(mock_get):
+    mock_get.return_value = MagicMock(status_code=200)
+    mock_get.return_value.json.return_value = {"photos": [PEXELS_PHOTO]}
 
-    # Test search
+    service = PexelsService()
     results = service.search_images("test", page=1, per_page=10)
 
-    # Verify
-    mock_api.search.assert_called_with("test", page=1, results_per_page=10)
+    args, kwargs = mock_get.call_args
+    assert args[0] == "https://api.pexels.com/v1/search"
+    assert kwargs['params'] == {'query': 'test', 'page': 1, 'per_page': 10}
+    assert kwargs['headers'] == {'Authorization': 'dummy_key'}
     assert len(results) == 1
-    assert results[0].id == 123
+    assert results[0].id == "123"
+    assert results[0].url.endswith("?w=1880")
+    assert results[0].extension == "jpeg"
+
+
+@patch.dict('os.environ', {'PEXELS_API_KEY': 'dummy_key'})
+@patch('services.pexels_service.requests.get')
+def test_pexels_fetch_image(mock_get):
+    mock_get.return_value = MagicMock(status_code=200)
+    mock_get.return_value.json.return_value = PEXELS_PHOTO
+
+    candidate = PexelsService().fetch_image(123)
+
+    assert mock_get.call_args[0][0] == "https://api.pexels.com/v1/photos/123"
+    assert candidate.url_original == "https://images.pexels.com/photos/123/test.jpeg"
+
+
+@patch.dict('os.environ', {'PEXELS_API_KEY': 'dummy_key'})
+@patch('services.pexels_service.requests.get')
+def test_pexels_concurrent_searches_keep_their_own_results(mock_get):
+    def respond(url, params=None, **kwargs):
+        time.sleep(0.01)
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"photos": [{**PEXELS_PHOTO, "id": params['query']}]}
+        return response
+
+    mock_get.side_effect = respond
+    service = PexelsService()
+    terms = [f"term-{i}" for i in range(16)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda term: service.search_images(term), terms))
+
+    assert [photos[0].id for photos in results] == terms
+
+
+def test_pixabay_json_to_image():
+    item = read_json_file("examples/pixabay_api_response.json")['hits'][0]
+
+    candidate = PixabayService().json_to_image(item)
+
+    assert isinstance(candidate, ImageCandidate)
+    assert not hasattr(candidate, '__dict__')
+    assert candidate.id == "195893"
+    assert candidate.api == "pixabay"
+    assert candidate.url == item['largeImageURL']
+    assert candidate.url_thumbnail == item['previewURL']
+    assert (candidate.width, candidate.height, candidate.size) == (4000, 2250, 4731420)
+
+
+def test_unsplash_json_to_image():
+    item = {
+        "id": "abc",
+        "width": 3000,
+        "height": 2000,
+        "urls": {
+            "full": "https://images.unsplash.com/photo-1?fm=png&q=85&ixid=XYZ",
+            "small": "https://images.unsplash.com/photo-1?w=400"
+        },
+        "links": {
+            "html": "https://unsplash.com/photos/abc",
+            "download": "https://unsplash.com/photos/abc/download"
+        },
+        "user": {"id": "u1", "username": "someone"}
+    }
+
+    candidate = UnsplashService().json_to_image(item)
+
+    assert candidate.url == "https://images.unsplash.com/photo-1?fm=png&q=85"
+    assert candidate.url_original == "https://unsplash.com/photos/abc/download"
+    assert candidate.url_page == "https://unsplash.com/photos/abc"
+    assert candidate.extension == "png"
@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous enough for slow CI runners; importing app used to also build every provider and the database
+COLD_START_BUDGET_SECONDS = 3.0
+LAZY_MODULES = ('bs4', 'services.pexels_service', 'services.pixabay_service',
+                'services.unsplash_service', 'services.flickr_service')
+
+IMPORT_SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def test_import_app_is_fast_and_side_effect_free(tmp_path):
+    env = {**os.environ, 'PYTHONPATH': PROJECT_ROOT}
+    result = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, check=True)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert report['loaded'] == []
+    assert report['elapsed'] < COLD_START_BUDGET_SECONDS
+    assert not (tmp_path / 'assets').exists()
+
+
+def test_services_are_built_on_first_use():
+    from factory.image_service_factory import ImageServiceFactory
+
+    ImageServiceFactory._services.pop('pixabay', None)
+    assert 'pixabay' in ImageServiceFactory.available_services()
+
+    service = ImageServiceFactory.get_service('Pixabay')
+
+    assert service.api_name == 'pixabay'
+    assert ImageServiceFactory.get_service('pixabay') is service
@@ -0,0 +1,86 @@
+import io
+import os
+import time
+
+import pytest
+
+from core.models import Image, ImageStatus, ImageVariant, SearchTerm
+from routes import setup
+from services import term_import_service, variant_service
+from services.term_import_service import import_terms, iter_terms
+from services.variant_service import VariantSpec, variant_path
+from utils.blob_store import BlobStore
+from utils.env_constants import project_name
+
+
+@pytest.fixture
+def import_db(db_session, patch_get_db):
+    patch_get_db(term_import_service, setup, variant_service)
+    return db_session
+
+
+def test_import_keeps_unchanged_terms_and_their_images(import_db):
+    terms = [SearchTerm(term=term) for term in ('apple', 'pear', 'plum')]
+    import_db.add_all(terms)
+    import_db.flush()
+    kept = Image(source_id='1', source_api='pixabay', status=ImageStatus.APPROVED.value, search_term_id=terms[1].id)
+    import_db.add_all([kept, Image(source_id='2', source_api='pixabay', search_term_id=terms[0].id)])
+    import_db.commit()
+
+    report = import_terms(['pear', 'kiwi', 'plum', 'kiwi', 'fig'])
+
+    assert report.to_dict() == {'received': 4, 'added': 2, 'removed': 1, 'unchanged': 2}
+    import_db.expire_all()
+    assert [t.term for t in import_db.query(SearchTerm).order_by(SearchTerm.id)] == ['pear', 'plum', 'kiwi', 'fig']
+    assert [img.source_id for img in import_db.query(Image)] == ['1']
+    assert import_db.get(SearchTerm, terms[1].id).images[0].status == ImageStatus.APPROVED.value
+
+
+def test_iter_terms_reads_csv_first_column():
+    stream = io.BytesIO('﻿term,notes\nred apple,fruit\n\n  blue sky ,\n'.encode())
+    assert list(iter_terms(stream, 'terms.csv')) == ['red apple', 'blue sky']
+
+
+def test_upload_imports_a_large_list_quickly(client, import_db):
+    content = ''.join(f"term {i}\n" for i in range(100_000)).encode()
+
+    start = time.perf_counter()
+    response = client.post('/setup', data={'terms_file': (io.BytesIO(content), 'terms.txt')},
+                           content_type='multipart/form-data')
+    elapsed = time.perf_counter() - start
+
+    assert response.status_code == 302
+    assert import_db.query(SearchTerm).count() == 100_000
+    assert elapsed < 10
+    assert client.get('/setup').status_code == 200
+
+
+def test_dropped_terms_release_their_files(import_db, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    store = BlobStore(str(tmp_path / 'blobs'))
+    monkeypatch.setattr(term_import_service, 'blob_store', store)
+
+    term = SearchTerm(term='apple')
+    import_db.add(term)
+    import_db.flush()
+    folder = f"assets/{project_name}/image_files/apple"
+    os.makedirs(folder)
+    (tmp_path / 'download.part').write_bytes(b'photo')
+    store.put(str(tmp_path / 'download.part'), 'ab' * 32)
+    store.link('ab' * 32, f"{folder}/1.jpg")
+    (tmp_path / folder / 'stray.jpg').write_bytes(b'stray')
+    rendition = variant_path('ab' * 32, VariantSpec('thumb', 256))
+    os.makedirs(os.path.dirname(rendition))
+    open(rendition, 'wb').close()
+    image = Image(source_id='1', source_api='pixabay', file_path=f"{folder}/1.jpg", file_sha256='ab' * 32,
+                  search_term_id=term.id)
+    image.variants.append(ImageVariant(name='thumb', path=rendition, source_sha256='ab' * 32))
+    import_db.add(image)
+    import_db.commit()
+
+    assert import_terms(['pear']).removed == 1
+
+    assert not store.has_blob('ab' * 32)
+    assert store.stats()['references'] == 0
+    assert not os.path.exists(folder)
+    assert not os.path.exists(rendition)
@@ -0,0 +1,133 @@
+import os
+from threading import Event, current_thread
+
+from PIL import Image as PILImage
+
+from core.models import Image, ImageStatus, ImageVariant, SearchTerm
+from routes import explorer, gallery, review
+from services import variant_service
+from services.variant_service import VariantSpec, generate_variants, parse_variant_specs, render_variants
+from utils import executor_utils
+from utils.env_constants import project_name
+from utils.image_utils import EXIF_ORIENTATION
+
+
+def save_jpeg(path, size, color='red', orientation=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    image = PILImage.new('RGB', size, color)
+    exif = image.getexif()
+    if orientation:
+        exif[EXIF_ORIENTATION] = orientation
+    image.save(path, 'JPEG', exif=exif)
+
+
+def test_parse_variant_specs_orders_largest_first():
+    assert parse_variant_specs(['thumb:256', 'preview:1024:jpg', 'bad', 'odd:12:tiff']) == [
+        VariantSpec('preview', 1024, 'JPEG'),
+        VariantSpec('thumb', 256, 'WEBP'),
+    ]
+
+
+def test_render_variants_downscales_and_applies_orientation(tmp_path):
+    source = str(tmp_path / 'original.jpg')
+    save_jpeg(source, (3000, 2000), orientation=6)
+    jobs = [(VariantSpec('thumb', 256), str(tmp_path / 'thumb.webp')),
+            (VariantSpec('preview', 1024, 'JPEG'), str(tmp_path / 'preview.jpg'))]
+
+    results = render_variants(source, jobs, quality=80)
+
+    assert (results['preview']['width'], results['preview']['height']) == (683, 1024)
+    assert (results['thumb']['width'], results['thumb']['height']) == (171, 256)
+    with PILImage.open(tmp_path / 'thumb.webp') as thumb:
+        assert (thumb.format, thumb.size) == ('WEBP', (171, 256))
+
+
+def test_generate_variants_rebuilds_only_changed_originals(db_session, patch_get_db, monkeypatch, tmp_path,
+                                                           client):
+    monkeypatch.chdir(tmp_path)
+    patch_get_db(variant_service, gallery)
+
+    term = SearchTerm(term='sky')
+    db_session.add(term)
+    db_session.flush()
+    path = f"assets/{project_name}/image_files/sky/1.jpg"
+    save_jpeg(path, (1200, 800))
+    image = Image(source_id='1', source_api='pixabay', file_path=path, file_sha256='a' * 64,
+                  url_thumbnail='https://img.test/1_thumb.jpg', status=ImageStatus.APPROVED.value,
+                  search_term_id=term.id)
+    db_session.add(image)
+    db_session.commit()
+
+    assert generate_variants() == {'total': 1, 'generated': 2, 'up_to_date': 0, 'failed': 0}
+    assert generate_variants() == {'total': 1, 'generated': 0, 'up_to_date': 2, 'failed': 0}
+    old_thumb = db_session.query(ImageVariant).filter(ImageVariant.name == 'thumb').one().path
+    assert os.path.exists(old_thumb)
+
+    response = client.get(f"/variants/{image.id}/thumb")
+    assert response.status_code == 200
+    assert response.mimetype == 'image/webp'
+    response.close()
+    assert client.get(f"/variants/{image.id}/missing").headers['Location'] == 'https://img.test/1_thumb.jpg'
+
+    save_jpeg(path, (1200, 800), color='blue')
+    image.file_sha256 = 'b' * 64
+    db_session.commit()
+
+    assert generate_variants([image.id])['generated'] == 2
+    thumb = db_session.query(ImageVariant).filter(ImageVariant.name == 'thumb').one()
+    assert (thumb.source_sha256, thumb.width, thumb.height) == ('b' * 64, 256, 171)
+    assert not os.path.exists(old_thumb)
+
+
+def test_deleting_images_removes_their_variants(db_session, patch_get_db, monkeypatch, tmp_path, client):
+    monkeypatch.chdir(tmp_path)
+    patch_get_db(variant_service, gallery, explorer)
+
+    sky, sea = SearchTerm(term='sky'), SearchTerm(term='sea')
+    db_session.add_all([sky, sea])
+    db_session.flush()
+    images = []
+    # The same photo under two terms shares its renditions
+    for source_id, term, sha256 in (('1', sky, 'a' * 64), ('2', sea, 'a' * 64), ('3', sea, 'c' * 64)):
+        path = f"assets/{project_name}/image_files/{term.term}/{source_id}.jpg"
+        save_jpeg(path, (1200, 800))
+        images.append(Image(source_id=source_id, source_api='pixabay', file_path=path, file_sha256=sha256,
+                            extension='jpg', status=ImageStatus.APPROVED.value, search_term_id=term.id))
+    db_session.add_all(images)
+    db_session.commit()
+    assert generate_variants()['generated'] == 6
+    shared = [variant.path for variant in images[0].variants]
+
+    client.post('/delete-image', data={'term': 'sky', 'imageID': '1', 'api': 'pixabay', 'extension': 'jpg'})
+    assert all(os.path.exists(path) for path in shared)
+    client.post('/delete-image', data={'term': 'sea', 'imageID': '2', 'api': 'pixabay', 'extension': 'jpg'})
+    assert not any(os.path.exists(path) for path in shared)
+
+    other = [variant.path for variant in images[2].variants]
+    assert client.post('/explorer/actions/delete-images').json['status'] == 'success'
+    assert db_session.query(ImageVariant).count() == 0
+    assert not any(os.path.exists(path) for path in other)
+
+
+def test_downloads_build_variants_in_the_background(patch_get_db, monkeypatch, client):
+    started, release, threads = Event(), Event(), []
+
+    def slow_generate(image_ids):
+        threads.append(current_thread().name)
+        started.set()
+        release.wait(5)
+
+    patch_get_db(review)
+    monkeypatch.setattr(review, 'sync_downloads', lambda images, revalidate: None)
+    monkeypatch.setattr(variant_service, 'generate_variants', slow_generate)
+
+    response = client.post('/download-all-images')
+    assert response.status_code == 302
+    assert started.wait(5)
+    release.set()
+    assert threads == ['variants']
+
+
+def test_cpu_pool_spawns_its_workers():
+    # Forking a process that runs the log listener and thread pools can copy a held lock into the child
+    assert executor_utils.get_cpu_executor()._mp_context.get_start_method() == 'spawn'
@@ -1,9 +1,32 @@
+import time
 from unittest.mock import MagicMock, patch
 
-from services.wger_service import WgerImage, WgerService
+import pytest
 
+from core.models import SearchTerm
+from factory.image_service_factory import ImageServiceFactory
+from services import image_service, wger_service
+from services.image_service import ImageCandidate, ProviderError
+from services.wger_service import WgerService
 
-@patch('services.wger_service.requests.get')
+
+@pytest.fixture(autouse=True)
+def image_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(wger_service, 'WGER_IMAGE_CACHE', str(tmp_path / 'wger_images.sqlite3'))
+
+
+def suggestion(id, base_id, image=None):
+    return {"value": f"Exercise {id}", "data": {"id": id, "baseId": base_id, "name": f"Exercise {id}",
+                                                 "category": "Arms", "image": image, "image_thumbnail": None}}
+
+
+def json_response(data):
+    response = MagicMock()
+    response.json.return_value = data
+    return response
+
+
+@patch('services.image_service.requests.get')
 def test_wger_search_images(mock_get):
     # Setup mock
     mock_response = MagicMock()
@@ -16,7 +39,7 @@ def test_wger_search_images(mock_get):
                     "baseId": 55,
                     "name": "Bench Press",
                     "category": "Chest",
-                    "image": "media/exercise-images/101.jpg",
+                    "image": "/media/exercise-images/101.jpg",
                     "image_thumbnail": "media/exercise-images/101-thumb.jpg"
                 }
             }
@@ -33,10 +56,13 @@ def test_wger_search_images(mock_get):
     # Verify
     assert len(results) == 1
     item = results[0]
-    assert isinstance(item, WgerImage)
-    assert item.id == 101
-    assert item.name == "Bench Press"
-    assert "https://wger.de/media/exercise-images/101.jpg" in item.image
+    assert isinstance(item, ImageCandidate)
+    assert item.id == '55'
+    assert item.description == "Bench Press"
+    assert item.url_original == "https://wger.de/media/exercise-images/101.jpg"
+    assert item.url_thumbnail == "https://wger.de/media/exercise-images/101-thumb.jpg"
+    assert item.url_page == "https://wger.de/exercise/55/"
+    assert mock_get.call_count == 1
 
     # Verify URL construction
     args, kwargs = mock_get.call_args
@@ -44,7 +70,7 @@ def test_wger_search_images(mock_get):
     assert "limit=10" in args[0]
 
 
-@patch('services.wger_service.requests.get')
+@patch('services.image_service.requests.get')
 def test_wger_search_images_empty(mock_get):
     mock_response = MagicMock()
     mock_response.json.return_value = {"suggestions": []}
@@ -55,10 +81,63 @@ def test_wger_search_images_empty(mock_get):
     assert results == []
 
 
-@patch('services.wger_service.requests.get')
+@patch('services.image_service.requests.get')
 def test_wger_search_error(mock_get):
     mock_get.side_effect = Exception("API Error")
 
     service = WgerService()
-    results = service.search_images("error")
-    assert results == []
+    with pytest.raises(ProviderError):
+        service.search_images("error")
+
+
+@patch('services.image_service.requests.get')
+def test_wger_resolves_missing_images_concurrently_and_caches_them(mock_get, db_session, patch_get_db):
+    suggestions = [suggestion(i, 100 + i) for i in range(5)] + [suggestion(9, 109, "/media/9.png")]
+
+    def get(url, params=None, **kwargs):
+        if 'exercise/search' in url:
+            return json_response({"suggestions": suggestions})
+        time.sleep(0.2)
+        exercise = params['exercise']
+        if exercise == 104:
+            return json_response({"results": []})
+        return json_response({"results": [{"image": f"https://wger.de/media/{exercise}-side.jpg", "is_main": False},
+                                          {"image": f"https://wger.de/media/{exercise}.png", "is_main": True}]})
+
+    mock_get.side_effect = get
+    start = time.perf_counter()
+    results = WgerService().search_images("curl")
+
+    # One search plus one concurrent round of lookups, not one lookup after another
+    assert time.perf_counter() - start < 0.6
+    assert mock_get.call_count == 1 + 5
+    assert [(c.id, c.url_original, c.url_page) for c in results] == [
+        ('100', 'https://wger.de/media/100.png', 'https://wger.de/exercise/100/'),
+        ('101', 'https://wger.de/media/101.png', 'https://wger.de/exercise/101/'),
+        ('102', 'https://wger.de/media/102.png', 'https://wger.de/exercise/102/'),
+        ('103', 'https://wger.de/media/103.png', 'https://wger.de/exercise/103/'),
+        ('109', 'https://wger.de/media/9.png', 'https://wger.de/exercise/109/'),
+    ]
+
+    patch_get_db(image_service)
+    db_session.add(SearchTerm(term='curl'))
+    db_session.commit()
+    stored = WgerService().add_image_to_db('curl', results[1], 'wger')
+
+    # A new instance (as after a restart) answers from the disk cache, including the exercise without an image
+    mock_get.reset_mock()
+    service = WgerService()
+    assert len(service.search_images("curl")) == 5
+    assert mock_get.call_count == 1
+    fetched = service.fetch_image(stored.source_id)
+    assert (fetched.id, fetched.url_original, fetched.url_page) == (stored.source_id, stored.url_original,
+                                                                    stored.url_page)
+    assert service.fetch_image(109).url_original == 'https://wger.de/media/9.png'
+    assert service.fetch_image(104) is None
+    assert mock_get.call_count == 1
+
+
+def test_wger_is_registered(monkeypatch):
+    monkeypatch.setattr(ImageServiceFactory, '_services', {})
+    assert 'wger' in ImageServiceFactory.available_services()
+    assert isinstance(ImageServiceFactory.get_service('wger'), WgerService)
@@ -0,0 +1,209 @@
+import os
+import shutil
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from threading import Lock
+from typing import Optional
+
+from utils.env_constants import blob_store_dir, project_name
+from utils.log_utils import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blob_refs (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL REFERENCES blobs(sha256),
+    project TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_blob_refs_sha256 ON blob_refs(sha256);
+CREATE INDEX IF NOT EXISTS ix_blob_refs_project ON blob_refs(project);
+CREATE TABLE IF NOT EXISTS blob_sources (
+    source_api TEXT NOT NULL,
+    source_id TEXT NOT NULL,
+    sha256 TEXT NOT NULL REFERENCES blobs(sha256),
+    extension TEXT,
+    fit_quality INTEGER,
+    fit_scale REAL,
+    source_file_size INTEGER,
+    PRIMARY KEY (source_api, source_id)
+);
+"""
+# How the blob of a provider image was encoded, added after blob_sources first shipped
+ENCODING_COLUMNS = {'extension': 'TEXT', 'fit_quality': 'INTEGER', 'fit_scale': 'REAL', 'source_file_size': 'INTEGER'}
+
+
+class BlobStore:
+    """
+    Content-addressed files under `root`, keyed by SHA-256 and shared by every project. The per-term folders hold
+    hardlinks (symlinks, or copies, where hardlinks aren't possible) to the blobs. The SQLite index lives next to
+    the blobs rather than in a project database, since blobs outlive any single project: it reference counts the
+    linked paths and remembers which provider image produced which blob, so a repeat never hits the network.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.index_path = os.path.join(root, 'index.sqlite3')
+        self._lock = Lock()
+        self._initialized_index = None
+
+    @contextmanager
+    def _connect(self):
+        with self._lock:
+            # Relative roots resolve against the working directory, so remember which index got the schema
+            index_path = os.path.abspath(self.index_path)
+            initialize = self._initialized_index != index_path
+            if initialize:
+                os.makedirs(self.root, exist_ok=True)
+            connection = sqlite3.connect(index_path, timeout=30)
+            try:
+                if initialize:
+                    connection.execute('PRAGMA journal_mode=WAL')
+                    connection.executescript(SCHEMA)
+                    columns = {row[1] for row in connection.execute('PRAGMA table_info(blob_sources)')}
+                    for column, column_type in ENCODING_COLUMNS.items():
+                        if column not in columns:
+                            connection.execute(f"ALTER TABLE blob_sources ADD COLUMN {column} {column_type}")
+                    self._initialized_index = index_path
+                yield connection
+                connection.commit()
+            finally:
+                connection.close()
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    def has_blob(self, sha256: str) -> bool:
+        return os.path.exists(self.blob_path(sha256))
+
+    def find_source(self, source_api: str, source_id: str) -> Optional[dict]:
+        """
+        The blob a provider image was stored as, if it is still there and has its recorded size: its sha256 and
+        size, plus how it was encoded (extension, fit_quality, fit_scale, source_file_size).
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                f"SELECT s.sha256, b.size, {', '.join(f's.{column}' for column in ENCODING_COLUMNS)} "
+                'FROM blob_sources s JOIN blobs b ON b.sha256 = s.sha256 WHERE s.source_api = ? AND s.source_id = ?',
+                (source_api, str(source_id))
+            ).fetchone()
+        # Hardlinked copies share the blob's inode, so damage to any of them shows up here
+        if row and self.has_blob(row[0]) and os.path.getsize(self.blob_path(row[0])) == row[1]:
+            return dict(zip(('sha256', 'size', *ENCODING_COLUMNS), row))
+        return None
+
+    def put(self, file_path: str, sha256: str, move: bool = True) -> str:
+        """Stores `file_path` as the blob for `sha256`, unless that content is already stored."""
+        blob = self.blob_path(sha256)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        if os.path.exists(blob) and os.path.getsize(blob) == os.path.getsize(file_path):
+            if move:
+                os.remove(file_path)
+        elif move:
+            os.replace(file_path, blob)
+        else:
+            if os.path.exists(blob):
+                os.remove(blob)
+            os.link(file_path, blob)
+
+        with self._connect() as connection:
+            connection.execute('INSERT OR REPLACE INTO blobs (sha256, size, created_at) VALUES (?, ?, ?)',
+                               (sha256, os.path.getsize(blob), datetime.utcnow().isoformat()))
+        return blob
+
+    def link(self, sha256: str, path: str, source: Optional[tuple[str, str]] = None, project: str = project_name,
+             encoding: Optional[dict] = None):
+        """
+        Makes `path` point at the blob and records the reference (and optionally the provider image, with the
+        `encoding` fields of ENCODING_COLUMNS; the extension defaults to the one of `path`).
+        """
+        blob = self.blob_path(sha256)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if os.path.lexists(path):
+            os.remove(path)
+        try:
+            os.link(blob, path)
+        except OSError:
+            try:
+                os.symlink(os.path.abspath(blob), path)
+            except OSError:
+                shutil.copy2(blob, path)
+
+        with self._connect() as connection:
+            connection.execute('INSERT OR REPLACE INTO blob_refs (path, sha256, project) VALUES (?, ?, ?)',
+                               (os.path.normpath(path), sha256, project))
+            if source:
+                encoding = {'extension': os.path.splitext(path)[1].lstrip('.').lower() or None, **(encoding or {})}
+                connection.execute(
+                    f"INSERT OR REPLACE INTO blob_sources (source_api, source_id, sha256, "
+                    f"{', '.join(ENCODING_COLUMNS)}) VALUES (?, ?, ?, {', '.join('?' * len(ENCODING_COLUMNS))})",
+                    (source[0], str(source[1]), sha256, *(encoding.get(column) for column in ENCODING_COLUMNS))
+                )
+
+    def adopt(self, path: str, sha256: str, source: Optional[tuple[str, str]] = None):
+        """Brings a file downloaded before the store existed under management, deduplicating it if possible."""
+        if not self.has_blob(sha256):
+            try:
+                self.put(path, sha256, move=False)
+            except OSError:
+                self.put(shutil.copy2(path, f"{path}.adopt"), sha256)
+        self.link(sha256, path, source)
+
+    def _collect(self, connection: sqlite3.Connection, sha256s: set[str]) -> int:
+        removed = 0
+        for sha256 in sha256s:
+            if connection.execute('SELECT 1 FROM blob_refs WHERE sha256 = ? LIMIT 1', (sha256,)).fetchone():
+                continue
+            connection.execute('DELETE FROM blob_sources WHERE sha256 = ?', (sha256,))
+            connection.execute('DELETE FROM blobs WHERE sha256 = ?', (sha256,))
+            blob = self.blob_path(sha256)
+            if os.path.exists(blob):
+                os.remove(blob)
+                removed += 1
+        return removed
+
+    def release(self, path: str) -> bool:
+        """Removes `path` and its reference; the blob is deleted with its last reference."""
+        path = os.path.normpath(path)
+        if os.path.lexists(path):
+            os.remove(path)
+        with self._connect() as connection:
+            row = connection.execute('SELECT sha256 FROM blob_refs WHERE path = ?', (path,)).fetchone()
+            if row is None:
+                return False
+            connection.execute('DELETE FROM blob_refs WHERE path = ?', (path,))
+            self._collect(connection, {row[0]})
+        return True
+
+    def release_project(self, project: str = project_name) -> int:
+        """Drops every reference held by a project (after its folders were removed) and collects orphaned blobs."""
+        with self._connect() as connection:
+            sha256s = {row[0] for row in connection.execute(
+                'SELECT DISTINCT sha256 FROM blob_refs WHERE project = ?', (project,))}
+            connection.execute('DELETE FROM blob_refs WHERE project = ?', (project,))
+            removed = self._collect(connection, sha256s)
+        logger.info(f"Released blob references of {project}, {removed} blobs removed")
+        return removed
+
+    def prune_missing(self) -> int:
+        """Drops references whose file is gone, e.g. after a WebP conversion replaced it."""
+        with self._connect() as connection:
+            missing = [(path, sha256) for path, sha256 in connection.execute('SELECT path, sha256 FROM blob_refs')
+                       if not os.path.lexists(path)]
+            connection.executemany('DELETE FROM blob_refs WHERE path = ?', [(path,) for path, _ in missing])
+            return self._collect(connection, {sha256 for _, sha256 in missing})
+
+    def stats(self) -> dict:
+        with self._connect() as connection:
+            blobs, stored_bytes = connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs').fetchone()
+            refs, linked_bytes = connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(b.size), 0) FROM blob_refs r JOIN blobs b ON b.sha256 = r.sha256'
+            ).fetchone()
+        return {'blobs': blobs, 'stored_bytes': stored_bytes, 'references': refs, 'linked_bytes': linked_bytes}
+
+
+blob_store = BlobStore(blob_store_dir)
@@ -2,13 +2,18 @@ import csv
 import json
 import os
 import shutil
-from threading import Timer
+import time
+from collections import OrderedDict
+from threading import Lock, Timer
 
 from flask import Response, send_file
 
-from utils.env_constants import project_name
+from utils.env_constants import explorer_page_size, project_name
 from utils.log_utils import logger
 
+LISTING_CACHE_SIZE = 512
+RACY_MTIME_NS = 1_000_000_000
+
 
 def term_to_folder_name(term: str) -> str:
     return term.replace(' ', '_').lower()
@@ -16,8 +21,9 @@ def term_to_folder_name(term: str) -> str:
 
 def create_folders_if_not_exist(folder_names: list[str]):
     for folder_name in folder_names:
+        # exist_ok as well, since parallel downloads may create the same term folder at once
         if not os.path.exists(folder_name):
-            os.makedirs(folder_name)
+            os.makedirs(folder_name, exist_ok=True)
 
 
 def create_files_if_not_exist(file_paths: list[str]):
@@ -64,17 +70,72 @@ def delete_files_if_exist(folder_path: str):
                 os.remove(file_path)
 
 
-def get_directory_tree(path):
-    d = {'name': os.path.basename(path), 'type': 'folder', 'children': []}
-    try:
-        for entry in os.scandir(path):
-            if entry.is_dir():
-                d['children'].append(get_directory_tree(entry.path))
-            else:
-                d['children'].append({'name': entry.name, 'type': 'file'})
-    except PermissionError:
-        pass
-    return d
+# absolute path -> (directory mtime_ns, sorted entries); a directory's mtime changes whenever an entry is
+# added, removed or renamed, which is how downloads, conversions and deletions all touch the tree
+_listing_cache: OrderedDict[str, tuple[int, list[dict]]] = OrderedDict()
+_listing_cache_lock = Lock()
+
+
+def _scan_directory(path: str) -> list[dict]:
+    entries = []
+    with os.scandir(path) as scan:
+        for entry in scan:
+            try:
+                if entry.is_dir():
+                    entries.append({'name': entry.name, 'type': 'folder'})
+                else:
+                    entry_stat = entry.stat()
+                    entries.append({'name': entry.name, 'type': 'file', 'size': entry_stat.st_size,
+                                    'modified': int(entry_stat.st_mtime)})
+            except OSError:
+                continue  # removed while scanning
+    entries.sort(key=lambda entry: (entry['type'] != 'folder', entry['name'].lower()))
+    return entries
+
+
+def get_directory_listing(path: str) -> list[dict]:
+    """One directory's entries, folders first, rescanned only when the directory's mtime changed."""
+    path = os.path.abspath(path)
+    mtime_ns = os.stat(path).st_mtime_ns
+    with _listing_cache_lock:
+        cached = _listing_cache.get(path)
+        if cached and cached[0] == mtime_ns:
+            _listing_cache.move_to_end(path)
+            return cached[1]
+
+    entries = _scan_directory(path)
+    if time.time_ns() - mtime_ns < RACY_MTIME_NS:
+        # Timestamps are coarse, a change later within the same tick would leave the mtime as it is now
+        return entries
+    with _listing_cache_lock:
+        _listing_cache[path] = (mtime_ns, entries)
+        _listing_cache.move_to_end(path)
+        while len(_listing_cache) > LISTING_CACHE_SIZE:
+            _listing_cache.popitem(last=False)
+    return entries
+
+
+def list_directory_page(path: str, offset: int = 0, limit: int = explorer_page_size) -> dict:
+    """A page of a directory listing with totals for the whole directory; folders on the page carry their item count."""
+    entries = get_directory_listing(path)
+    page = []
+    for entry in entries[offset:offset + limit]:
+        if entry['type'] == 'folder':
+            try:
+                entry = {**entry, 'count': len(get_directory_listing(os.path.join(path, entry['name'])))}
+            except OSError:
+                entry = {**entry, 'count': None}
+        page.append(entry)
+
+    return {
+        'entries': page,
+        'total': len(entries),
+        'offset': offset,
+        'limit': limit,
+        'folders': sum(1 for entry in entries if entry['type'] == 'folder'),
+        'files': sum(1 for entry in entries if entry['type'] == 'file'),
+        'bytes': sum(entry.get('size', 0) for entry in entries),
+    }
 
 
 def get_project_folder_as_zip() -> tuple[Response, int]:
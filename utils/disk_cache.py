@@ -0,0 +1,69 @@
+import json
+import os
+import sqlite3
+import time
+from collections.abc import Iterable
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    stored_at REAL NOT NULL
+);
+"""
+
+
+class DiskCache:
+    """
+    Key -> JSON value cache in a SQLite file, for provider lookups worth keeping across restarts. Entries expire
+    after `ttl_seconds`; `None` is a valid value, so a known miss is cached like a hit.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = Lock()
+        self._initialized_path = None
+
+    @contextmanager
+    def _connect(self):
+        with self._lock:
+            path = os.path.abspath(self.path)
+            initialize = self._initialized_path != path
+            if initialize:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            connection = sqlite3.connect(path, timeout=30)
+            try:
+                if initialize:
+                    connection.execute('PRAGMA journal_mode=WAL')
+                    connection.executescript(SCHEMA)
+                    self._initialized_path = path
+                yield connection
+                connection.commit()
+            finally:
+                connection.close()
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """The fresh entries among `keys`; keys that are missing or expired are left out."""
+        keys = list(dict.fromkeys(str(key) for key in keys))
+        if not keys:
+            return {}
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"SELECT key, value FROM entries WHERE stored_at >= ? AND key IN ({', '.join('?' * len(keys))})",
+                (time.time() - self.ttl_seconds, *keys)
+            ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def set_many(self, values: dict[str, Any]):
+        if not values:
+            return
+        now = time.time()
+        with self._connect() as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO entries (key, value, stored_at) VALUES (?, ?, ?)',
+                [(str(key), json.dumps(value), now) for key, value in values.items()]
+            )
@@ -1,15 +1,33 @@
+import hashlib
 import os
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Optional
 
 import requests
 from dotenv import load_dotenv
 
 from core.models import Image
-from utils.common_utils import create_folders_if_not_exist
-from utils.env_constants import max_image_kb
+from utils.blob_store import blob_store
+from utils.common_utils import create_folders_if_not_exist, delete_file_if_exists
+from utils.env_constants import (
+    fit_max_source_kb,
+    max_image_kb,
+    oversize_mode,
+    transcode_format,
+    transcode_quality,
+)
+from utils.executor_utils import get_cpu_executor
+from utils.image_utils import fit_to_budget, transcode
 from utils.log_utils import logger
+from utils.metrics_utils import download_bytes, download_duration
 
 load_dotenv()
 
+ENCODED_EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp', 'AVIF': 'avif'}
+TRANSCODE_FORMATS = {'webp': 'WEBP', 'avif': 'AVIF'}
+
 
 def get_remote_size(url: str) -> dict:
     try:
@@ -46,28 +64,186 @@ def get_remote_size(url: str) -> dict:
     }
 
 
+def _reusable(stored: dict, transcode_to: Optional[str], fit: bool, max_kb: int) -> bool:
+    """Whether a stored blob is what downloading the image again with the current settings would produce."""
+    if not stored['extension'] or (max_kb and stored['size'] / 1000 > max_kb):
+        return False
+    if transcode_to:
+        return stored['extension'] == ENCODED_EXTENSIONS[transcode_to]
+    if stored['fit_quality'] is not None:
+        return fit
+    return stored['source_file_size'] is None  # the provider's own bytes, not a transcode
+
+
+def _link_stored(img: Image, folder_path: str, stored: dict) -> dict:
+    """Links a provider image already in the blob store, with the manifest fields of the blob's actual encoding."""
+    image_path = os.path.join(folder_path, f"{img.source_id}.{stored['extension']}")
+    blob_store.link(stored['sha256'], image_path, (img.source_api, str(img.source_id)), encoding=stored)
+    download_duration.observe(0, provider=img.source_api, result='deduplicated')
+    result = {
+        'file_path': image_path,
+        'file_size': stored['size'],
+        'file_sha256': stored['sha256'],
+        'downloaded_at': datetime.utcnow(),
+        **{key: stored[key] for key in ('fit_quality', 'fit_scale', 'source_file_size') if stored[key] is not None},
+    }
+    if stored['extension'] != img.extension:
+        result['extension'] = stored['extension']
+    return result
+
+
+def download_image(img: Image, folder_path: str, max_kb: int = max_image_kb,
+                   etag: Optional[str] = None, last_modified: Optional[str] = None) -> Optional[dict]:
+    """
+    Streams the image into the blob store in a single request, hashing it on the way, and links it into
+    `folder_path`. A provider image already in the store is linked without a request. With `etag`/`last_modified`
+    the request is conditional and {'not_modified': True} is returned on a 304. Files over `max_kb` are skipped,
+    or with OVERSIZE_MODE=fit re-encoded into the budget on the CPU pool. With TRANSCODE_FORMAT the body is kept
+    in memory and encoded on the CPU pool instead, so only the converted file is written. Returns the manifest
+    fields for the Image row, or None when nothing was written.
+    """
+    url = img.url_original
+    if not url:
+        return None
+
+    transcode_to = TRANSCODE_FORMATS.get(transcode_format)
+    extension = ENCODED_EXTENSIONS[transcode_to] if transcode_to else img.extension
+    image_path = os.path.join(folder_path, f"{img.source_id}.{extension}")
+    result = {'extension': extension} if extension != img.extension else {}
+    source = (img.source_api, str(img.source_id))
+    fit = oversize_mode == 'fit' and max_kb > 0
+    if not etag and not last_modified:
+        stored = blob_store.find_source(*source)
+        if stored and _reusable(stored, transcode_to, fit, max_kb):
+            return _link_stored(img, folder_path, stored)
+
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    part_path = f"{image_path}.part"
+    start = time.perf_counter()
+    digest = hashlib.sha256()
+    size = 0
+    too_large = False
+    body = bytearray() if transcode_to else None
+    # Re-encoding needs the whole original, so the budget applies to the output, with a sanity limit on the input
+    limit_kb = max(fit_max_source_kb, max_kb) if fit or transcode_to else max_kb
+
+    try:
+        with requests.get(url, headers=headers, stream=True, timeout=30) as response:
+            if response.status_code == 304:
+                download_duration.observe(time.perf_counter() - start, provider=img.source_api, result='not_modified')
+                return {'not_modified': True}
+            response.raise_for_status()
+
+            content_kb = int(response.headers.get('Content-Length') or 0) / 1000
+            if limit_kb and content_kb > limit_kb:
+                too_large = True
+            else:
+                create_folders_if_not_exist([folder_path])
+                with (nullcontext() if transcode_to else open(part_path, 'wb')) as file:
+                    write = body.extend if transcode_to else file.write
+                    for chunk in response.iter_content(64 * 1024):
+                        size += len(chunk)
+                        if limit_kb and size / 1000 > limit_kb:
+                            too_large = True
+                            break
+                        digest.update(chunk)
+                        write(chunk)
 
-def download_image(img: Image, folder_path: str, max_kb: int = max_image_kb):
-   url = img.url_original
-   if not url:
-       return False
+            response_etag = response.headers.get('ETag')
+            response_last_modified = response.headers.get('Last-Modified')
+    except (requests.RequestException, OSError) as e:
+        logger.error(f"Error downloading image {img.source_id} from {img.source_api}: {e}")
+        download_duration.observe(time.perf_counter() - start, provider=img.source_api, result='error')
+        delete_file_if_exists(part_path)
+        return None
 
-   try:
-     image_info = get_remote_size(url)
-     content_kb = image_info.get('kb_decimal', 0)
-     if content_kb > max_kb:
-         logger.warning(f"Image {img.source_id} from {img.source_api} is larger than {max_kb} KB")
-         return False
-     image_data = requests.get(url, timeout=30)
-   except requests.RequestException as e:
-       logger.error(f"Error downloading image {img.source_id} from {img.source_api}: {e}")
-       return False
+    if too_large:
+        logger.warning(f"Image {img.source_id} from {img.source_api} is larger than {limit_kb} KB")
+        download_duration.observe(time.perf_counter() - start, provider=img.source_api, result='skipped')
+        delete_file_if_exists(part_path)
+        return None
 
-   image_path = os.path.join(folder_path, f"{img.source_id}.{img.extension}")
-   create_folders_if_not_exist([folder_path])
+    download_bytes.inc(size, provider=img.source_api)
+    sha256 = digest.hexdigest()
+    encoded = None
+    if transcode_to:
+        encoded = transcode_download(img, bytes(body), transcode_to, max_kb if fit else 0)
+        if encoded is not None and max_kb and encoded['file_size'] / 1000 > max_kb:
+            logger.warning(f"Image {img.source_id} from {img.source_api} is larger than {max_kb} KB "
+                           f"as {transcode_to}")
+            encoded = None
+        if encoded is None:
+            download_duration.observe(time.perf_counter() - start, provider=img.source_api, result='skipped')
+            return None
+        with open(part_path, 'wb') as file:
+            file.write(encoded.pop('data'))
+    elif fit and size / 1000 > max_kb:
+        encoded = fit_download(img, part_path, max_kb)
+        if encoded is None:
+            download_duration.observe(time.perf_counter() - start, provider=img.source_api, result='skipped')
+            delete_file_if_exists(part_path)
+            return None
+        encoded['fitted'] = True
+        extension = ENCODED_EXTENSIONS[encoded['image_format']]
+        if extension != img.extension:
+            image_path = os.path.join(folder_path, f"{img.source_id}.{extension}")
+            result['extension'] = extension
 
-   with open(image_path, 'wb') as file:
-       file.write(image_data.content)
+    if encoded is not None:
+        if encoded.get('fitted'):
+            result.update(fit_quality=encoded['quality'], fit_scale=encoded['scale'])
+        result['source_file_size'] = size
+        sha256, size = encoded['file_sha256'], encoded['file_size']
+
+    # Identical content approved under another term, project or provider id is stored only once
+    blob_store.put(part_path, sha256)
+    blob_store.link(sha256, image_path, source, encoding={
+        'extension': os.path.splitext(image_path)[1].lstrip('.'),
+        **{key: result.get(key) for key in ('fit_quality', 'fit_scale', 'source_file_size')},
+    })
+
+    download_duration.observe(time.perf_counter() - start, provider=img.source_api,
+                              result='fitted' if 'fit_quality' in result else 'ok')
+    logger.info(f"Downloaded image {img.source_id} to {image_path} ({size / 1000:.2f} KB)")
+    return {
+        'file_path': image_path,
+        'file_size': size,
+        'file_sha256': sha256,
+        'download_etag': response_etag,
+        'download_last_modified': response_last_modified,
+        'downloaded_at': datetime.utcnow(),
+        **result,
+    }
+
+
+def transcode_download(img: Image, body: bytes, image_format: str, budget_bytes: int) -> Optional[dict]:
+    """Encodes a downloaded body as `image_format` on the shared process pool; the network thread only waits."""
+    try:
+        return get_cpu_executor().submit(transcode, body, image_format, transcode_quality, budget_bytes).result()
+    except Exception as e:
+        logger.error(f"Error transcoding image {img.source_id} from {img.source_api} to {image_format}: {e}")
+        return None
+
+
+def fit_download(img: Image, part_path: str, max_kb: int) -> Optional[dict]:
+    """Re-encodes a finished download into `max_kb` in place, on the shared process pool."""
+    fit_path = f"{part_path}.fit"
+    try:
+        fitted = get_cpu_executor().submit(fit_to_budget, part_path, fit_path, max_kb * 1000).result()
+    except Exception as e:
+        logger.error(f"Error re-encoding image {img.source_id} from {img.source_api}: {e}")
+        delete_file_if_exists(fit_path)
+        return None
 
-   logger.info(f"Downloaded image {img.source_id} to {image_path} ({content_kb:.2f} KB)")
-   return True
+    if fitted is None:
+        logger.warning(f"Image {img.source_id} from {img.source_api} does not fit in {max_kb} KB")
+        return None
+    os.replace(fit_path, part_path)
+    logger.info(f"Re-encoded image {img.source_id} from {img.source_api} to fit {max_kb} KB: "
+                f"quality {fitted['quality']}, scale {fitted['scale']}")
+    return fitted
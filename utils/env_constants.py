@@ -11,6 +11,66 @@ app_host = os.getenv('APP_HOST', '0.0.0.0')
 use_debug_mode = os.getenv('DEBUG', 'false').lower() == 'true'
 use_reloader = os.getenv('USE_RELOADER', 'false').lower() == 'true'
 max_image_kb = int(os.getenv('MAX_KB_IMAGE_SIZE', '512'))
+oversize_mode = os.getenv('OVERSIZE_MODE', 'skip').lower()  # 'skip' or 'fit' (re-encode into MAX_KB_IMAGE_SIZE)
+fit_max_source_kb = int(os.getenv('FIT_MAX_SOURCE_KB', '51200'))
 webp_compression_quality = int(os.getenv('WEBP_COMPRESSION_QUALITY', '80'))
+transcode_format = os.getenv('TRANSCODE_FORMAT', '').lower()  # '', 'webp' or 'avif'
+transcode_quality = int(os.getenv('TRANSCODE_QUALITY', str(webp_compression_quality)))
 search_per_page = int(os.getenv('SEARCH_PER_PAGE', '30'))
+search_max_pages = int(os.getenv('SEARCH_MAX_PAGES', '10'))
+prefetch_margin = int(os.getenv('PREFETCH_MARGIN', '5'))
+prefilter_mode = os.getenv('PREFILTER_MODE', 'drop').lower()
+prefilter_probe_sizes = os.getenv('PREFILTER_PROBE_SIZES', 'true').lower() == 'true'
+min_image_width = int(os.getenv('MIN_IMAGE_WIDTH', '0'))
+min_image_height = int(os.getenv('MIN_IMAGE_HEIGHT', '0'))
+probe_timeout = float(os.getenv('PROBE_TIMEOUT', '5'))
+probe_cache_size = int(os.getenv('PROBE_CACHE_SIZE', '4096'))
+refetch_workers = int(os.getenv('REFETCH_WORKERS', '8'))
+refetch_rate = float(os.getenv('REFETCH_RATE', '5'))
+refetch_burst = int(os.getenv('REFETCH_BURST', '5'))
+refetch_chunk_size = int(os.getenv('REFETCH_CHUNK_SIZE', '200'))
+link_check_workers = int(os.getenv('LINK_CHECK_WORKERS', '64'))
+link_check_host_rate = float(os.getenv('LINK_CHECK_HOST_RATE', '50'))
+link_check_host_burst = int(os.getenv('LINK_CHECK_HOST_BURST', '10'))
+link_check_interval_hours = float(os.getenv('LINK_CHECK_INTERVAL_HOURS', '168'))
+link_check_chunk_size = int(os.getenv('LINK_CHECK_CHUNK_SIZE', '500'))
+link_check_every_minutes = float(os.getenv('LINK_CHECK_EVERY_MINUTES', '0'))
+download_workers = int(os.getenv('DOWNLOAD_WORKERS', '8'))
+download_revalidate = os.getenv('DOWNLOAD_REVALIDATE', 'false').lower() == 'true'
+blob_store_dir = os.getenv('BLOB_STORE_DIR', 'assets/blobs')
+explorer_page_size = int(os.getenv('EXPLORER_PAGE_SIZE', '200'))
+# name:max_edge_px[:format] renditions built from each downloaded original
+image_variants = [
+    spec.strip() for spec in os.getenv('IMAGE_VARIANTS', 'thumb:256:webp,preview:1024:webp').split(',') if spec.strip()
+]
+variants_dir = os.getenv('VARIANTS_DIR', 'assets/variants')
+curate_workers = int(os.getenv('CURATE_WORKERS', '8'))
+curate_provider_rate = float(os.getenv('CURATE_PROVIDER_RATE', '2'))
+curate_provider_burst = int(os.getenv('CURATE_PROVIDER_BURST', '2'))
+curate_dedupe_distance = int(os.getenv('CURATE_DEDUPE_DISTANCE', '6'))  # -1 disables near-duplicate exclusion
+wger_image_workers = int(os.getenv('WGER_IMAGE_WORKERS', '15'))
+wger_image_cache_ttl_hours = float(os.getenv('WGER_IMAGE_CACHE_TTL_HOURS', '168'))
 project_name = os.getenv('PROJECT_NAME', 'default_project')
+term_lease_seconds = int(os.getenv('TERM_LEASE_SECONDS', '900'))
+term_lease_batch = int(os.getenv('TERM_LEASE_BATCH', '10'))
+profile_sample_rate = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+profile_slow_requests = int(os.getenv('PROFILE_SLOW_REQUESTS', '20'))
+tracemalloc_enabled = os.getenv('TRACEMALLOC_ENABLED', 'false').lower() == 'true'
+tracemalloc_every = int(os.getenv('TRACEMALLOC_EVERY', '50'))
+log_file_level = os.getenv('LOG_LEVEL', 'INFO').upper()
+log_console_level = os.getenv('LOG_CONSOLE_LEVEL', 'INFO').upper()
+log_max_bytes = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+log_backup_count = int(os.getenv('LOG_BACKUP_COUNT', '14'))
+log_json = os.getenv('LOG_JSON', 'false').lower() == 'true'
+log_debug_rate = int(os.getenv('LOG_DEBUG_RATE', '5'))
+io_workers = int(os.getenv('IO_WORKERS', '16'))
+cpu_workers = int(os.getenv('CPU_WORKERS', str(os.cpu_count() or 1)))
+provider_timeout = float(os.getenv('PROVIDER_TIMEOUT', '10'))
+provider_latency_budget = float(os.getenv('PROVIDER_LATENCY_BUDGET', '8'))
+breaker_failure_threshold = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '3'))
+breaker_recovery_seconds = float(os.getenv('BREAKER_RECOVERY_SECONDS', '30'))
+hedge_requests = os.getenv('HEDGE_REQUESTS', 'false').lower() == 'true'
+provider_fallback_order = [
+    api.strip() for api in os.getenv('PROVIDER_FALLBACK_ORDER', 'pixabay,pexels,unsplash,flickr').split(',')
+    if api.strip()
+]
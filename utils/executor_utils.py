@@ -0,0 +1,68 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from threading import Lock, local
+
+from utils.env_constants import cpu_workers, io_workers
+
+_io_executor = None
+_io_executor_lock = Lock()
+_prefetch_executor = None
+_prefetch_executor_lock = Lock()
+_cpu_executor = None
+_cpu_executor_lock = Lock()
+_io_worker = local()
+
+
+def _mark_io_worker():
+    _io_worker.active = True
+
+
+def on_io_worker() -> bool:
+    """
+    Whether the current thread belongs to the shared I/O pool. Work running there must not submit to the pool and
+    wait for the result: with every worker doing that, nothing is left to run the submitted tasks.
+    """
+    return getattr(_io_worker, 'active', False)
+
+
+def new_io_executor(max_workers: int = io_workers) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='io', initializer=_mark_io_worker)
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """Shared thread pool for network-bound leaf work (provider calls, probes, downloads)."""
+    global _io_executor
+    if _io_executor is None:
+        with _io_executor_lock:
+            if _io_executor is None:
+                _io_executor = new_io_executor()
+    return _io_executor
+
+
+def get_prefetch_executor() -> ThreadPoolExecutor:
+    """
+    Shared thread pool for review page prefetches. A prefetch filters its page, which fans probes out onto the
+    I/O pool and waits for them, so it can't run on the I/O pool itself.
+    """
+    global _prefetch_executor
+    if _prefetch_executor is None:
+        with _prefetch_executor_lock:
+            if _prefetch_executor is None:
+                _prefetch_executor = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix='prefetch')
+    return _prefetch_executor
+
+
+def get_cpu_executor() -> ProcessPoolExecutor:
+    """
+    Shared process pool for CPU-bound image work, so encoding doesn't hold the GIL of the request threads. Workers
+    are spawned rather than forked: the pool starts lazily in a process already running the log listener, the
+    thread pools and request threads, and a child forked while one of them holds a lock can deadlock on it.
+    Spawned workers import the modules afresh, with a log listener of their own.
+    """
+    global _cpu_executor
+    if _cpu_executor is None:
+        with _cpu_executor_lock:
+            if _cpu_executor is None:
+                _cpu_executor = ProcessPoolExecutor(max_workers=cpu_workers,
+                                                    mp_context=multiprocessing.get_context('spawn'))
+    return _cpu_executor
@@ -1,11 +1,187 @@
+import hashlib
+import io
 import os
 from pathlib import Path
+from typing import Optional
 
-from PIL import Image
+from PIL import Image, ImageOps
 
 from utils.env_constants import webp_compression_quality
 from utils.log_utils import logger
 
+EXIF_ORIENTATION = 0x0112
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)  # stored sideways, width and height swap when displayed
+
+FIT_QUALITY_RANGE = (40, 90)
+FIT_SCALE_QUALITY = 75  # quality used while searching for a scale; what's left of the budget then goes to quality
+FIT_MIN_SCALE = 0.05
+FIT_SCALE_STEPS = 7
+
+DHASH_SIZE = 8  # 8x8 gradient bits, a 64-bit hash
+
+
+def read_image_header(path: str) -> Optional[dict]:
+    """
+    Dimensions, mode, format and EXIF orientation from the file header only. Image.open is lazy and the EXIF block
+    sits in the header segments, so no pixel data is decoded.
+    """
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+            orientation = img.getexif().get(EXIF_ORIENTATION, 1)
+            header = {
+                'color_mode': img.mode,
+                'image_format': img.format,
+                'orientation': orientation,
+            }
+    except OSError as e:
+        logger.error(f"Could not read image header of {path}: {e}")
+        return None
+
+    if orientation in ROTATED_ORIENTATIONS:
+        width, height = height, width
+    return {'width': width, 'height': height, **header}
+
+
+def _encode(img: Image.Image, image_format: str, quality: int, icc_profile: Optional[bytes]) -> bytes:
+    buffer = io.BytesIO()
+    options = {'optimize': True} if image_format == 'JPEG' else {'method': 4} if image_format == 'WEBP' else {}
+    img.save(buffer, image_format, quality=quality, icc_profile=icc_profile, **options)
+    return buffer.getvalue()
+
+
+def _prepare(original: Image.Image, image_format: str) -> Image.Image:
+    # Pixels are stored upright since the re-encoded file carries no EXIF orientation
+    img = ImageOps.exif_transpose(original)
+    if image_format == 'JPEG' and img.mode not in ('RGB', 'L'):
+        return img.convert('RGB')
+    if img.mode not in ('RGB', 'RGBA', 'L'):
+        return img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+    return img
+
+
+def _encoded(data: bytes, img: Image.Image, image_format: str, quality: Optional[int], scale: float) -> dict:
+    return {
+        'data': data,
+        'quality': quality,
+        'scale': scale,
+        'width': img.width,
+        'height': img.height,
+        'image_format': image_format,
+        'file_size': len(data),
+        'file_sha256': hashlib.sha256(data).hexdigest(),
+    }
+
+
+def _fit(img: Image.Image, image_format: str, icc_profile: Optional[bytes], budget_bytes: int) -> Optional[dict]:
+    """
+    The highest quality that fits in `budget_bytes` at full size, found by binary search, or else the largest scale
+    that fits at FIT_SCALE_QUALITY followed by the highest quality at that scale.
+    """
+    resized = {}
+
+    def encode(scale: float, quality: int) -> bytes:
+        if scale not in resized:
+            resized.clear()
+            size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            resized[scale] = img if scale == 1 else img.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+        return _encode(resized[scale], image_format, quality, icc_profile)
+
+    def best_quality(scale: float) -> Optional[tuple[int, bytes]]:
+        low, high = FIT_QUALITY_RANGE
+        best = None
+        while low <= high:
+            quality = (low + high) // 2
+            data = encode(scale, quality)
+            if len(data) <= budget_bytes:
+                best, low = (quality, data), quality + 1
+            else:
+                high = quality - 1
+        return best
+
+    scale = 1.0
+    best = best_quality(scale)
+    if best is None:
+        low, high, scale = FIT_MIN_SCALE, 1.0, FIT_MIN_SCALE
+        for _ in range(FIT_SCALE_STEPS):
+            middle = round((low + high) / 2, 3)
+            if len(encode(middle, FIT_SCALE_QUALITY)) <= budget_bytes:
+                scale = low = middle
+            else:
+                high = middle
+        best = best_quality(scale)
+        if best is None:
+            return None
+
+    quality, data = best
+    return _encoded(data, resized[scale], image_format, quality, scale)
+
+
+def fit_to_budget(source: str, output: str, budget_bytes: int) -> Optional[dict]:
+    """
+    Runs in a worker process. Re-encodes `source` into at most `budget_bytes` and writes it to `output`. JPEG and
+    WebP keep their format, anything else becomes WebP. Returns the chosen parameters, or None when even the
+    smallest scale doesn't fit.
+    """
+    with Image.open(source) as original:
+        image_format = original.format if original.format in ('JPEG', 'WEBP') else 'WEBP'
+        icc_profile = original.info.get('icc_profile')
+        img = _prepare(original, image_format)
+
+    fitted = _fit(img, image_format, icc_profile, budget_bytes)
+    if fitted is None:
+        return None
+    with open(output, 'wb') as file:
+        file.write(fitted.pop('data'))
+    return fitted
+
+
+def transcode(data: bytes, image_format: str, quality: int, budget_bytes: int = 0) -> Optional[dict]:
+    """
+    Runs in a worker process. Decodes a downloaded response body and encodes it as `image_format` in memory, so
+    the caller writes the file once. A body already in that format is passed through untouched. With
+    `budget_bytes`, a result over the budget is fitted into it like fit_to_budget and marked 'fitted'. Returns the
+    encoded bytes as 'data' with the chosen parameters ('quality' is None for a pass-through), or None when it
+    doesn't fit.
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        if original.format == image_format and (not budget_bytes or len(data) <= budget_bytes):
+            return _encoded(data, original, image_format, None, 1.0)
+        icc_profile = original.info.get('icc_profile')
+        img = _prepare(original, image_format)
+
+    encoded = _encode(img, image_format, quality, icc_profile)
+    if not budget_bytes or len(encoded) <= budget_bytes:
+        return _encoded(encoded, img, image_format, quality, 1.0)
+    fitted = _fit(img, image_format, icc_profile, budget_bytes)
+    return fitted and {**fitted, 'fitted': True}
+
+
+def dhash(data: bytes) -> Optional[str]:
+    """
+    Difference hash of an encoded image as 16 hex digits: each bit says whether a pixel of the 9x8 grayscale
+    version is brighter than its right neighbour. Re-encoded, resized or lightly edited copies of a photo land
+    within a few bits of each other. JPEG draft() decodes the thumbnail at a fraction of its size.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.draft('L', (DHASH_SIZE * 4, DHASH_SIZE * 4))
+            pixels = img.convert('L').resize((DHASH_SIZE + 1, DHASH_SIZE), Image.Resampling.BOX).tobytes()
+    except OSError as e:
+        logger.debug(f"Could not hash image: {e}")
+        return None
+
+    bits = 0
+    for row in range(DHASH_SIZE):
+        for col in range(DHASH_SIZE):
+            left = pixels[row * (DHASH_SIZE + 1) + col]
+            bits = (bits << 1) | (left > pixels[row * (DHASH_SIZE + 1) + col + 1])
+    return f"{bits:016x}"
+
+
+def hamming_distance(first: str, second: str) -> int:
+    return (int(first, 16) ^ int(second, 16)).bit_count()
+
 
 def convert_to_webp(directory_path, quality=webp_compression_quality):
     """
@@ -1,10 +1,25 @@
+import atexit
+import copy
+import json
 import logging
 import os
-from datetime import datetime
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from threading import Lock
 
-from utils.env_constants import project_name
+from utils.env_constants import (
+    log_backup_count,
+    log_console_level,
+    log_debug_rate,
+    log_file_level,
+    log_json,
+    log_max_bytes,
+    project_name,
+)
 
 LOG_DIR = f"assets/{project_name}/log_files"
+LOG_FILE = os.path.join(LOG_DIR, "app.log")
 
 formatter = logging.Formatter(
     '%(asctime)s | %(levelname)-8s | %(name)s | %(message)s',
@@ -12,25 +27,157 @@ formatter = logging.Formatter(
 )
 
 
-def setup_custom_logger(name):
-    # Ensure log directory exists
-    os.makedirs(LOG_DIR, exist_ok=True)
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'thread': record.threadName,
+        }
+        # Records from the queue carry the traceback already rendered, in exc_text
+        exc_text = record.exc_text or (self.formatException(record.exc_info) if record.exc_info else None)
+        if exc_text:
+            payload['exc_info'] = exc_text
+        if record.stack_info:
+            payload['stack_info'] = record.stack_info
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class SizedTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """Rolls the log over at midnight or once it grows past max_bytes, whichever comes first."""
+
+    def __init__(self, filename: str, max_bytes: int = 0, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.max_bytes = max_bytes
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes <= 0:
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        self.stream.seek(0, 2)
+        return self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes
+
+    def rotation_filename(self, default_name: str) -> str:
+        # Size based rollovers can happen several times a day, so never overwrite an earlier backup
+        name = super().rotation_filename(default_name)
+        candidate, index = name, 1
+        while os.path.exists(candidate):
+            candidate = f"{name}.{index}"
+            index += 1
+        return candidate
+
+
+class DebugRateLimitFilter(logging.Filter):
+    """Lets through at most `rate` DEBUG records per second from each call site and drops the rest."""
+
+    def __init__(self, rate: int):
+        super().__init__()
+        self.rate = rate
+        self._windows: dict[tuple, list[int]] = {}
+        self._lock = Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0 or record.levelno > logging.DEBUG:
+            return True
+
+        key = (record.pathname, record.lineno)
+        second = int(time.monotonic())
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or window[0] != second:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [second, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+                return True
+
+            window[1] += 1
+            if window[1] <= self.rate:
+                return True
+            window[2] += 1
+            return False
 
-    log_file = os.path.join(LOG_DIR, f"app_{datetime.now().strftime('%Y%m%d')}.log")
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
-    file_handler.setFormatter(formatter)
-    file_handler.setLevel(logging.INFO)
+
+class LazyQueueHandler(QueueHandler):
+    """Starts the listener thread with the first record instead of at import time."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Unlike QueueHandler.prepare, which formats the whole record into `msg`, only merges the arguments and
+        renders the traceback (its frames can't wait for the listener) into exc_text. The listener's formatters
+        then lay out the record, so JSON logs keep the traceback in its own field.
+        """
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        _start_listener()
+        super().enqueue(record)
+
+
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_listener = None
+_listener_lock = Lock()
+
+
+def _start_listener() -> QueueListener:
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    with _listener_lock:
+        if _listener is None:
+            _listener = _create_listener()
+    return _listener
+
+
+def _create_listener() -> QueueListener:
+    file_handler = SizedTimedRotatingFileHandler(
+        LOG_FILE,
+        max_bytes=log_max_bytes,
+        when='midnight',
+        backupCount=log_backup_count,
+        encoding='utf-8',
+        delay=True
+    )
+    file_handler.setFormatter(JsonFormatter() if log_json else formatter)
+    file_handler.setLevel(log_file_level)
 
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    console_handler.setLevel(logging.DEBUG)
+    console_handler.setLevel(log_console_level)
 
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+def setup_custom_logger(name):
     custom_logger = logging.getLogger(name)
-    custom_logger.setLevel(logging.DEBUG)
+    custom_logger.setLevel(min(logging.getLevelName(log_file_level), logging.getLevelName(log_console_level)))
 
     if not custom_logger.handlers:
-        custom_logger.addHandler(file_handler)
-        custom_logger.addHandler(console_handler)
+        # The calling thread merges the message and renders tracebacks; layout and file/console I/O happen on the
+        # listener
+        queue_handler = LazyQueueHandler(log_queue)
+        queue_handler.addFilter(DebugRateLimitFilter(log_debug_rate))
+        custom_logger.addHandler(queue_handler)
 
     return custom_logger
 
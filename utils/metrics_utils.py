@@ -0,0 +1,218 @@
+import time
+from bisect import bisect_left
+from functools import wraps
+from threading import Lock
+
+from flask import Flask, Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(label_names: tuple, label_values: tuple, extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: dict[tuple, float] = {}
+        self._lock = Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        return self._values.get(key, 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., sum, count]
+        self._values: dict[tuple, list[float]] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        bucket_idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 2)
+            if bucket_idx < len(self.buckets):
+                series[bucket_idx] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels) -> int:
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        series = self._values.get(key)
+        return int(series[-1]) if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, series):
+                    cumulative += bucket_count
+                    le = _format_labels(self.label_names, key, f'le="{_format_number(bound)}"')
+                    lines.append(f"{self.name}_bucket{le} {_format_number(cumulative)}")
+                le = _format_labels(self.label_names, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{le} {_format_number(series[-1])}")
+                labels = _format_labels(self.label_names, key)
+                lines.append(f"{self.name}_sum{labels} {_format_number(series[-2])}")
+                lines.append(f"{self.name}_count{labels} {_format_number(series[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram] = {}
+
+    def counter(self, name: str, help_text: str, label_names: tuple = ()) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help_text, label_names))
+
+    def histogram(self, name: str, help_text: str, label_names: tuple = (),
+                  buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help_text, label_names, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    'http_request_duration_seconds', 'Time spent handling HTTP requests.', ('endpoint', 'method', 'status'))
+http_request_errors = registry.counter(
+    'http_request_errors_total', 'HTTP requests answered with a 5xx status.', ('endpoint', 'method', 'status'))
+http_request_db_queries = registry.histogram(
+    'http_request_db_queries', 'Database queries issued per HTTP request.', ('endpoint',), COUNT_BUCKETS)
+db_query_duration = registry.histogram(
+    'db_query_duration_seconds', 'Time spent executing database queries.', ('operation',))
+db_query_errors = registry.counter(
+    'db_query_errors_total', 'Database queries that raised an error.', ('operation',))
+provider_call_duration = registry.histogram(
+    'provider_call_duration_seconds', 'Time spent in image provider calls.', ('provider', 'method'))
+provider_call_errors = registry.counter(
+    'provider_call_errors_total', 'Image provider calls that failed.', ('provider', 'method'))
+circuit_breaker_transitions = registry.counter(
+    'provider_circuit_transitions_total', 'Provider circuit breaker state changes.', ('provider', 'state'))
+candidates_filtered = registry.counter(
+    'review_candidates_filtered_total', 'Search results removed or demoted before review.', ('provider', 'reason'))
+download_duration = registry.histogram(
+    'image_download_duration_seconds', 'Time spent downloading images.', ('provider', 'result'))
+download_bytes = registry.counter(
+    'image_download_bytes_total', 'Bytes written by image downloads.', ('provider',))
+
+
+def count_provider_error(provider: str, method: str):
+    provider_call_errors.inc(provider=provider, method=method)
+
+
+def timed_provider_call(provider: str, method: str):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                count_provider_error(provider, method)
+                raise
+            finally:
+                provider_call_duration.observe(time.perf_counter() - start, provider=provider, method=method)
+
+        return wrapper
+
+    return decorator
+
+
+def _query_operation(statement: str) -> str:
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'UNKNOWN'
+
+
+def instrument_engine(engine: Engine):
+    if getattr(engine, '_metrics_instrumented', False):
+        return
+    engine._metrics_instrumented = True
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info['query_start_time'].pop()
+        db_query_duration.observe(time.perf_counter() - start, operation=_query_operation(statement))
+        if has_request_context() and 'metrics_db_queries' in g:
+            g.metrics_db_queries += 1
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(context):
+        start_times = context.connection.info.get('query_start_time') if context.connection else None
+        if start_times:
+            start_times.pop()
+        db_query_errors.inc(operation=_query_operation(context.statement or ''))
+
+
+def init_app_metrics(app: Flask, engine: Engine):
+    instrument_engine(engine)
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start_time = time.perf_counter()
+        g.metrics_db_queries = 0
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.pop('metrics_start_time', None)
+        if start is None:
+            return response
+
+        endpoint = request.endpoint or 'unmatched'
+        status = str(response.status_code)
+        http_request_duration.observe(time.perf_counter() - start,
+                                      endpoint=endpoint, method=request.method, status=status)
+        http_request_db_queries.observe(g.pop('metrics_db_queries', 0), endpoint=endpoint)
+        if response.status_code >= 500:
+            http_request_errors.inc(endpoint=endpoint, method=request.method, status=status)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
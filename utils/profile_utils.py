@@ -0,0 +1,249 @@
+import cProfile
+import heapq
+import io
+import os
+import pstats
+import random
+import time
+import tracemalloc
+from collections import Counter, deque
+from datetime import datetime
+from itertools import count
+from threading import Lock
+
+from flask import Flask, g, request
+
+from core.session import get_all_sessions
+from utils.env_constants import (
+    profile_sample_rate,
+    profile_slow_requests,
+    project_name,
+    tracemalloc_enabled,
+    tracemalloc_every,
+)
+from utils.log_utils import logger
+
+PROFILE_DIR = f"assets/{project_name}/log_files/profiles"
+CACHE_TRACE_FILTERS = (
+    tracemalloc.Filter(True, f"*{os.sep}services{os.sep}*"),
+    tracemalloc.Filter(True, f"*{os.sep}core{os.sep}session.py"),
+)
+
+_slow_requests: list[tuple[float, int, dict]] = []  # min-heap of the slowest sampled requests
+_slow_requests_lock = Lock()
+_sequence = count()
+
+_memory_reports: deque = deque(maxlen=20)
+_memory_lock = Lock()
+# Only the baseline snapshot and the latest one are kept on disk
+_memory_state = {'baseline': None, 'baseline_file': None, 'latest_file': None, 'requests': 0}
+
+
+def _function_label(func: tuple) -> str:
+    filename, line, name = func
+    if filename == '~':
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def collapsed_stacks(stats: dict, max_depth: int = 64) -> list[str]:
+    """
+    Rebuilds flame-graph style "a;b;c <microseconds>" lines from pstats call edges.
+    pstats only keeps caller/callee pairs, so time is split across callers by their share of the cumulative time.
+    """
+    callees: dict[tuple, list[tuple[tuple, float]]] = {}
+    for func, (_, _, _, cumulative, callers) in stats.items():
+        for caller, caller_stats in callers.items():
+            share = caller_stats[3] / cumulative if cumulative else 0
+            callees.setdefault(caller, []).append((func, share))
+
+    stacks = Counter()
+
+    def walk(func, stack, weight):
+        stack = stack + (_function_label(func),)
+        self_us = int(stats[func][2] * weight * 1_000_000)
+        if self_us:
+            stacks[';'.join(stack)] += self_us
+        if len(stack) >= max_depth:
+            return
+        for callee, share in callees.get(func, ()):
+            callee_weight = weight * share
+            if _function_label(callee) in stack or stats[callee][3] * callee_weight < 1e-6:
+                continue
+            walk(callee, stack, callee_weight)
+
+    for func, func_stats in stats.items():
+        if not func_stats[4]:
+            walk(func, (), 1.0)
+
+    return [f"{stack} {value}" for stack, value in stacks.most_common()]
+
+
+def _save_profile(profiler: cProfile.Profile, duration: float) -> dict:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    endpoint = (request.endpoint or 'unmatched').replace('.', '_')
+    base_name = f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{endpoint}_{int(duration * 1000)}ms"
+
+    pstats_path = os.path.join(PROFILE_DIR, f"{base_name}.pstats")
+    profiler.dump_stats(pstats_path)
+
+    summary = io.StringIO()
+    stats = pstats.Stats(profiler, stream=summary)
+    collapsed_path = os.path.join(PROFILE_DIR, f"{base_name}.folded")
+    with open(collapsed_path, 'w', encoding='utf-8') as file:
+        file.write('\n'.join(collapsed_stacks(stats.stats)))
+
+    stats.sort_stats('cumulative').print_stats(15)
+
+    return {
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'method': request.method,
+        'duration_ms': round(duration * 1000, 2),
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'pstats_file': os.path.basename(pstats_path),
+        'collapsed_file': os.path.basename(collapsed_path),
+        'top_functions': summary.getvalue()
+    }
+
+
+def _remove_profile_files(*names):
+    for name in names:
+        if name and os.path.exists(os.path.join(PROFILE_DIR, name)):
+            os.remove(os.path.join(PROFILE_DIR, name))
+
+
+def _record_slow_request(duration: float, report: dict):
+    """Keeps the PROFILE_SLOW_REQUESTS slowest profiles; the files of the one that drops out are deleted."""
+    dropped = None
+    with _slow_requests_lock:
+        entry = (duration, next(_sequence), report)
+        if len(_slow_requests) < profile_slow_requests:
+            heapq.heappush(_slow_requests, entry)
+        else:
+            dropped = heapq.heappushpop(_slow_requests, entry)[2]
+    if dropped:
+        _remove_profile_files(dropped['pstats_file'], dropped['collapsed_file'])
+
+
+def get_slow_requests() -> list[dict]:
+    with _slow_requests_lock:
+        return [report for _, _, report in sorted(_slow_requests, key=lambda entry: entry[0], reverse=True)]
+
+
+def set_tracemalloc(enabled: bool):
+    with _memory_lock:
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+            _reset_memory_baseline()
+            _memory_state['requests'] = 0
+            logger.info("tracemalloc enabled")
+        elif not enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            _reset_memory_baseline()
+            logger.info("tracemalloc disabled")
+
+
+def _reset_memory_baseline():
+    _remove_profile_files(_memory_state['baseline_file'], _memory_state['latest_file'])
+    _memory_state.update(baseline=None, baseline_file=None, latest_file=None)
+
+
+def photos_cache_stats() -> dict:
+    cached_terms = 0
+    cached_candidates = 0
+    for state in get_all_sessions():
+        for photos in state.photos_cache.values():
+            if photos is not None:
+                cached_terms += 1
+                cached_candidates += len(photos)
+    return {'cached_terms': cached_terms, 'cached_candidates': cached_candidates}
+
+
+def take_memory_snapshot() -> dict:
+    """
+    Snapshots the heap, stores it under PROFILE_DIR and diffs it against the first snapshot. Only that baseline and
+    the latest snapshot stay on disk, so tracing for long doesn't fill it.
+    """
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    ))
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    snapshot_file = f"memory_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.snapshot"
+    snapshot.dump(os.path.join(PROFILE_DIR, snapshot_file))
+
+    with _memory_lock:
+        baseline = _memory_state['baseline']
+        if baseline is None:
+            _memory_state['baseline'] = baseline = snapshot
+            _memory_state['baseline_file'] = snapshot_file
+        else:
+            _remove_profile_files(_memory_state['latest_file'])
+            _memory_state['latest_file'] = snapshot_file
+
+    growth = snapshot.compare_to(baseline, 'lineno')[:10]
+    cache_traces = snapshot.filter_traces(CACHE_TRACE_FILTERS)
+    current, peak = tracemalloc.get_traced_memory()
+
+    report = {
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'snapshot_file': snapshot_file,
+        'traced_kb': round(current / 1024, 1),
+        'peak_kb': round(peak / 1024, 1),
+        'photos_cache_traced_kb': round(sum(stat.size for stat in cache_traces.statistics('filename')) / 1024, 1),
+        **photos_cache_stats(),
+        'top_growth': [str(stat) for stat in growth]
+    }
+    with _memory_lock:
+        _memory_reports.append(report)
+    return report
+
+
+def get_memory_reports() -> list[dict]:
+    with _memory_lock:
+        return list(_memory_reports)
+
+
+def init_app_profiling(app: Flask):
+    if tracemalloc_enabled:
+        set_tracemalloc(True)
+
+    @app.before_request
+    def start_profiler():
+        if profile_sample_rate <= 0 or random.random() >= profile_sample_rate:
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Another profiler (e.g. a debugger) is already attached to this thread
+            logger.debug(f"Skipping request profile: {e}")
+            return
+        g.profiler = profiler
+        g.profile_start_time = time.perf_counter()
+
+    @app.after_request
+    def stop_profiler(response):
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            duration = time.perf_counter() - g.pop('profile_start_time')
+            try:
+                _record_slow_request(duration, _save_profile(profiler, duration))
+            except Exception as e:
+                logger.error(f"Error saving request profile: {e}")
+
+        if tracemalloc.is_tracing():
+            with _memory_lock:
+                _memory_state['requests'] += 1
+                due = _memory_state['requests'] % tracemalloc_every == 0
+            if due:
+                try:
+                    take_memory_snapshot()
+                except Exception as e:
+                    logger.error(f"Error taking memory snapshot: {e}")
+
+        return response
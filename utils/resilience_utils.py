@@ -0,0 +1,134 @@
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, wait
+from threading import Lock
+from typing import Any, Optional
+
+from utils.env_constants import breaker_failure_threshold, breaker_recovery_seconds, provider_latency_budget
+from utils.executor_utils import get_io_executor, on_io_worker
+from utils.log_utils import logger
+from utils.metrics_utils import circuit_breaker_transitions
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+    def __init__(self, name: str):
+        super().__init__(f"Circuit for {name} is open")
+        self.name = name
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures or latency-budget overruns and fails fast while open.
+    After `recovery_seconds` a single probe call is let through (half-open); its outcome closes or re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = breaker_failure_threshold,
+                 recovery_seconds: float = breaker_recovery_seconds,
+                 latency_budget: float = provider_latency_budget):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.latency_budget = latency_budget
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.latencies: deque = deque(maxlen=100)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.state == OPEN and time.monotonic() - self._opened_at < self.recovery_seconds
+
+    def _transition(self, state: str):
+        if self.state != state:
+            logger.warning(f"Circuit for {self.name} changed from {self.state} to {state}")
+            circuit_breaker_transitions.inc(provider=self.name, state=state)
+            self.state = state
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.recovery_seconds:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, elapsed: float):
+        with self._lock:
+            self.latencies.append(elapsed)
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+            self._transition(CLOSED)
+
+    def record_failure(self, elapsed: Optional[float] = None):
+        with self._lock:
+            if elapsed is not None:
+                self.latencies.append(elapsed)
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+            self._probe_in_flight = False
+
+    def p95_latency(self, min_samples: int = 20) -> Optional[float]:
+        with self._lock:
+            if len(self.latencies) < min_samples:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    def call(self, fn: Callable[[], Any], is_failure: Callable[[Any], bool] = lambda result: False,
+             hedge_delay: Optional[float] = None) -> Any:
+        if not self.allow_request():
+            raise CircuitOpenError(self.name)
+
+        start = time.perf_counter()
+        try:
+            result = hedged_call(fn, hedge_delay) if hedge_delay is not None else fn()
+        except Exception:
+            self.record_failure(time.perf_counter() - start)
+            raise
+
+        elapsed = time.perf_counter() - start
+        if is_failure(result) or elapsed > self.latency_budget:
+            self.record_failure(elapsed)
+        else:
+            self.record_success(elapsed)
+        return result
+
+
+def hedged_call(fn: Callable[[], Any], delay: float) -> Any:
+    """
+    Runs fn and, if it has not finished after `delay` seconds, starts an identical second attempt.
+    Returns the first successful result; only use for idempotent calls. On an I/O worker fn just runs inline, since
+    waiting there for attempts queued on the same pool can deadlock it.
+    """
+    if on_io_worker():
+        return fn()
+    executor = get_io_executor()
+    first = executor.submit(fn)
+    done, _ = wait([first], timeout=delay)
+    if done:
+        return first.result()
+
+    pending = {first, executor.submit(fn)}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error